@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import pickle
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+# The loaders create the database engine on import, a temporary SQLite database is enough here
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from utils.load_data import cache, tag_versions, invalidate
+from utils.cache_backend import cache_backend, dumps_value
+
+# ------------------------------------------------------------------------------
+# Cache backend check
+#   Round-trips a DataFrame and a Plotly figure through the configured cache backend, compares the
+#   serializer with plain pickle, and checks that an invalidation made by another process is seen
+#   by this one. Exits with status 1 if a check fails.
+#
+#   CACHE_BACKEND=filesystem python -m benchmarks.cache_backend
+#   CACHE_BACKEND=redis CACHE_REDIS_URL=redis://localhost:6379/0 python -m benchmarks.cache_backend
+
+ROWS = 20000
+ROUNDS = 20
+
+def cache_app():
+    app = Flask(__name__)
+    cache.init_app(app)
+    return app
+
+def sample_frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'transactionid': np.arange(ROWS),
+        'userid': rng.integers(1, 50, ROWS),
+        'date': pd.to_datetime('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, ROWS), unit='D'),
+        'categoryname': rng.choice(['Groceries', 'Rent', 'Transport', 'Dining', 'Utilities'], ROWS),
+        'amount': rng.uniform(1, 500, ROWS).round(2),
+        'description': rng.choice(['card', 'cash', 'transfer'], ROWS)
+    })
+
+def mean_ms(function):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        function()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+def compare_serializers(name, value):
+    pickled, serialized = pickle.dumps(value, pickle.HIGHEST_PROTOCOL), dumps_value(value)
+    pickle_ms = mean_ms(lambda: pickle.loads(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+    serializer_ms = mean_ms(lambda: pickle.loads(dumps_value(value)))
+    print(f"  {name:<10} pickle {len(pickled) / 1024:8.1f} KiB {pickle_ms:7.2f} ms   "
+          f"serializer {len(serialized) / 1024:8.1f} KiB {serializer_ms:7.2f} ms")
+
+# Runs in another process, as another worker would
+def invalidate_in_worker():
+    with cache_app().app_context():
+        invalidate('transactions', user_id=1)
+
+if __name__ == '__main__':
+    failures = []
+    df = sample_frame()
+    figure = px.bar(df.groupby('categoryname', as_index=False)['amount'].sum(), x='categoryname', y='amount')
+
+    print(f"Serialization of {ROWS} transactions (dump + load, mean of {ROUNDS})")
+    compare_serializers('DataFrame', df)
+    compare_serializers('Figure', figure)
+
+    with cache_app().app_context():
+        print(f"Cache backend: {cache_backend()}")
+        cache.set('check:frame', df)
+        cache.set('check:figure', figure)
+        if not df.equals(cache.get('check:frame')):
+            failures.append("DataFrame round trip")
+        cached_figure = cache.get('check:figure')
+        if cached_figure is None or json.loads(cached_figure.to_json()) != json.loads(figure.to_json()):
+            failures.append("figure round trip")
+        cache.delete_many('check:frame', 'check:figure')
+
+        if cache_backend() == 'simple':
+            print("SimpleCache is per process, skipping the cross-process invalidation check")
+        else:
+            tags = [('transactions', 'any')]
+            before = tag_versions(1, tags)
+            worker = multiprocessing.get_context('spawn').Process(target=invalidate_in_worker)
+            worker.start()
+            worker.join()
+            if tag_versions(1, tags) == before:
+                failures.append("invalidation from another process")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("Cache backend checks passed")
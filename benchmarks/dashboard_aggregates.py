@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Importing utils creates the database engine, a temporary SQLite database is enough here
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dashboard_aggregates import month_aggregates, transaction_table_rows
+from utils.transactions_table import order_transactions
+
+# ------------------------------------------------------------------------------
+# Dashboard aggregation microbenchmarks
+#   Times the aggregates of one month (category totals, cumulative daily spending and its
+#   crossover with the budget) and the rows of the transactions table, with the previous pandas
+#   code (groupby per figure, per-row apply, concat, sort_values + strftime + to_dict) and with
+#   the single NumPy pass of utils/dashboard_aggregates.py, on months of 10k to 200k transactions.
+#   Both results are checked to be equal.
+#
+#   python -m benchmarks.dashboard_aggregates
+
+SIZES = [10_000, 50_000, 200_000]
+ROUNDS = 10
+CATEGORIES = ['Housing', 'Investments', 'Debt Payments', 'Healthcare', 'Food', 'Entertainment & Leisure',
+              'Education', 'Transportation', 'Personal Care', 'Miscellaneous']
+
+def month_transactions(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'transactionid': np.arange(rows),
+        'date': pd.to_datetime('2023-05-01') + pd.to_timedelta(rng.integers(0, 31, rows), unit='D'),
+        'categoryname': rng.choice(CATEGORIES, rows),
+        'amount': rng.uniform(1, 100, rows).round(2),
+        'description': rng.choice(['card', 'cash', 'transfer'], rows)
+    })
+
+# The previous dashboard code
+def pandas_aggregates(df, monthly_budget):
+    category_spending = df.groupby('categoryname', as_index=False)['amount'].sum()
+    daily_spending = df.groupby(df['date'].dt.day)['amount'].sum().cumsum().reset_index()
+    daily_spending.columns = ['Day', 'Cumulative Spending']
+    daily_spending['Status'] = daily_spending['Cumulative Spending'].apply(lambda x: 'Under' if x <= monthly_budget else 'Over')
+    over_index = daily_spending[daily_spending['Status'] == 'Over'].index.min()
+    if not pd.isna(over_index):
+        daily_spending = pd.concat([daily_spending.loc[:over_index], daily_spending.loc[over_index:]])
+    return category_spending, daily_spending, df['amount'].sum()
+
+def pandas_table_rows(df):
+    df = df.sort_values('date', ascending=False)
+    df = df.assign(date_display=df['date'].dt.strftime('%Y-%m-%d'))
+    return df[['date_display', 'categoryname', 'amount', 'description']].to_dict('records')
+
+def numpy_aggregates(df, monthly_budget):
+    return month_aggregates(df['date'].dt.day.to_numpy(), df['categoryname'].to_numpy(), df['amount'].to_numpy(), monthly_budget)
+
+# Most recent first, as the transactions table pages (see utils/transactions_table.py)
+def numpy_table_rows(df):
+    return transaction_table_rows(order_transactions(df))
+
+def mean_ms(function):
+    function() # Warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        function()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+def check_equal(df, monthly_budget):
+    category_spending, daily_spending, total_spent = pandas_aggregates(df, monthly_budget)
+    aggregates = numpy_aggregates(df, monthly_budget)
+    assert np.allclose(category_spending['amount'], aggregates['category_totals'])
+    assert list(category_spending['categoryname']) == list(aggregates['categories'])
+    assert np.allclose(daily_spending.drop_duplicates('Day')['Cumulative Spending'], aggregates['cumulative'])
+    assert np.isclose(total_spent, aggregates['total_spent'])
+
+    # Same rows, the order of transactions of the same day is not defined by the previous code
+    key = lambda row: (row['date_display'], row['categoryname'], row['amount'], row['description'])
+    assert sorted(pandas_table_rows(df), key=key) == sorted(numpy_table_rows(df), key=key)
+
+if __name__ == '__main__':
+    print(f"Dashboard aggregation of one month (mean of {ROUNDS})")
+    print(f"  {'transactions':>12}  {'aggregates pandas':>17}  {'numpy':>8}  {'table pandas':>12}  {'numpy':>8}")
+    for rows in SIZES:
+        df = month_transactions(rows)
+        monthly_budget = df['amount'].sum() * 0.6 # Over budget during the month
+        check_equal(df, monthly_budget)
+
+        print(f"  {rows:>12}  {mean_ms(lambda: pandas_aggregates(df, monthly_budget)):14.2f} ms"
+              f"  {mean_ms(lambda: numpy_aggregates(df, monthly_budget)):5.2f} ms"
+              f"  {mean_ms(lambda: pandas_table_rows(df)):9.2f} ms"
+              f"  {mean_ms(lambda: numpy_table_rows(df)):5.2f} ms")
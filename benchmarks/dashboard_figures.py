@@ -0,0 +1,328 @@
+import os
+import sys
+import time
+import json
+import base64
+import tempfile
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+# Importing utils creates the database engine, a temporary SQLite database is enough here
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dashboard_aggregates import month_aggregates, category_spending
+from utils.dashboard_figures import (expense_categorization_figure, daily_spending_trend_figure,
+                                     budget_vs_actual_spending_figure)
+
+# ------------------------------------------------------------------------------
+# Dashboard figure golden checks and latency
+#   Builds the dashboard figures with the previous plotly.express code (kept below as the golden
+#   reference) and with utils/dashboard_figures.py, checks that both give the same figure for a set
+#   of months (over budget, never over, over from the first day, refunds, categories without a
+#   color or a budget), then times both. Exits with status 1 if a figure differs.
+#
+#   python -m benchmarks.dashboard_figures
+
+ROUNDS = 20
+
+# ------------------------------------------------------------------------------
+# Golden reference: the plotly.express builders previously in callbacks/dashboard_callback.py
+
+def update_expense_categorization_graph(aggregates):
+    category_colors = {
+        "Housing": "#FF5733",           # Vibrant Red
+        "Investments": "#1F77B4",       # Bright Blue
+        "Debt Payments": "#2CA02C",     # Bold Green
+        "Healthcare": "#9467BD",        # Medium Purple
+        "Food": "#FF69B4",              # Hot Pink
+        "Entertainment & Leisure": "#17BECF",  # Vibrant Teal
+        "Education": "#7F7F7F",         # Neutral Gray
+        "Transportation": "#C0C0C0",    # Light Silver
+        "Personal Care": "#FFA500",     # Bright Orange
+        "Miscellaneous": "#FF4500"      # Orange Red
+    }
+
+    category_spending = pd.DataFrame({'categoryname': aggregates['categories'], 'amount': aggregates['category_totals']})
+
+    fig = px.pie(
+        category_spending, 
+        values='amount', 
+        names='categoryname', 
+        color='categoryname',
+        hole=0.3,
+        color_discrete_map=category_colors
+    )
+
+    fig.update_traces(
+        # textinfo='percent',  # Show both percentage and label
+        insidetextorientation='radial',  # Better orientation for text inside
+        textfont=dict(
+            color='#eeeee4',
+            size=10
+        )
+    )
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=0, r=0, t=0, b=0),
+        legend=dict(
+            font=dict(
+                color="#eeeee4",
+                size=10
+            )
+        )
+    )
+
+    return fig
+
+def update_daily_spending_trend_graph(aggregates, monthly_budget):
+    # Cumulative total of the daily spending, for the days with spending
+    daily_spending = pd.DataFrame({'Day': aggregates['days'], 'Cumulative Spending': aggregates['cumulative']})
+
+    # Creating a new dataFrame, budget_line
+    max_day = int(aggregates['days'].max())
+    budget_line = pd.DataFrame({
+        # creates a column named 'day' consisting of the values '1' and 'max_day'
+        'Day': [1, max_day],
+        'Total Budget': [monthly_budget, monthly_budget]
+    })
+
+    # Adds a column called 'status' to the daily_spending dataFrame
+    daily_spending['Status'] = np.where(aggregates['cumulative'] <= monthly_budget, 'Under', 'Over')
+
+    over_spending = pd.DataFrame() # Initialize an empty DataFrame
+    over_index = aggregates['over_index'] # First day over the budget
+
+    # If there is an 'Over' index, create two segments: 'Under' and 'Over'
+    if over_index is not None:
+        # The 'Over' segment starts at the last day under budget, labeled as 'Over' so the segments connect
+        over_spending = daily_spending.iloc[max(over_index - 1, 0):].copy()
+        over_spending.iloc[0, daily_spending.columns.get_loc('Status')] = 'Over'
+        # The crossover day ends the 'Under' rows and starts the 'Over' ones
+        rows = np.r_[0:over_index + 1, over_index:len(daily_spending)]
+        combined_spending = daily_spending.iloc[rows]
+    else:
+        combined_spending = daily_spending
+
+    fig = px.line(
+        combined_spending,
+        x='Day',
+        y='Cumulative Spending',
+        labels={
+            'Cumulative Spending': 'cumulative spending ($)',
+            'Day': 'day'
+        },
+        color='Status',
+        color_discrete_map={'Under': 'green', 'Over': 'red'},
+        markers=True
+    )
+
+    # Add the 'Over' segment if it exists
+    if not over_spending.empty:
+        fig.add_scatter(
+            x=over_spending['Day'], 
+            y=over_spending['Cumulative Spending'], 
+            mode='lines+markers', 
+            name='Over', 
+            line=dict(color='red', 
+            width=3), 
+            showlegend= False)
+        
+    # Add budget line to the same figure
+    fig.add_scatter(
+        x=budget_line['Day'], 
+        y=budget_line['Total Budget'], 
+        mode='lines', 
+        name='Monthly Budget', 
+        line=dict(
+            color='#f8d44c', 
+            dash='dash',
+            width=5
+        )
+    )
+
+    fig.update_traces(
+        line=dict(width=3)
+    ) 
+
+    # Customize the plot
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=0, b=0),  # Left, Right, Top, Bottom margins in pixels
+
+        xaxis_tickangle=0,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            tickmode='array',
+            tickvals=list(range(1, max_day + 1, 1)),  # Tick every day
+            tickfont=dict(
+                size=7,
+                color="#eeeee4"
+            ),
+            title_font=dict(
+                color="#eeeee4"),
+            showgrid=False
+        ),
+        yaxis=dict(
+            title_font=dict(color="#eeeee4"),
+            tickfont=dict(color="#eeeee4"),
+            showgrid=True,
+            gridcolor='lightblue'
+        ),
+        legend=dict(
+            title='',
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='center',
+            x=0.5,
+            font=dict(
+                color="#eeeee4",
+                size=10
+            )
+        )
+    )
+
+    return fig
+
+def update_budget_vs_actual_spending_graph(aggregates, categorical_budgets_df):
+    # Budget of each category
+    budget_data = categorical_budgets_df[['categoryname', 'categorybudget']].groupby('categoryname').sum().reset_index() 
+    
+    # Spending of each budgeted category, 0 for categories with no spending
+    summary_df = budget_data.assign(amount=category_spending(aggregates, budget_data['categoryname']))
+
+    summary_df.rename(columns={'categorybudget': 'Budget', 'amount': 'Spent'}, inplace=True)
+
+    # Create the bar chart for Budget vs Actual Spending
+    fig = px.bar(
+        summary_df, 
+        x='categoryname', 
+        y=['Budget', 'Spent'],
+        labels={
+            'categoryname': 'category types',
+            'value': 'amount ($)', #represented with 2 different y-values, so is labeled as 'value'
+            'variable': '' #represented with 2 different y-values, so is labeled as 'value'
+        },
+        barmode='group',
+        color_discrete_sequence=["#92154f", "#f19500"]  # Blue for Budget, Red for Actual Spending
+    )
+    
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=0, b=0),
+        xaxis_tickangle=45,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+
+        legend = dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5,
+            font=dict(
+                color="#eeeee4",
+                size=10
+            )
+        ),
+        xaxis=dict(
+            title_font=dict(color="#eeeee4"),  # Color for the X-axis title
+            tickfont=dict(
+                color="#eeeee4",
+                size=10
+                ),  # Color for the X-axis ticks
+            showgrid=True,  # Determines whether or not grid lines are drawn
+            gridcolor='rgba(0,0,0,0)'  # Color of grid lines
+        ),
+        yaxis=dict(
+            title_font=dict(color="#eeeee4"),  # Color for the Y-axis title
+            tickfont=dict(color="#eeeee4"),  # Color for the Y-axis ticks
+            showgrid=True,  # Determines whether or not grid lines are drawn
+            gridcolor='lightblue'  # Color of grid lines
+        )
+    )
+                
+    return fig
+
+# ------------------------------------------------------------------------------
+# Comparison
+
+# Figures in their JSON wire form, with typed arrays ({'dtype', 'bdata'}) decoded to lists
+def normalized(value):
+    if isinstance(value, dict):
+        if 'bdata' in value and 'dtype' in value:
+            array = np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype'])
+            return array.reshape(value['shape']).tolist() if 'shape' in value else array.tolist()
+        return {key: normalized(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalized(item) for item in value]
+    return value
+
+def wire(fig):
+    return normalized(json.loads(json.dumps(fig) if isinstance(fig, dict) else fig.to_json()))
+
+# Month of spending rows: (day, category, amount)
+def month_case(rows, monthly_budget, budgets):
+    days, categories, amounts = zip(*rows)
+    aggregates = month_aggregates(days, categories, amounts, monthly_budget)
+    categorical_budgets_df = pd.DataFrame(budgets, columns=['categoryname', 'categorybudget'])
+    return aggregates, monthly_budget, categorical_budgets_df
+
+def random_month(rows, seed):
+    rng = np.random.default_rng(seed)
+    categories = list(CATEGORY_NAMES)
+    return list(zip(rng.integers(1, 31, rows).tolist(), rng.choice(categories, rows).tolist(),
+                    rng.uniform(1, 200, rows).round(2).tolist()))
+
+CATEGORY_NAMES = ['Housing', 'Investments', 'Debt Payments', 'Healthcare', 'Food', 'Entertainment & Leisure',
+                  'Education', 'Transportation', 'Personal Care', 'Miscellaneous']
+BUDGETS = [('Housing', 1000.0), ('Food', 300.0), ('Transportation', 150.0), ('Education', 100.0), ('Food', 50.0)]
+
+CASES = {
+    'over budget': month_case(random_month(200, 0), 12000.0, BUDGETS),
+    'never over': month_case(random_month(200, 1), 1e6, BUDGETS),
+    'over from the first day': month_case([(1, 'Housing', 900.0), (3, 'Food', 50.0), (9, 'Food', 20.0)], 500.0, BUDGETS),
+    'refunds': month_case([(1, 'Food', 300.0), (2, 'Food', 400.0), (4, 'Food', -250.0), (8, 'Housing', 100.0)], 600.0, BUDGETS),
+    'categories without a color': month_case([(2, 'Pets', 40.0), (5, 'Gifts', 60.0), (5, 'Food', 10.0), (7, 'Zoo', 5.0)], 80.0,
+                                            [('Gifts', 50.0), ('Pets', 30.0)]),
+    'single day': month_case([(15, 'Food', 42.5)], 100.0, BUDGETS)
+}
+
+def build_express(aggregates, monthly_budget, categorical_budgets_df):
+    return (update_expense_categorization_graph(aggregates),
+            update_daily_spending_trend_graph(aggregates, monthly_budget),
+            update_budget_vs_actual_spending_graph(aggregates, categorical_budgets_df))
+
+def build_dicts(aggregates, monthly_budget, categorical_budgets_df):
+    return (expense_categorization_figure(aggregates),
+            daily_spending_trend_figure(aggregates, monthly_budget),
+            budget_vs_actual_spending_figure(aggregates, categorical_budgets_df))
+
+def mean_ms(function):
+    function() # Warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        function()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+if __name__ == '__main__':
+    failures = []
+    for name, case in CASES.items():
+        for express_fig, dict_fig in zip(build_express(*case), build_dicts(*case)):
+            if wire(express_fig) != wire(dict_fig):
+                failures.append(f"{name}: {dict_fig['data'][0]['type']} figure differs")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print(f"Golden checks: {len(CASES) * 3 - len(failures)} of {len(CASES) * 3} figures match plotly.express")
+
+    case = CASES['over budget']
+    print(f"Building the three dashboard figures (mean of {ROUNDS})")
+    print(f"  plotly.express + to_json  {mean_ms(lambda: [json.loads(fig.to_json()) for fig in build_express(*case)]):8.2f} ms")
+    print(f"  dict builders             {mean_ms(lambda: build_dicts(*case)):8.2f} ms")
+
+    if failures:
+        raise SystemExit(1)
@@ -0,0 +1,278 @@
+import os
+import sys
+import time
+import tempfile
+import contextlib
+import io
+
+# The dashboard runs against a temporary copy of the local database in SQLite, the repository is left as is
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+if os.environ['STORAGE_BACKEND'] == 'sqlite':
+    os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(), 'benchmark.db'))
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from dash import Dash, html, Input, Output
+with contextlib.redirect_stdout(io.StringIO()):
+    from myfinanceplanner import server, USE_REMOTE_DB
+from utils.load_data import invalidate, load_month_transactions, load_month_rollups, load_budgets, user_memoize
+from utils.dashboard_aggregates import rollup_aggregates, transaction_table_rows
+from utils.dashboard_figures import expense_categorization_figure, daily_spending_trend_figure, budget_vs_actual_spending_figure
+from utils.transactions_table import PAGE_SIZE
+
+# ------------------------------------------------------------------------------
+# Dashboard interaction benchmark
+#   Browses the months of a year on the dashboard through Dash's update endpoint, as the browser
+#   does, and reports the response bytes and server CPU time per month change:
+#     previous  the previous single callback (kept below as the reference), every output in full
+#               and the whole month of the transactions table
+#     split     the dashboard callbacks, figures sent in full on every change
+#     patched   the dashboard callbacks, figures sent as patches once the browser shows one
+#   Each is measured with cold caches (every month computed, as after a write with the previous
+#   callback, whose entry depended on every table) and warm caches, then after a change of the
+#   monthly budget, which only recomputes the outputs that read it in the split callbacks.
+#
+#   python -m benchmarks.dashboard_interaction
+#   STORAGE_BACKEND=local python -m benchmarks.dashboard_interaction --user 2
+
+USER = 1
+YEAR = 2023
+MONTHS = range(1, 13)
+ROUNDS = 10
+TABLES = ['transactions', 'monthlybudgets', 'categoricalbudgets']
+MODES = ['previous', 'split', 'patched']
+
+# ------------------------------------------------------------------------------
+# Reference: the previous single callback of callbacks/dashboard_callback.py, before it was split,
+# registered on a second Dash app under /previous/ of the same server (same session and cache)
+
+def previous_dashboard_callback(app, use_remote_db=False):
+    @app.callback(
+        [Output('net-balance-output', 'children'), 
+        Output('status-output', 'children'),
+        Output('expense_categorization_graph', 'figure'), 
+        Output('daily_spending_trend_graph', 'figure'),
+        Output('budget_vs_actual_spending_graph', 'figure'),
+        Output('transactions_table', 'data')],
+        [Input('slct_year', 'value'),
+        Input('slct_month', 'value')]
+    )
+
+    # Cached per user and month, invalidated by writes to the month's transactions and budgets
+    @user_memoize(tables=['transactions', 'monthlybudgets', 'categoricalbudgets'], month=lambda year, month: (year, month))
+    def update_graph(selected_year, selected_month):
+        if not (selected_year and selected_month):
+            return 'No transactions found', '', {}, {}, {}, []
+
+        # Load the pre-aggregated spending (per day and category) of the selected month for the logged-in user
+        rollups_df = load_month_rollups(use_remote_db, selected_year, selected_month)
+
+        # Ensure the dataframe is not empty
+        if rollups_df.empty:
+            return 'No transactions found', '', {}, {}, {}, []
+
+        # Load the budgets of the logged-in user
+        monthly_budgets_df, categorical_budgets_df = load_budgets(use_remote_db)
+
+        # Monthly budgets are stored on the first day of their month
+        # .iloc[0] retrieves the first value from the resulting series
+        budget_month = pd.Timestamp(year=selected_year, month=selected_month, day=1)
+        monthly_budget = monthly_budgets_df[monthly_budgets_df['budgetmonth'] == budget_month]['totalbudget'].iloc[0]
+
+        # Spending per category, cumulative spending per day and total spent in a month, in one pass over the rollups
+        aggregates = rollup_aggregates(rollups_df, monthly_budget)
+        total_spent = aggregates['total_spent']
+
+        net_balance = monthly_budget - total_spent
+        print("Net Balance:", net_balance)  # Debugging statement
+
+        net_balance_output = format_net_balance(net_balance)
+        net_balance_output = html.Span(net_balance_output, className='netBalanceOutput')
+        
+        status_text, color = determine_status(monthly_budget, total_spent, selected_year, selected_month)
+        status_output = html.Span(status_text, style={'color': color}, className='statusOutput')
+
+        expense_categorization_fig = expense_categorization_figure(aggregates)
+        daily_spending_trend_fig = daily_spending_trend_figure(aggregates, monthly_budget)
+        budget_vs_actual_spending_fig = budget_vs_actual_spending_figure(aggregates, categorical_budgets_df)
+        
+        # Load only the selected month of the logged-in user's transactions through the month index
+        filtered_df = load_month_transactions(use_remote_db, selected_year, selected_month)
+        transactions_table_data = transaction_table_rows(filtered_df) # Most recent first
+
+        # same order as in the output call-back
+        return net_balance_output, status_output, expense_categorization_fig, daily_spending_trend_fig, budget_vs_actual_spending_fig, transactions_table_data
+
+    def format_net_balance(net_balance):
+        if net_balance < 0:
+            formatted_balance = f"({-net_balance})"
+        else:
+            formatted_balance = str(net_balance)
+        print("Formatted Balance:", formatted_balance)  # Debugging statement
+        return formatted_balance
+
+    def determine_status(monthly_budget, total_spent, selected_year, selected_month):
+        # key-value pairs
+        status_colors = {
+            "EXCELLENT": "#00FF00",     
+            "VERY GOOD": "#7FFF00",     
+            "GOOD": "#FFFF00",          
+            "FAIR": "#FFD700",          
+            "NEEDS IMPROVEMENT": "#FFA500",
+            "POOR": "#FF8C00",          
+            "VERY POOR": "#FF4500",      
+            "EXTREMELY POOR": "#FF0000",
+            "CRITICAL": "#DC143C",      
+            "SEVERE": "#8B0000"         
+        }
+
+        daily_budget = calculated_daily_budget(monthly_budget, selected_year, selected_month)
+        today = pd.Timestamp.today()
+        if selected_year == today.year and selected_month == today.month:
+            days_so_far = today.day
+        else:
+            days_so_far = pd.Period(f'{selected_year}-{selected_month}').days_in_month
+
+        average_daily_spending = total_spent / days_so_far
+        spent_percentage = (average_daily_spending/daily_budget) * 100
+
+        if spent_percentage < 50:
+            status_key = "EXCELLENT"
+        elif 50 <= spent_percentage < 70:
+            status_key = "VERY GOOD"
+        elif 70 <= spent_percentage < 85:
+            status_key = "GOOD"
+        elif 85 <= spent_percentage < 95:
+            status_key = "FAIR"
+        elif 95 <= spent_percentage < 100:
+            status_key = "NEEDS IMPROVEMENT"
+        elif 100 <= spent_percentage < 110:
+            status_key = "POOR"
+        elif 110 <= spent_percentage < 120:
+            status_key = "VERY POOR"
+        elif 120 <= spent_percentage < 130:
+            status_key = "EXTREMELY POOR"
+        elif 130 <= spent_percentage < 150:
+            status_key = "CRITICAL"
+        else:
+            status_key = "SEVERE"
+
+        return status_key, status_colors[status_key]
+
+    def calculated_daily_budget(monthly_budget, year, month):
+        days_in_month = pd.Period(f'{year}-{month}').days_in_month
+        return monthly_budget/days_in_month
+
+PREVIOUS_PREFIX = '/previous/'
+previous_app = Dash(__name__, server=server, url_base_pathname=PREVIOUS_PREFIX, suppress_callback_exceptions=True)
+previous_app.layout = html.Div()
+previous_dashboard_callback(previous_app, USE_REMOTE_DB)
+
+PREVIOUS_OUTPUTS = [[('net-balance-output', 'children'), ('status-output', 'children'),
+                     ('expense_categorization_graph', 'figure'), ('daily_spending_trend_graph', 'figure'),
+                     ('budget_vs_actual_spending_graph', 'figure'), ('transactions_table', 'data')]]
+
+# ------------------------------------------------------------------------------
+
+# Outputs of the dashboard callbacks
+OUTPUTS = [
+    [('net-balance-output', 'children'), ('status-output', 'children'),
+     ('expense_categorization_graph', 'figure'), ('expense_categorization_graph_key', 'data'),
+     ('daily_spending_trend_graph', 'figure'), ('daily_spending_trend_graph_key', 'data')],
+    [('budget_vs_actual_spending_graph', 'figure'), ('budget_vs_actual_spending_graph_key', 'data')],
+    [('transactions_table', 'data'), ('transactions_table', 'page_count'), ('transactions_table', 'page_current'),
+     ('transactions_table_message', 'children')]
+]
+
+# The first page of the transactions table, unsorted and unfiltered
+TABLE_INPUTS = [('page_current', 0), ('page_size', PAGE_SIZE), ('sort_by', []), ('filter_query', '')]
+
+def dashboard_client(user_id):
+    client = server.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['user_id'] = user_id
+    return client
+
+def update_request(outputs, month, shown_keys):
+    if len(outputs) == 1:
+        output = '.'.join(outputs[0])
+        outputs_list = {'id': outputs[0][0], 'property': outputs[0][1]}
+    else:
+        output = '..' + '...'.join('.'.join(output) for output in outputs) + '..'
+        outputs_list = [{'id': id, 'property': property} for id, property in outputs]
+
+    state = [{'id': id, 'property': 'data', 'value': shown_keys.get(id)} for id, _ in outputs if id.endswith('_key')]
+    inputs = [{'id': 'slct_year', 'property': 'value', 'value': YEAR},
+              {'id': 'slct_month', 'property': 'value', 'value': month}]
+    if outputs[0][0] == 'transactions_table':
+        inputs += [{'id': 'transactions_table', 'property': property, 'value': value} for property, value in TABLE_INPUTS]
+    return {
+        'output': output,
+        'outputs': outputs_list,
+        'inputs': inputs,
+        'state': state,
+        'changedPropIds': ['slct_month.value']
+    }
+
+# Bytes and seconds of the updates of one month change, remembering the figure keys when patching
+def change_month(client, month, shown_keys, mode):
+    sent, elapsed = 0, 0.0
+    for outputs in (PREVIOUS_OUTPUTS if mode == 'previous' else OUTPUTS):
+        payload = update_request(outputs, month, shown_keys if mode == 'patched' else {})
+        endpoint = (PREVIOUS_PREFIX if mode == 'previous' else '/') + '_dash-update-component'
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.process_time()
+            response = client.post(endpoint, json=payload)
+            elapsed += time.process_time() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"Update of {payload['output']} failed ({response.status_code}): {response.data[:500]}")
+
+        sent += len(response.data)
+        for id, values in response.get_json()['response'].items():
+            if id.endswith('_key'):
+                shown_keys[id] = values['data']
+    return sent, elapsed
+
+def invalidate_user(user_id, tables, months=None):
+    with server.app_context():
+        for table in tables:
+            invalidate(table, months, user_id=user_id)
+
+# Bytes and seconds of each month change of a browse through the year
+def browse(client, mode, before_each=None):
+    shown_keys = {}
+    changes = []
+    for month in MONTHS:
+        if before_each:
+            before_each(month)
+        changes.append(change_month(client, month, shown_keys, mode))
+    return changes
+
+# Mean bytes and CPU milliseconds per month change, each change timed at its fastest of ROUNDS browses
+def measure(client, mode, before_each=None):
+    browses = [browse(client, mode, before_each) for _ in range(ROUNDS)]
+    sent = sum(sent for sent, _ in browses[0]) / len(MONTHS)
+    elapsed = sum(min(changes) for changes in zip(*[[elapsed for _, elapsed in changes] for changes in browses])) / len(MONTHS)
+    return sent, elapsed * 1000
+
+if __name__ == '__main__':
+    user_id = int(sys.argv[sys.argv.index('--user') + 1]) if '--user' in sys.argv else USER
+    client = dashboard_client(user_id)
+    scenarios = [
+        ('cold caches', lambda month: invalidate_user(user_id, TABLES)),
+        ('warm caches', None),
+        ('budget changed', lambda month: invalidate_user(user_id, ['monthlybudgets'], [f'{YEAR}-{month:02d}-01']))
+    ]
+
+    print(f"Dashboard month change, {YEAR} months of user {user_id} (mean per change, best of {ROUNDS})")
+    print(f"  {'':<16}" + ''.join(f"  {mode:>20}" for mode in MODES))
+    for name, before_each in scenarios:
+        if before_each is None:
+            for mode in MODES:
+                browse(client, mode) # Warm up
+        results = [measure(client, mode, before_each) for mode in MODES]
+        print(f"  {name:<16}" + ''.join(f"  {sent:9.0f} B {elapsed:6.2f} ms" for sent, elapsed in results))
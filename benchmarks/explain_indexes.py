@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+
+# Without a DATABASE_URL the check runs against a temporary SQLite database
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from utils.load_data import global_engine
+from utils.sqlite_db import schema
+
+# ------------------------------------------------------------------------------
+# Index check
+#   Runs EXPLAIN on the hot queries and checks that each one is planned with its index.
+#   On PostgreSQL sequential scans are disabled for the check, so the result does not depend on
+#   the size of the tables (the planner prefers a sequential scan on small tables anyway).
+#   Exits with status 1 if a query does not use its index.
+#
+#   DATABASE_URL=postgresql://... python -m benchmarks.explain_indexes
+
+# (description, query, parameters, index the query should use)
+HOT_QUERIES = [
+    ("transactions of a month",
+     "SELECT * FROM Transactions WHERE userid = :userid AND date >= :start AND date < :end ORDER BY date",
+     {'userid': 1, 'start': '2023-01-01', 'end': '2023-02-01'}, 'transactions_userid_date_idx'),
+    ("transactions table page",
+     """SELECT date, categoryname, amount, description FROM Transactions
+        WHERE userid = :userid AND date >= :start AND date < :end AND amount > :filter0
+        ORDER BY amount DESC, date DESC, transactionid DESC LIMIT :limit OFFSET :offset""",
+     {'userid': 1, 'start': '2023-01-01', 'end': '2023-02-01', 'filter0': 20, 'limit': 15, 'offset': 15},
+     'transactions_userid_date_idx'),
+    ("latest transaction date",
+     "SELECT MAX(date) FROM Transactions WHERE userid = :userid",
+     {'userid': 1}, 'transactions_userid_date_idx'),
+    ("monthly budgets of a user",
+     "SELECT * FROM MonthlyBudgets WHERE userid = :userid",
+     {'userid': 1}, 'monthlybudgets_userid_budgetmonth_key'),
+    ("budget of a month",
+     "SELECT totalbudget FROM MonthlyBudgets WHERE userid = :userid AND budgetmonth = :budgetmonth",
+     {'userid': 1, 'budgetmonth': '2023-01-01'}, 'monthlybudgets_userid_budgetmonth_key'),
+    ("category budgets of a user",
+     "SELECT * FROM CategoricalBudgets WHERE userid = :userid",
+     {'userid': 1}, 'categoricalbudgets_userid_categoryname_key'),
+    ("login by email",
+     "SELECT userid, password FROM users WHERE email = :email",
+     {'email': 'user@example.com'}, 'users_email_key'),
+]
+
+# The query plan as text, one line per plan node
+def explain(conn, query, params):
+    if global_engine.dialect.name == 'sqlite':
+        rows = conn.execute(text("EXPLAIN QUERY PLAN " + query), params).all()
+        return '\n'.join(row[-1] for row in rows)
+
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    rows = conn.execute(text("EXPLAIN " + query), params).all()
+    return '\n'.join(row[0] for row in rows)
+
+if __name__ == '__main__':
+    if global_engine.dialect.name == 'sqlite':
+        schema.create_all(global_engine) # Same tables and indexes as the SQLite backend
+
+    missing = []
+    print(f"Query plans on {global_engine.dialect.name}")
+    with global_engine.begin() as conn:
+        for description, query, params, index in HOT_QUERIES:
+            plan = explain(conn, query, params)
+            uses_index = index in plan.lower()
+            if not uses_index:
+                missing.append(description)
+
+            print(f"  {description:<28} {'uses ' + index if uses_index else 'MISSING ' + index}")
+            for line in plan.splitlines():
+                print(f"      {line}")
+
+    if missing:
+        print(f"{len(missing)} queries do not use their index, run: python manage.py migrate-db")
+        raise SystemExit(1)
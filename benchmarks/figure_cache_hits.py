@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from dash import html
+from plotly.io.json import to_json_plotly
+
+# The loaders create the database engine on import, a temporary SQLite database is enough here
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from utils.load_data import cache
+from utils.cache_backend import cache_backend
+from utils.memory_cache import fresh_copy
+
+# ------------------------------------------------------------------------------
+# Dashboard cache hit latency
+#   Times a cache hit of the dashboard outputs, from the lookup to the JSON response Dash sends,
+#   with the figures cached as Figure objects (before) and in their JSON wire form (after):
+#     memory   hit in the in-process LRU (copy of the frames only)
+#     backend  hit in the configured cache backend (deserialization)
+#
+#   python -m benchmarks.figure_cache_hits
+#   CACHE_BACKEND=filesystem python -m benchmarks.figure_cache_hits
+
+ROUNDS = 50
+CATEGORIES = ['Housing', 'Investments', 'Debt Payments', 'Healthcare', 'Food', 'Entertainment & Leisure',
+              'Education', 'Transportation', 'Personal Care', 'Miscellaneous']
+
+# JSON wire form of a figure, as the dashboard builds them (see utils/dashboard_figures.py)
+def wire_figure(fig):
+    return json.loads(fig.to_json())
+
+def cache_app():
+    app = Flask(__name__)
+    cache.init_app(app)
+    return app
+
+# Outputs of the dashboard for a month of 30 days, with figures like the dashboard's
+def dashboard_outputs(figure_form):
+    rng = np.random.default_rng(0)
+    category_spending = pd.DataFrame({'categoryname': CATEGORIES, 'amount': rng.uniform(20, 800, len(CATEGORIES)).round(2)})
+    daily_spending = pd.DataFrame({'Day': np.arange(1, 31), 'Cumulative Spending': rng.uniform(10, 150, 30).cumsum().round(2)})
+    daily_spending['Status'] = np.where(daily_spending['Cumulative Spending'] <= 2500, 'Under', 'Over')
+    budgets = category_spending.assign(Budget=rng.uniform(100, 700, len(CATEGORIES)).round(2)).rename(columns={'amount': 'Spent'})
+
+    pie = px.pie(category_spending, values='amount', names='categoryname', color='categoryname', hole=0.3)
+    line = px.line(daily_spending, x='Day', y='Cumulative Spending', color='Status', markers=True)
+    line.add_scatter(x=[1, 30], y=[2500, 2500], mode='lines', name='Monthly Budget')
+    bar = px.bar(budgets, x='categoryname', y=['Budget', 'Spent'], barmode='group')
+
+    figures = [figure_form(fig) for fig in (pie, line, bar)]
+    table = [{'date_display': f'2023-05-{day:02d}', 'categoryname': CATEGORIES[day % len(CATEGORIES)],
+              'amount': float(day * 3.5), 'description': 'card'} for day in range(1, 31)]
+    return (html.Span('(660.0)', className='netBalanceOutput'), html.Span('CRITICAL', className='statusOutput'),
+            *figures, table)
+
+def mean_ms(function):
+    function() # Warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        function()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+if __name__ == '__main__':
+    print(f"Dashboard cache hit, lookup to JSON response (mean of {ROUNDS}, {cache_backend()} backend)")
+    with cache_app().app_context():
+        for name, figure_form in [('Figure objects', lambda fig: fig), ('wire dicts', wire_figure)]:
+            outputs = dashboard_outputs(figure_form)
+            cache.set('benchmark:dashboard', outputs)
+
+            memory_ms = mean_ms(lambda: to_json_plotly(fresh_copy(outputs)))
+            backend_ms = mean_ms(lambda: to_json_plotly(cache.get('benchmark:dashboard')))
+            print(f"  {name:<15} memory {memory_ms:7.2f} ms   backend {backend_ms:7.2f} ms")
+
+        cache.delete('benchmark:dashboard')
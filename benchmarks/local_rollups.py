@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# Benchmarks only need a database URL to import utils, they never connect to it
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import local_store, rollups
+from benchmarks.month_index import synthetic_transactions, CATEGORIES
+
+# ------------------------------------------------------------------------------
+# Local rollups benchmark
+#   On a user with a long history in the local store, compares an insert into the transaction
+#   log alone with an insert that also updates the spending rollups, and reading a month of
+#   the rollups (what the dashboard reads) with reading the month's raw transactions, with the
+#   inserted rows in the logs and after compaction.
+#   The rollups are then checked against the transactions; exits with status 1 if they differ.
+#
+#   python -m benchmarks.local_rollups --rows 200000
+
+YEAR, MONTH = 2020, 6
+
+def new_transaction(i):
+    return {'userid': 1, 'date': f'{YEAR}-{MONTH:02d}-{i % 28 + 1:02d}', 'categoryname': CATEGORIES[i % len(CATEGORIES)],
+            'amount': 1.25, 'description': 'local rollups benchmark'}
+
+# Mean and p95 milliseconds of a function called with 0..calls-1
+def latencies(function, calls):
+    times = []
+    for i in range(calls):
+        start = time.perf_counter()
+        function(i)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return sum(times) / len(times) * 1000, times[int(len(times) * 0.95) - 1] * 1000
+
+# Reading the benchmark month from the rollups and from the raw transactions
+def read_latencies(state, calls):
+    return {
+        f'read month, rollups ({state})': latencies(lambda i: rollups.read_local_month_rollups(1, YEAR, MONTH), calls),
+        f'read month, raw transactions ({state})': latencies(lambda i: local_store.read_month('transactions', 1, YEAR, MONTH), calls)
+    }
+
+def run(rows, calls):
+    with tempfile.TemporaryDirectory() as store_dir:
+        local_store.STORE_DIR = store_dir
+        local_store.write_table('transactions', synthetic_transactions(rows))
+        rollup_rows = rollups.rebuild_local_rollups()
+        print(f"\n{rows:,} transactions, {rollup_rows:,} rollup rows")
+
+        results = {'insert, transaction log only': latencies(lambda i: local_store.append_rows('transactions', [new_transaction(i)]), calls)}
+        rollups.rebuild_local_rollups(1) # The log-only inserts are not in the rollups
+        results['insert, transaction log and rollups'] = latencies(lambda i: rollups.append_transactions_and_rollups([new_transaction(i)]), calls)
+        results.update(read_latencies('with logs', calls))
+
+        # The rollups read with their logs, then compacted, match the transactions
+        mismatches = len(rollups.verify_local_rollups())
+        local_store.compact_all()
+        results.update(read_latencies('compacted', calls))
+        mismatches += len(rollups.verify_local_rollups())
+
+        for name, (mean, p95) in results.items():
+            print(f"  {name:<44} mean {mean:8.2f} ms   p95 {p95:8.2f} ms")
+        return mismatches
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local rollups benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 200_000])
+    parser.add_argument('--calls', type=int, default=100)
+    args = parser.parse_args()
+
+    mismatches = sum(run(rows, args.calls) for rows in args.rows)
+    if mismatches:
+        print(f"{mismatches} spending rollups do not match the transactions")
+        raise SystemExit(1)
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Benchmarks only need a database URL to import utils, they never connect to it
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import local_store
+from utils.load_data import month_slice
+
+# ------------------------------------------------------------------------------
+# Month filtering benchmark
+#   Compares the boolean-mask filtering the dashboard used to do against the month index,
+#   both in memory (searchsorted on a date-sorted frame) and on disk (one Parquet row group).
+#
+#   python -m benchmarks.month_index --rows 1000000 10000000
+
+CATEGORIES = ['Housing', 'Transportation', 'Food', 'Healthcare', 'Debt Payments', 'Investments',
+              'Entertainment & Leisure', 'Personal Care', 'Education', 'Miscellaneous']
+
+def synthetic_transactions(rows, years=10, user_id=1):
+    rng = np.random.default_rng(0)
+    start = np.datetime64('2015-01-01')
+    days = rng.integers(0, years * 365, rows)
+
+    return pd.DataFrame({
+        'transactionid': np.arange(1, rows + 1),
+        'userid': user_id,
+        'date': (start + days).astype('datetime64[ns]'),
+        'categoryname': pd.Categorical.from_codes(rng.integers(0, len(CATEGORIES), rows), CATEGORIES).astype(object),
+        'amount': rng.uniform(1, 500, rows).round(2),
+        'description': None
+    })
+
+def timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def mask_filter(df, year, month):
+    return df[(df['date'].dt.year == year) & (df['date'].dt.month == month)]
+
+def run(rows, repeat, year=2020, month=6):
+    df = synthetic_transactions(rows)
+    sorted_df = df.sort_values('date').reset_index(drop=True)
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        local_store.STORE_DIR = store_dir
+        local_store.write_table('transactions', df)
+        snapshot_path = local_store.store_path('transactions', 1)
+
+        def read_and_mask():
+            return mask_filter(pd.read_parquet(snapshot_path), year, month)
+
+        results = {
+            'in-memory boolean mask (.dt.year/.dt.month)': timed(lambda: mask_filter(df, year, month), repeat),
+            'in-memory month_slice (searchsorted)': timed(lambda: month_slice(sorted_df, year, month), repeat),
+            'store: read partition + boolean mask': timed(read_and_mask, repeat),
+            'store: read_month (month row group)': timed(lambda: local_store.read_month('transactions', 1, year, month), repeat),
+        }
+
+    expected = len(mask_filter(df, year, month))
+    print(f"\n{rows:,} rows, {expected:,} rows in {year}-{month:02d}")
+    for name, (seconds, result) in results.items():
+        assert len(result) == expected, name
+        print(f"  {name:<46} {seconds * 1000:10.2f} ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Month filtering benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        run(rows, args.repeat)
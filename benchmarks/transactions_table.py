@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+# The loaders create the database engine on import, a temporary SQLite database is enough here
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from plotly.io.json import to_json_plotly
+from utils.load_data import global_engine
+from utils.sqlite_db import schema
+from utils.remote_queries import month_transactions, month_transactions_page
+from utils.transactions_table import PAGE_SIZE, parse_filter_query, sort_columns, local_transactions_page, order_transactions
+from utils.dashboard_aggregates import transaction_table_rows
+
+# ------------------------------------------------------------------------------
+# Transactions table benchmark
+#   Serves the transactions table of a busy month as the dashboard did (every row of the month)
+#   and one page of it (page_action='custom', see utils/transactions_table.py), from the remote
+#   database and from a local month frame, and reports the response size and time of each.
+#   The pages are checked against the same page of the full table; exits with status 1 otherwise.
+#
+#   python -m benchmarks.transactions_table
+#   DATABASE_URL=postgresql://... python -m benchmarks.transactions_table
+
+SIZES = [1_000, 10_000, 50_000]
+ROUNDS = 10
+YEAR, MONTH = 2020, 2
+BENCHMARK_USER = 999999
+CATEGORIES = ['Housing', 'Investments', 'Debt Payments', 'Healthcare', 'Food', 'Entertainment & Leisure',
+              'Education', 'Transportation', 'Personal Care', 'Miscellaneous']
+
+# Pages read by the table: the default page, a later page, a filtered and sorted page, and pages
+# that filter or sort on the description, which is missing (NULL) for a third of the transactions
+PAGES = [
+    ('first page', '', [], 0),
+    ('page 10', '', [], 9),
+    ('filtered, sorted', '{categoryname} icontains food && {amount} > 50', [{'column_id': 'amount', 'direction': 'desc'}], 0),
+    ('not equal', '{description} != card', [], 0),
+    ('blank', '{description} is blank', [], 0),
+    ('sorted, nulls', '', [{'column_id': 'description', 'direction': 'asc'}], 20),
+    ('sorted desc, nulls', '', [{'column_id': 'description', 'direction': 'desc'}], 0)
+]
+
+def month_transactions_frame(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'transactionid': np.arange(1, rows + 1) + 10_000_000,
+        'userid': BENCHMARK_USER,
+        'date': pd.Timestamp(YEAR, MONTH, 1) + pd.to_timedelta(rng.integers(0, 29, rows), unit='D'),
+        'categoryname': rng.choice(CATEGORIES, rows),
+        'amount': rng.uniform(1, 100, rows).round(2),
+        'description': rng.choice(np.array(['card', 'cash', 'transfer', None], dtype=object), rows, p=[2/9, 2/9, 2/9, 1/3])
+    })
+
+# The benchmark user and the categories its transactions reference
+def create_benchmark_user():
+    with global_engine.begin() as conn:
+        conn.execute(text("""INSERT INTO Users (userid, name, email, password)
+                             VALUES (:userid, 'benchmark', 'transactions-table-benchmark@example.com', '')
+                             ON CONFLICT DO NOTHING"""), {'userid': BENCHMARK_USER})
+        for category in CATEGORIES:
+            conn.execute(text("INSERT INTO Categories (name) VALUES (:name) ON CONFLICT DO NOTHING"), {'name': category})
+
+# Replace the benchmark user's transactions, or remove them and the user (df None)
+def replace_benchmark_rows(df=None):
+    with global_engine.begin() as conn:
+        conn.execute(text("DELETE FROM Transactions WHERE userid = :userid"), {'userid': BENCHMARK_USER})
+        if df is not None:
+            df.assign(date=df['date'].dt.date).to_sql('transactions', conn, if_exists='append', index=False)
+        else:
+            conn.execute(text("DELETE FROM Users WHERE userid = :userid"), {'userid': BENCHMARK_USER})
+
+# Response body of the table and the seconds it took
+def timed_response(function):
+    function() # Warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        body = to_json_plotly(function())
+    return len(body), (time.perf_counter() - start) / ROUNDS
+
+def all_rows(month_df):
+    return transaction_table_rows(order_transactions(month_df))
+
+def remote_page(filter_query, sort_by, page):
+    page_df, _ = month_transactions_page(global_engine, BENCHMARK_USER, YEAR, MONTH, parse_filter_query(filter_query),
+                                         sort_columns(sort_by), page * PAGE_SIZE, PAGE_SIZE)
+    return transaction_table_rows(page_df)
+
+def local_page(month_df, filter_query, sort_by, page):
+    page_df, _ = local_transactions_page(month_df, parse_filter_query(filter_query), sort_columns(sort_by),
+                                         page * PAGE_SIZE, PAGE_SIZE)
+    return transaction_table_rows(page_df)
+
+if __name__ == '__main__':
+    if global_engine.dialect.name == 'sqlite':
+        schema.create_all(global_engine)
+
+    create_benchmark_user()
+
+    mismatches = []
+    print(f"Transactions table of one month, whole month vs. one page of {PAGE_SIZE} rows (mean of {ROUNDS})")
+    try:
+        for rows in SIZES:
+            month_df = month_transactions_frame(rows)
+            replace_benchmark_rows(month_df)
+
+            size, seconds = timed_response(lambda: all_rows(month_transactions(global_engine, BENCHMARK_USER, YEAR, MONTH)))
+            print(f"  {rows:>6} transactions   whole month        {size / 1024:9.1f} kB {seconds * 1000:8.2f} ms")
+
+            for name, filter_query, sort_by, page in PAGES:
+                expected = local_page(month_df, filter_query, sort_by, page)
+                if remote_page(filter_query, sort_by, page) != expected:
+                    mismatches.append(f"{name} of {rows} transactions")
+
+                size, remote_seconds = timed_response(lambda: remote_page(filter_query, sort_by, page))
+                _, local_seconds = timed_response(lambda: local_page(month_df, filter_query, sort_by, page))
+                print(f"  {'':>19}   {name:<18} {size / 1024:9.1f} kB {remote_seconds * 1000:8.2f} ms"
+                      f" (local {local_seconds * 1000:.2f} ms)")
+
+            # The default page is the start of the whole table
+            if local_page(month_df, '', [], 0) != all_rows(month_df)[:PAGE_SIZE]:
+                mismatches.append(f"first page of {rows} transactions")
+    finally:
+        replace_benchmark_rows()
+
+    if mismatches:
+        print(f"Pages differing between the remote and local queries: {', '.join(mismatches)}")
+        raise SystemExit(1)
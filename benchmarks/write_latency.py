@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import io
+
+# Without a DATABASE_URL the benchmark runs against a temporary SQLite database
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import MetaData, Table, text
+from utils import load_data
+from utils.load_data import global_engine, convert_to_native_types, save_transactions, refresh_tables
+from utils.sqlite_db import schema
+
+# ------------------------------------------------------------------------------
+# Remote write latency benchmark
+#   Compares an insert that reflects the whole database first (the previous behaviour of
+#   every writer) with an insert that reuses the table registry.
+#
+#   DATABASE_URL=postgresql://... python -m benchmarks.write_latency --writes 200
+
+BENCHMARK_USER = 999999
+CATEGORY = 'Food'
+
+# The benchmark user and the category its transactions reference (the foreign keys of Transactions)
+def create_benchmark_user():
+    with global_engine.begin() as conn:
+        conn.execute(text("""INSERT INTO Users (userid, name, email, password)
+                             VALUES (:userid, 'benchmark', 'write-latency-benchmark@example.com', '')
+                             ON CONFLICT DO NOTHING"""), {'userid': BENCHMARK_USER})
+        conn.execute(text("INSERT INTO Categories (name) VALUES (:name) ON CONFLICT DO NOTHING"), {'name': CATEGORY})
+
+def new_transaction(i):
+    return {'userid': BENCHMARK_USER, 'date': f'2020-01-{i % 28 + 1:02d}', 'categoryname': CATEGORY,
+            'amount': 1.0, 'description': 'write latency benchmark'}
+
+# The previous write path: reflect the whole database before every insert
+def save_transaction_with_reflection(transaction):
+    metadata = MetaData()
+    metadata.reflect(bind=global_engine)
+    transactions_table = Table('transactions', metadata, autoload_with=global_engine)
+
+    with global_engine.begin() as conn:
+        conn.execute(transactions_table.insert().values(convert_to_native_types(transaction)))
+        load_data.add_remote_rollups(conn, load_data.pd.DataFrame([transaction]))
+
+# The current write path; save_transactions prints its errors and returns None, so a failed insert raises here
+def save_transaction_with_registry(transaction):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        transactionid = save_transactions(transaction)
+    if transactionid is None:
+        raise RuntimeError(f"Insert failed: {output.getvalue().strip()}")
+    return transactionid
+
+def measure(write, writes):
+    latencies = []
+    for i in range(writes):
+        start = time.perf_counter()
+        write(new_transaction(i))
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        'mean': sum(latencies) / len(latencies),
+        'p50': latencies[len(latencies) // 2],
+        'p95': latencies[int(len(latencies) * 0.95) - 1]
+    }
+
+def cleanup():
+    with global_engine.begin() as conn:
+        conn.execute(text("DELETE FROM Transactions WHERE userid = :userid"), {'userid': BENCHMARK_USER})
+        conn.execute(text("DELETE FROM SpendingRollups WHERE userid = :userid"), {'userid': BENCHMARK_USER})
+        conn.execute(text("DELETE FROM Users WHERE userid = :userid"), {'userid': BENCHMARK_USER})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Remote write latency benchmark')
+    parser.add_argument('--writes', type=int, default=200)
+    args = parser.parse_args()
+
+    if global_engine.dialect.name == 'sqlite':
+        schema.create_all(global_engine)
+
+    refresh_tables()
+    try:
+        create_benchmark_user()
+        results = {
+            'reflect whole database per write': measure(save_transaction_with_reflection, args.writes),
+            'table registry': measure(save_transaction_with_registry, args.writes),
+        }
+    finally:
+        cleanup()
+
+    print(f"{args.writes} inserts on {global_engine.dialect.name}")
+    for name, stats in results.items():
+        print(f"  {name:<36} mean {stats['mean'] * 1000:8.3f} ms   p50 {stats['p50'] * 1000:8.3f} ms   p95 {stats['p95'] * 1000:8.3f} ms")
@@ -1,6 +1,7 @@
 from time import sleep
 from dash import Input, Output, State, no_update
 from flask import session
+from utils.warmup import schedule_warmup
 from utils.user_management import create_local_user, validate_local_user, create_remote_user, validate_remote_user, email_exists_local, email_exists_remote
 
 # use-remote-db is a flag to determine whether to use the remote database or the local database
@@ -29,6 +30,7 @@ def authentication_callback(app, use_remote_db=False):
                     session['logged_in'] = True
                     session['user_id'] = userid
                     session['user_email'] = email
+                    schedule_warmup(userid) # Load the first pages in the background during the redirect delay
                     return 'Login successful!'
                 else:
                     return 'Invalid email or password'
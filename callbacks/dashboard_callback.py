@@ -1,69 +1,200 @@
-from dash import html, Input, Output
+import hashlib
+from dash import html, ctx, Input, Output, State, Patch, no_update
 import pandas as pd
-import plotly.express as px
-from utils.load_data import userid, load_database, cache
+from utils.load_data import (load_month_transactions_page, load_month_rollups, load_monthly_budget, load_categorical_budgets,
+                             load_local_categorical_budgets, user_memoize)
+from utils.warmup import register_warmup
+from utils.dashboard_aggregates import rollup_aggregates, with_budget, transaction_table_rows
+from utils.transactions_table import PAGE_SIZE, parse_filter_query, sort_columns, page_count
+from utils.dashboard_figures import (TEXT_COLOR, expense_categorization_figure, daily_spending_trend_figure,
+                                     budget_vs_actual_spending_figure)
+from layouts import default_dashboard_month
+
+# ------------------------------------------------------------------------------
+# Dashboard callbacks
+#   The outputs of the dashboard are split along the tables they read, each part cached per user and
+#   month and invalidated only by writes to its tables: a budget change recomputes the outputs of
+#   that budget, not the other figures or the transactions table. The parts of a month all start from
+#   the same aggregates of the month's spending, computed once (see month_spending).
+#
+#   Figures are sent in full once, then only the parts that change with the month as a Patch. Next to
+#   each graph, a store holds the key of the figure the browser shows: the key names everything the
+#   patch leaves as is (template, layout, budget bars), so a patch is only sent onto a figure with the same key.
+
+# Month argument of the memoized callbacks (the first two arguments of each)
+selected_month_of = lambda selected_year, selected_month, *_: (selected_year, selected_month)
+
+def figure_key(name, *parts):
+    return name + ':' + hashlib.sha256(repr(parts).encode()).hexdigest()[:12]
+
+# The figure, or only the given paths of it when the browser already shows a figure with the same key
+def figure_update(figure, key, shown_key, paths):
+    if not key or key != shown_key:
+        return figure, key
+
+    patch = Patch()
+    for path in paths:
+        target, value = patch, figure
+        for part in path[:-1]:
+            target, value = target[part], value[part]
+        target[path[-1]] = value[path[-1]]
+    return patch, no_update
 
 def dashboard_callback(app, use_remote_db=False):
+    # Spending aggregates of a month (per category and cumulative per day), shared by the callbacks below
+    @user_memoize(tables=['transactions'], month=selected_month_of)
+    def month_spending(selected_year, selected_month):
+        # Load the pre-aggregated spending (per day and category) of the selected month for the logged-in user
+        return rollup_aggregates(load_month_rollups(use_remote_db, selected_year, selected_month))
+
+    # Aggregates of the selected month, None without a month or transactions
+    def selected_spending(selected_year, selected_month):
+        if not (selected_year and selected_month):
+            return None
+
+        aggregates = month_spending(selected_year, selected_month)
+        return aggregates if len(aggregates['days']) else None
+
+    # ------------------------------------------------------------------------------
+    # Month overview: net balance, performance, expense categorization and daily spending trend
+    #   Figures are built (and cached) in their JSON wire form with their key, see dashboard_figures.py
+
     @app.callback(
-        [Output('net-balance-output', 'children'), 
+        [Output('net-balance-output', 'children'),
         Output('status-output', 'children'),
-        Output('expense_categorization_graph', 'figure'), 
+        Output('expense_categorization_graph', 'figure'),
+        Output('expense_categorization_graph_key', 'data'),
         Output('daily_spending_trend_graph', 'figure'),
-        Output('budget_vs_actual_spending_graph', 'figure'),
-        Output('transactions_table', 'data')],
+        Output('daily_spending_trend_graph_key', 'data')],
         [Input('slct_year', 'value'),
-        Input('slct_month', 'value')]
+        Input('slct_month', 'value')],
+        [State('expense_categorization_graph_key', 'data'),
+        State('daily_spending_trend_graph_key', 'data')]
     )
+    def update_month_overview(selected_year, selected_month, shown_categorization_key, shown_trend_key):
+        net_balance_output, status_output, trend_figure, trend_key = month_budget_overview(selected_year, selected_month)
+        categorization_figure, categorization_key = expense_categorization(selected_year, selected_month)
+
+        return (net_balance_output, status_output,
+                *figure_update(categorization_figure, categorization_key, shown_categorization_key, [('data',)]),
+                *figure_update(trend_figure, trend_key, shown_trend_key, [('data',), ('layout', 'xaxis', 'tickvals')]))
+
+    # Outputs that depend on the monthly budget
+    @user_memoize(tables=['transactions', 'monthlybudgets'], month=selected_month_of)
+    def month_budget_overview(selected_year, selected_month):
+        aggregates = selected_spending(selected_year, selected_month)
+        if aggregates is None:
+            return 'No transactions found', '', {}, ''
+
+        total_spent = aggregates['total_spent']
+        monthly_budget = load_monthly_budget(use_remote_db, selected_year, selected_month)
+
+        # Without a budget for the month, everything spent is over the (zero) budget
+        net_balance = (monthly_budget or 0) - total_spent
+        print("Net Balance:", net_balance)  # Debugging statement
 
-    @cache.memoize()
-    def update_graph(selected_year, selected_month):
-        # Load data from the database
-        transactions_df, monthly_budgets_df, categorical_budgets_df = load_database(use_remote_db)
-
-        # Filters to only include rows where the year and month match the input year and month for the logged-in user
-        # Boolean indexing: [ ] filters rows based on a condition
-        filtered_df = transactions_df[(transactions_df['userid'] == userid()) &
-                                    (transactions_df['date'].dt.year == selected_year) &
-                                    (transactions_df['date'].dt.month == selected_month)]
+        net_balance_output = format_net_balance(net_balance)
+        net_balance_output = html.Span(net_balance_output, className='netBalanceOutput')
 
-        # Ensure the dataframe is not empty
-        if filtered_df.empty:
-            return 'No transactions found', '', {}, {}, {}, []
+        if monthly_budget is None:
+            status_text, color = 'NO BUDGET SET', TEXT_COLOR
+        else:
+            status_text, color = determine_status(monthly_budget, total_spent, selected_year, selected_month)
+        status_output = html.Span(status_text, style={'color': color}, className='statusOutput')
 
-        # total spent in a month
-        total_spent = filtered_df['amount'].sum()
+        trend_figure = daily_spending_trend_figure(with_budget(aggregates, monthly_budget), monthly_budget)
+        return net_balance_output, status_output, trend_figure, 'daily_spending_trend'
 
-        # converting to date-time
-        monthly_budgets_df['budgetmonth'] = pd.to_datetime(monthly_budgets_df['budgetmonth'])
+    # Cached apart, as it does not depend on the monthly budget
+    @user_memoize(tables=['transactions'], month=selected_month_of)
+    def expense_categorization(selected_year, selected_month):
+        aggregates = selected_spending(selected_year, selected_month)
+        if aggregates is None:
+            return {}, ''
+        return expense_categorization_figure(aggregates), 'expense_categorization'
 
-        # .iloc[0] retrieves the first value from the resulting series
-        monthly_budget = monthly_budgets_df[
-            (monthly_budgets_df['userid'] == userid()) &
-            (monthly_budgets_df['budgetmonth'].dt.year == selected_year) &
-            (monthly_budgets_df['budgetmonth'].dt.month == selected_month)
-        ]['totalbudget'].iloc[0]
-        # TODO: Handle the case where there is monthly budget available for the selected month (currently throws callback errors)
+    # ------------------------------------------------------------------------------
+    # Budget vs. spending per category
 
-        # Filter categorical budgets for the logged-in user
-        user_categorical_budgets_df = categorical_budgets_df[categorical_budgets_df['userid'] == userid()]
+    @app.callback(
+        [Output('budget_vs_actual_spending_graph', 'figure'),
+        Output('budget_vs_actual_spending_graph_key', 'data')],
+        [Input('slct_year', 'value'),
+        Input('slct_month', 'value')],
+        [State('budget_vs_actual_spending_graph_key', 'data')]
+    )
+    def update_budget_vs_actual_spending(selected_year, selected_month, shown_key):
+        figure, key = budget_vs_actual_spending(selected_year, selected_month)
+        # The categories and their budgets do not depend on the month, only the spending does
+        return figure_update(figure, key, shown_key, [('data', 1, 'y')])
 
-        net_balance = monthly_budget - total_spent
-        print("Net Balance:", net_balance)  # Debugging statement
+    @user_memoize(tables=['transactions', 'categoricalbudgets'], month=selected_month_of)
+    def budget_vs_actual_spending(selected_year, selected_month):
+        aggregates = selected_spending(selected_year, selected_month)
+        if aggregates is None:
+            return {}, ''
 
-        net_balance_output = format_net_balance(net_balance)
-        net_balance_output = html.Span(net_balance_output, className='netBalanceOutput')
-        
-        status_text, color = determine_status(monthly_budget, total_spent, selected_year, selected_month)
-        status_output = html.Span(status_text, style={'color': color}, className='statusOutput')
+        categorical_budgets_df = load_categorical_budgets() if use_remote_db else load_local_categorical_budgets()
+        figure = budget_vs_actual_spending_figure(aggregates, categorical_budgets_df)
+        budgets = figure['data'][0]
+        return figure, figure_key('budget_vs_actual_spending', budgets['x'], budgets['y'])
 
-        expense_categorization_fig = update_expense_categorization_graph(filtered_df)
-        daily_spending_trend_fig = update_daily_spending_trend_graph(filtered_df, monthly_budget)
-        budget_vs_actual_spending_fig = update_budget_vs_actual_spending_graph(filtered_df, user_categorical_budgets_df)
-        
-        transactions_table_data = filtered_df[['date', 'categoryname', 'amount', 'description']].to_dict('records')
+    # ------------------------------------------------------------------------------
+    # Transactions table
 
-        # same order as in the output call-back
-        return net_balance_output, status_output, expense_categorization_fig, daily_spending_trend_fig, budget_vs_actual_spending_fig, transactions_table_data
+    @app.callback(
+        [Output('transactions_table', 'data'),
+        Output('transactions_table', 'page_count'),
+        Output('transactions_table', 'page_current'),
+        Output('transactions_table_message', 'children')],
+        [Input('slct_year', 'value'),
+        Input('slct_month', 'value'),
+        Input('transactions_table', 'page_current'),
+        Input('transactions_table', 'page_size'),
+        Input('transactions_table', 'sort_by'),
+        Input('transactions_table', 'filter_query')]
+    )
+    def update_transactions_table(selected_year, selected_month, page_current, page_size, sort_by, filter_query):
+        # A new month, sort or filter starts over from the first page
+        if set(ctx.triggered_prop_ids) != {'transactions_table.page_current'}:
+            page_current = 0
+        page_current, page_size = page_current or 0, page_size or PAGE_SIZE
+
+        rows, total, message = transactions_page(selected_year, selected_month, page_current, page_size, sort_by or [], filter_query or '')
+        pages = page_count(total, page_size)
+
+        # Past the last page (e.g. after transactions were removed): show the last one
+        if page_current >= pages:
+            page_current = pages - 1
+            rows, total, message = transactions_page(selected_year, selected_month, page_current, page_size, sort_by or [], filter_query or '')
+
+        return rows, pages, page_current, message
+
+    # Rows of one page of the table (most recent first unless sorted), the number of matching transactions
+    # and the message shown under the table (why a filter or sort is not applied)
+    @user_memoize(tables=['transactions'], month=selected_month_of)
+    def transactions_page(selected_year, selected_month, page_current, page_size, sort_by, filter_query):
+        if not (selected_year and selected_month):
+            return [], 0, ''
+
+        try:
+            conditions, sort = parse_filter_query(filter_query), sort_columns(sort_by)
+        except ValueError as e:
+            print(f"Transactions table: {e}")
+            return [], 0, f"{e}. Supported: =, !=, <, <=, >, >=, contains, datestartswith, is blank, is nil, joined with &&"
+
+        # Only the rows of the page are read (remote) or sliced out of the month (local) and sent
+        page_df, total = load_month_transactions_page(use_remote_db, selected_year, selected_month, conditions, sort,
+                                                      page_current * page_size, page_size)
+        return transaction_table_rows(page_df), int(total), ''
+
+    # Warmed up after login: the month the dashboard opens on
+    @register_warmup
+    def warm_default_month():
+        selected_year, selected_month = default_dashboard_month(use_remote_db)
+        for output in (month_budget_overview, expense_categorization, budget_vs_actual_spending):
+            output(selected_year, selected_month)
+        transactions_page(selected_year, selected_month, 0, PAGE_SIZE, [], '')
 
     def format_net_balance(net_balance):
         if net_balance < 0:
@@ -96,7 +227,7 @@ def dashboard_callback(app, use_remote_db=False):
             days_so_far = pd.Period(f'{selected_year}-{selected_month}').days_in_month
 
         average_daily_spending = total_spent / days_so_far
-        spent_percentage = (average_daily_spending/daily_budget) * 100
+        spent_percentage = (average_daily_spending/daily_budget) * 100 if daily_budget else float('inf')
 
         if spent_percentage < 50:
             status_key = "EXCELLENT"
@@ -124,229 +255,3 @@ def dashboard_callback(app, use_remote_db=False):
     def calculated_daily_budget(monthly_budget, year, month):
         days_in_month = pd.Period(f'{year}-{month}').days_in_month
         return monthly_budget/days_in_month
-
-    def update_expense_categorization_graph(filtered_df):
-        category_colors = {
-            "Housing": "#FF5733",           # Vibrant Red
-            "Investments": "#1F77B4",       # Bright Blue
-            "Debt Payments": "#2CA02C",     # Bold Green
-            "Healthcare": "#9467BD",        # Medium Purple
-            "Food": "#FF69B4",              # Hot Pink
-            "Entertainment & Leisure": "#17BECF",  # Vibrant Teal
-            "Education": "#7F7F7F",         # Neutral Gray
-            "Transportation": "#C0C0C0",    # Light Silver
-            "Personal Care": "#FFA500",     # Bright Orange
-            "Miscellaneous": "#FF4500"      # Orange Red
-        }
-
-        fig = px.pie(
-            filtered_df, 
-            values='amount', 
-            names='categoryname', 
-            color='categoryname',
-            hole=0.3,
-            color_discrete_map=category_colors
-        )
-
-        fig.update_traces(
-            # textinfo='percent',  # Show both percentage and label
-            insidetextorientation='radial',  # Better orientation for text inside
-            textfont=dict(
-                color='#eeeee4',
-                size=10
-            )
-        )
-
-        fig.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            margin=dict(l=0, r=0, t=0, b=0),
-            legend=dict(
-                font=dict(
-                    color="#eeeee4",
-                    size=10
-                )
-            )
-        )
-
-        return fig
-
-    def update_daily_spending_trend_graph(filtered_df, monthly_budget):
-        # Sum daily spending and calculate cumulative total
-        daily_spending = filtered_df.groupby(filtered_df['date'].dt.day)['amount'].sum().cumsum().reset_index()
-        daily_spending.columns = ['Day', 'Cumulative Spending']
-
-        # Creating a new dataFrame, budget_line
-        max_day = daily_spending['Day'].max()
-        budget_line = pd.DataFrame({
-            # creates a column named 'day' consisting of the values '1' and 'max_day'
-            'Day': [1, max_day],
-            'Total Budget': [monthly_budget, monthly_budget]
-        })
-
-        # Adds a column called 'status' to the daily_spending dataFrame
-        daily_spending['Status'] = daily_spending['Cumulative Spending'].apply(
-            # The lambda keyword creates an anonymous (inline) function
-            # x: The input value (each value in the Cumulative Spending column).
-            lambda x: 'Under' if x <= monthly_budget else 'Over'
-        )
-
-        print("daily_spending: ")
-        print(daily_spending[:5])
-
-        over_spending = pd.DataFrame() # Initialize an empty DataFrame
-        over_index = daily_spending[daily_spending['Status'] == 'Over'].index.min()
-
-        # If there is an 'Over' index, create two segments: 'Under' and 'Over'
-        if not pd.isna(over_index):
-            under_spending = daily_spending.loc[:over_index]
-            # .copy ensures that modifications to over_spending doesn't affect daily_spending
-            over_spending = daily_spending.loc[over_index-1:].copy()
-            # ensures that the first row of the over_spending DataFrame is correctly labeled as 'Over'
-            over_spending.iloc[0, daily_spending.columns.get_loc('Status')] = 'Over'
-            # 1 for over_spending[1:] ensures that the first row is not duplicated  
-            combined_spending = pd.concat([under_spending, over_spending[1:]])
-        else:
-            combined_spending = daily_spending
-
-        fig = px.line(
-            combined_spending,
-            x='Day',
-            y='Cumulative Spending',
-            labels={
-                'Cumulative Spending': 'cumulative spending ($)',
-                'Day': 'day'
-            },
-            color='Status',
-            color_discrete_map={'Under': 'green', 'Over': 'red'},
-            markers=True
-        )
-
-        # Add the 'Over' segment if it exists
-        if not over_spending.empty:
-            fig.add_scatter(
-                x=over_spending['Day'], 
-                y=over_spending['Cumulative Spending'], 
-                mode='lines+markers', 
-                name='Over', 
-                line=dict(color='red', 
-                width=3), 
-                showlegend= False)
-            
-        # Add budget line to the same figure
-        fig.add_scatter(
-            x=budget_line['Day'], 
-            y=budget_line['Total Budget'], 
-            mode='lines', 
-            name='Monthly Budget', 
-            line=dict(
-                color='#f8d44c', 
-                dash='dash',
-                width=5
-            )
-        )
-
-        fig.update_traces(
-            line=dict(width=3)
-        ) 
-
-        # Customize the plot
-        fig.update_layout(
-            margin=dict(l=0, r=0, t=0, b=0),  # Left, Right, Top, Bottom margins in pixels
-
-            xaxis_tickangle=0,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(
-                tickmode='array',
-                tickvals=list(range(1, max_day + 1, 1)),  # Tick every day
-                tickfont=dict(
-                    size=7,
-                    color="#eeeee4"
-                ),
-                title_font=dict(
-                    color="#eeeee4"),
-                showgrid=False
-            ),
-            yaxis=dict(
-                title_font=dict(color="#eeeee4"),
-                tickfont=dict(color="#eeeee4"),
-                showgrid=True,
-                gridcolor='lightblue'
-            ),
-            legend=dict(
-                title='',
-                orientation='h',
-                yanchor='bottom',
-                y=1.02,
-                xanchor='center',
-                x=0.5,
-                font=dict(
-                    color="#eeeee4",
-                    size=10
-                )
-            )
-        )
-
-        return fig
-
-    def update_budget_vs_actual_spending_graph(filtered_df, categorical_budgets_df):
-        # Merge actual spending data with budgets data
-        actual_spending = filtered_df.groupby('categoryname')['amount'].sum().reset_index()
-        budget_data = categorical_budgets_df[['categoryname', 'categorybudget']].groupby('categoryname').sum().reset_index() 
-        
-        # Merging the actual spending with the budgets
-        summary_df = pd.merge(budget_data, actual_spending, on='categoryname', how='left')
-        summary_df.fillna(0, inplace=True)  # Replace NaN with 0 for categories with no spending
-
-        summary_df.rename(columns={'categorybudget': 'Budget', 'amount': 'Spent'}, inplace=True)
-
-        # Create the bar chart for Budget vs Actual Spending
-        fig = px.bar(
-            summary_df, 
-            x='categoryname', 
-            y=['Budget', 'Spent'],
-            labels={
-                'categoryname': 'category types',
-                'value': 'amount ($)', #represented with 2 different y-values, so is labeled as 'value'
-                'variable': '' #represented with 2 different y-values, so is labeled as 'value'
-            },
-            barmode='group',
-            color_discrete_sequence=["#92154f", "#f19500"]  # Blue for Budget, Red for Actual Spending
-        )
-        
-        fig.update_layout(
-            margin=dict(l=0, r=0, t=0, b=0),
-            xaxis_tickangle=45,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-
-            legend = dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="center",
-                x=0.5,
-                font=dict(
-                    color="#eeeee4",
-                    size=10
-                )
-            ),
-            xaxis=dict(
-                title_font=dict(color="#eeeee4"),  # Color for the X-axis title
-                tickfont=dict(
-                    color="#eeeee4",
-                    size=10
-                    ),  # Color for the X-axis ticks
-                showgrid=True,  # Determines whether or not grid lines are drawn
-                gridcolor='rgba(0,0,0,0)'  # Color of grid lines
-            ),
-            yaxis=dict(
-                title_font=dict(color="#eeeee4"),  # Color for the Y-axis title
-                tickfont=dict(color="#eeeee4"),  # Color for the Y-axis ticks
-                showgrid=True,  # Determines whether or not grid lines are drawn
-                gridcolor='lightblue'  # Color of grid lines
-            )
-        )
-                    
-        return fig
@@ -1,8 +1,8 @@
 from dash import Output, Input, State
 from flask import session
 from sqlalchemy import text
-from utils.user_management import hash_password, validate_local_user, validate_remote_user, local_users_url
-from utils.load_data import global_engine, load_local_users
+from utils.user_management import hash_password, validate_local_user, validate_remote_user
+from utils.load_data import global_engine, load_local_users, save_local_users
 
 def settings_callback(app, use_remote_db=False):
     @app.callback(
@@ -113,7 +113,7 @@ def settings_callback(app, use_remote_db=False):
     def update_local_user_profile(userid, name, email):
         users_df = load_local_users()
         users_df.loc[users_df['userid'] == userid, ['name', 'email']] = [name, email]
-        users_df.to_csv(local_users_url(), index=False)
+        save_local_users(users_df)
 
     def update_remote_user_profile(userid, name, email):
         with global_engine.begin() as conn:
@@ -125,7 +125,7 @@ def settings_callback(app, use_remote_db=False):
     def update_local_user_password(userid, password):
         users_df = load_local_users()
         users_df.loc[users_df['userid'] == userid, 'password'] = hash_password(password)
-        users_df.to_csv(local_users_url(), index=False)
+        save_local_users(users_df)
 
     def update_remote_user_password(userid, password):
         with global_engine.begin() as conn:
@@ -137,7 +137,7 @@ def settings_callback(app, use_remote_db=False):
     def delete_local_user(userid):
         users_df = load_local_users()
         users_df = users_df[users_df['userid'] != userid]
-        users_df.to_csv(local_users_url(), index=False)
+        save_local_users(users_df)
 
     def delete_remote_user(userid):
         with global_engine.begin() as conn:
@@ -1,64 +1,77 @@
+import json
 from dash import dcc, Input, Output
 from flask import session
+from plotly.io.json import to_json_plotly
 from layouts import dashboard_page, spendings_page, welcome_page, sign_in_page, sign_up_page, settings_page, support_page
-from utils.load_data import cache
+from utils.load_data import user_memoize
+from utils.warmup import register_warmup
+
+# Pages that do not depend on the user or their data, built once at startup in their JSON wire form
+# (like the dashboard figures), so navigating to them only sends the prebuilt layout
+def prebuilt_layout(page):
+    return json.loads(to_json_plotly(page()))
 
 def sidebar_callback(app, use_remote_db=False):
+    public_pages = {
+        '/sign-in': prebuilt_layout(sign_in_page),
+        '/sign-up': prebuilt_layout(sign_up_page)
+    }
+    private_pages = {
+        '/settings': prebuilt_layout(settings_page),
+        '/support': prebuilt_layout(support_page)
+    }
+    welcome_layout = prebuilt_layout(welcome_page)
+
     # Callback to toggle between pages from the sidebar
     @app.callback(
         Output('page-content', 'children'),
         [Input('url', 'pathname')],
     )
 
-    @cache.memoize()
     def display_page(pathname):
+        logged_in = bool(session and session.get('logged_in'))
+
+        # Logging out changes the session, so it always runs
+        if pathname == '/logout':
+            session.clear()
+            print("User logged out")
+            return dcc.Location(href='/', id='redirect') # Redirect to the welcome page after logging out
+
         if pathname == '/':
-            return welcome_page()
-        
-        elif pathname == '/sign-in':
-            if session and session['logged_in']:
-                return dcc.Location(href='/dashboard', id='redirect')
-            else:
-                return sign_in_page()
-        
-        elif pathname == '/sign-up':
-            if session and session['logged_in']:
+            return welcome_layout
+
+        elif pathname in public_pages:
+            if logged_in:
                 return dcc.Location(href='/dashboard', id='redirect')
             else:
-                return sign_up_page()
-        
-        elif pathname == '/dashboard':
-            if session and session['logged_in']:
-                return dashboard_page(use_remote_db)
-            else:
-                return dcc.Location(href='/sign-in', id='redirect')
-            
-        elif pathname == '/record':
-            if session and session['logged_in']:
-                return spendings_page(use_remote_db)
-            else:
-                return dcc.Location(href='/sign-in', id='redirect')
-            
-        elif pathname == '/settings':
-            if session and session['logged_in']:
-                return settings_page()
-            else:
+                return public_pages[pathname]
+
+        elif pathname in private_pages or pathname in ['/dashboard', '/record']:
+            if not logged_in:
                 return dcc.Location(href='/sign-in', id='redirect')
-        
-        elif pathname == '/support':
-            if session and session['logged_in']:
-                return support_page()
+            elif pathname == '/dashboard':
+                return dashboard_layout()
+            elif pathname == '/record':
+                return spendings_layout()
             else:
-                return dcc.Location(href='/sign-in', id='redirect')
-
-        elif pathname == '/logout':
-            session.clear()
-            print("User logged out")
-            return dcc.Location(href='/', id='redirect') # Redirect to the welcome page after logging out
+                return private_pages[pathname]
 
         else:
             return "404 Page Not Found"
-        
+
+    # The dashboard opens on the month of the user's latest transaction: cached per user until their transactions change
+    @user_memoize(tables=['transactions'])
+    def dashboard_layout():
+        return dashboard_page(use_remote_db)
+
+    # The spendings page only shows the categories, shared by all users
+    @user_memoize(per_user=False, tables=['categories'])
+    def spendings_layout():
+        return spendings_page(use_remote_db)
+
+    # Warmed up after login, with the dashboard's default month (see dashboard_callback.py)
+    register_warmup(dashboard_layout)
+
     # ------------------------------------------------------------------------------
     # Callback for sidebar
 
@@ -1,10 +1,9 @@
 from dash import Output, Input, State, no_update
 import pandas as pd
-from utils.load_data import (get_max_id, load_categories, userid, load_local_categories, load_local_transactions, load_local_monthly_budgets, 
-                       load_local_categorical_budgets, load_monthly_budgets, 
-                       load_categorical_budgets, save_transactions, save_local_transactions, 
-                       save_monthly_budgets, save_local_monthly_budgets, save_categorical_budgets, 
-                       save_local_categorical_budgets, update_categorical_budget, update_monthly_budget, cache)
+from utils.load_data import (load_categories, userid, load_local_categories, append_local_transaction, load_budgets, save_transactions, 
+                       upsert_monthly_budget, delete_monthly_budget, upsert_local_monthly_budget, delete_local_monthly_budget, 
+                       upsert_categorical_budget, upsert_local_categorical_budget, user_memoize)
+from utils.warmup import register_warmup
 
 def spendings_callback(app, use_remote_db=False):
     # Callback for adding transactions
@@ -31,11 +30,7 @@ def spendings_callback(app, use_remote_db=False):
             if use_remote_db:
                 save_transactions(new_transaction)
             else:
-                transactions_df = load_local_transactions() # Load the latest transactions DB
-                new_transaction.update({'transactionid': transactions_df['transactionid'].max() + 1}) # Increment the transaction ID
-                new_transaction.update({'date': date + ' 00:00:00'}) # Append timestamp to align with the database schema
-                transactions_df.loc[len(transactions_df)] = new_transaction # Append the new transaction to the DataFrame
-                save_local_transactions(transactions_df)
+                append_local_transaction(new_transaction) # Append the new transaction to the transaction log
 
             return f"Transaction added: {date}, {amount}, {category}"
         elif n_clicks > 0:
@@ -58,19 +53,11 @@ def spendings_callback(app, use_remote_db=False):
         Input('update_trigger', 'children')]
     )
 
-    @cache.memoize()
+    # Cached per user and month, invalidated by any budget write
+    @user_memoize(tables=['monthlybudgets', 'categoricalbudgets'])
     def display_budget(selected_month, selected_year, _):
         # Load the latest budgets DB for the logged in user
-        if use_remote_db:
-            monthly_budgets_df = load_monthly_budgets()
-            categorical_budgets_df = load_categorical_budgets()
-        else:
-            monthly_budgets_df = load_local_monthly_budgets()
-            categorical_budgets_df = load_local_categorical_budgets()
-
-            # Filter for the logged in user
-            monthly_budgets_df = monthly_budgets_df[monthly_budgets_df['userid'] == userid()]
-            categorical_budgets_df = categorical_budgets_df[categorical_budgets_df['userid'] == userid()]
+        monthly_budgets_df, categorical_budgets_df = load_budgets(use_remote_db)
 
         print('Monthly Budgets\n', monthly_budgets_df[-5:])
         print('Categories Budgets\n', categorical_budgets_df[-5:])
@@ -139,6 +126,11 @@ def spendings_callback(app, use_remote_db=False):
 
         return monthly_budget_status, budget_table_data, budget_overview_status
 
+    # Warmed up after login: the budget overview as first shown, before a month is selected
+    @register_warmup
+    def warm_budget_overview():
+        display_budget(None, None, None)
+
     # ------------------------------------------------------------------------------
     # Update the total budget when a new total budget is submitted
     @app.callback(
@@ -157,44 +149,17 @@ def spendings_callback(app, use_remote_db=False):
             # Convert the selected month and year to a datetime object
             selected_date = pd.to_datetime(f'{selected_year}-{selected_month:02d}-01')
 
-            # Load the latest budgets DB before updating
+            # Insert or update the budget of the selected month in a single write, removing it if set to 0
             if use_remote_db:
-                monthly_budgets_df = load_monthly_budgets()
-            else:
-                monthly_budgets_df = load_local_monthly_budgets()
-
-            # Filter for the current user and selected date
-            user_budget_df = monthly_budgets_df[(monthly_budgets_df['userid'] == userid()) 
-                                                & (monthly_budgets_df['budgetmonth'] == selected_date)]
-
-            if not user_budget_df.empty:
                 if int(total_budget) == 0:
-                    # Remove the total budget for the selected month if set to 0
-                    monthly_budgets_df = monthly_budgets_df[monthly_budgets_df.index != user_budget_df.index[0]]
+                    delete_monthly_budget(userid(), selected_date)
                 else:
-                    # Update the total budget for the selected month
-                    if use_remote_db:
-                        update_monthly_budget(userid(), selected_date, total_budget)
-                        return "Total budget updated successfully!"
-                    else:
-                        monthly_budgets_df.loc[user_budget_df.index, 'totalbudget'] = total_budget
-            else:
-                new_monthly_budget = {
-                    'userid': userid(),
-                    'totalbudget': total_budget,
-                    'budgetmonth': selected_date
-                }
-
-                if not use_remote_db:
-                    new_monthly_budget['budgetid'] = monthly_budgets_df['budgetid'].max() + 1
-                    monthly_budgets_df.loc[len(monthly_budgets_df)] = new_monthly_budget
-
-            # Save the updated data to the database
-            if use_remote_db:
-                new_monthly_budget['budgetid'] = get_max_id(monthly_budgets_df) + 1
-                save_monthly_budgets(new_monthly_budget)
+                    upsert_monthly_budget(userid(), selected_date, total_budget)
             else:
-                save_local_monthly_budgets(monthly_budgets_df)
+                if int(total_budget) == 0:
+                    delete_local_monthly_budget(selected_date)
+                else:
+                    upsert_local_monthly_budget(selected_date, total_budget)
 
             return "Total budget updated successfully!"
         return ""
@@ -211,40 +176,11 @@ def spendings_callback(app, use_remote_db=False):
     def update_category_budget(n_clicks, selected_category, new_category_budget):
         if n_clicks > 0:
             if selected_category and new_category_budget is not None:
+                # Insert or update the selected category's budget for the logged in user in a single write
                 if use_remote_db:
-                    categorical_budgets_df = load_categorical_budgets()
-                else:
-                    categorical_budgets_df = load_local_categorical_budgets()
-
-                # Filter for the user and selected category
-                user_category_df = categorical_budgets_df[(categorical_budgets_df['userid'] == userid()) 
-                                                          & (categorical_budgets_df['categoryname'] == selected_category)]
-
-                # Update the selected category's budget for the logged in user
-                if not user_category_df.empty:
-                    if use_remote_db:
-                        update_categorical_budget(userid(), selected_category, new_category_budget)
-                        return "Category budget updated successfully!"
-                    else:
-                        categorical_budgets_df.loc[user_category_df.index, 'categorybudget'] = new_category_budget
-
-                else:
-                    new_category_budget_row = {
-                        'userid': userid(),
-                        'categoryname': selected_category,
-                        'categorybudget': new_category_budget
-                    }
-
-                    if not use_remote_db:
-                        new_category_budget_row['catbudgetid'] = categorical_budgets_df['catbudgetid'].max() + 1
-                        categorical_budgets_df.loc[len(categorical_budgets_df)] = new_category_budget_row
-
-                # Save the updated data to the database
-                if use_remote_db:
-                    new_category_budget_row['catbudgetid'] = get_max_id('categoricalbudgets', 'catbudgetid') + 1
-                    save_categorical_budgets(new_category_budget_row)
+                    upsert_categorical_budget(userid(), selected_category, new_category_budget)
                 else:
-                    save_local_categorical_budgets(categorical_budgets_df)
+                    upsert_local_categorical_budget(selected_category, new_category_budget)
 
                 return "Category budget updated successfully!"
             elif not selected_category:
@@ -1,4 +1,4 @@
-from .dashboard_page import dashboard_page
+from .dashboard_page import dashboard_page, default_dashboard_month
 from .spendings_page import spendings_page
 from .welcome_page import welcome_page
 from .sign_in_page import sign_in_page
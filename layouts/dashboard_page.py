@@ -1,26 +1,17 @@
 from dash import html, dcc, dash_table
-import pandas as pd
-from utils.load_data import current_month, current_year, monthsToInt, load_transactions, load_local_transactions
+from utils.load_data import current_month, current_year, monthsToInt, load_latest_transaction_date
+from utils.transactions_table import PAGE_SIZE
 
-def dashboard_page(use_remote_db=False):
-    if use_remote_db:
-        transactions_df = load_transactions()
-    else:
-        transactions_df = load_local_transactions()
-
-    # Prepare the transactions data by converting the date to a datetime object
-    transactions_df['date'] = pd.to_datetime(transactions_df['date'])
-    transactions_df['date_display'] = transactions_df['date'].dt.strftime('%Y-%m-%d')
-    transactions_df.sort_values('date', ascending=False, inplace=True)  # Sort by date descending
+# The dashboard opens on the month of the last transaction, or the current month without transactions
+def default_dashboard_month(use_remote_db=False):
+    last_transaction_date = load_latest_transaction_date(use_remote_db)
+    if last_transaction_date is not None:
+        return last_transaction_date.year, last_transaction_date.month
+    return current_year(), current_month()
 
+def dashboard_page(use_remote_db=False):
     # Find the last transaction date to set the default year and month
-    if not transactions_df.empty:
-        last_transaction_date = transactions_df['date'].iloc[0]
-        last_transaction_year = last_transaction_date.year
-        last_transaction_month = last_transaction_date.month
-    else:
-        last_transaction_year = current_year()
-        last_transaction_month = current_month()
+    last_transaction_year, last_transaction_month = default_dashboard_month(use_remote_db)
 
     return html.Div([
 
@@ -63,6 +54,7 @@ def dashboard_page(use_remote_db=False):
             html.Div([
                 html.H1("Expense Categorization"),
                 dcc.Graph(id='expense_categorization_graph', figure={}),
+                dcc.Store(id='expense_categorization_graph_key'), # Key of the figure shown, see dashboard_callback.py
             ], className= 'dashboard-categorization')
         ], className= 'dashboard-left-side'),
 
@@ -72,11 +64,13 @@ def dashboard_page(use_remote_db=False):
                 html.Div([
                     html.H1("Daily Spending Trend"),
                     dcc.Graph(id='daily_spending_trend_graph', figure={}),
+                    dcc.Store(id='daily_spending_trend_graph_key'), # Key of the figure shown, see dashboard_callback.py
                 ], className= 'daily-spending-trend'),
 
                 html.Div([
                     html.H1("Budget vs. Spending Per Category"),
                     dcc.Graph(id='budget_vs_actual_spending_graph', figure={}),
+                    dcc.Store(id='budget_vs_actual_spending_graph_key'), # Key of the figure shown, see dashboard_callback.py
                 ], className= 'budget-vs-actual-spending'),
                 
             ], className= 'dashboard-right-top'),
@@ -86,14 +80,26 @@ def dashboard_page(use_remote_db=False):
                 dash_table.DataTable(
                     id='transactions_table',
                     columns=[
-                                {"name": "Date", "id": "date_display"},
-                                {"name": "Category Name", "id": "categoryname"},
-                                {"name": "Amount", "id": "amount"},
-                                {"name": "Description", "id": "description"}
+                                {"name": "Date", "id": "date_display", "type": "datetime"},
+                                {"name": "Category Name", "id": "categoryname", "type": "text"},
+                                {"name": "Amount", "id": "amount", "type": "numeric"},
+                                {"name": "Description", "id": "description", "type": "text"}
                     ],
 
-                    data=transactions_df.to_dict('records'),
-                )
+                    data=[], # Filled in by the dashboard callback with the visible page of the selected month
+
+                    # Paged, sorted and filtered on the server, see utils/transactions_table.py
+                    page_action='custom',
+                    page_current=0,
+                    page_size=PAGE_SIZE,
+                    page_count=1,
+                    sort_action='custom',
+                    sort_mode='single',
+                    sort_by=[],
+                    filter_action='custom',
+                    filter_query='',
+                ),
+                html.Div(id='transactions_table_message') # Filters the table cannot apply
             ], className= 'dashboard-right-bottom')
             
         ], className= 'dashboard-right-side')
@@ -0,0 +1,112 @@
+import argparse
+import pandas as pd
+from dotenv import load_dotenv
+from flask import Flask
+from utils import local_store, rollups, migrations
+from utils.load_data import global_engine, save_transactions_bulk, append_local_transactions, cache, uses_sql_database
+
+# Load environment variables from .env file
+load_dotenv()
+
+# ------------------------------------------------------------------------------
+# Maintenance commands for the Budgetr databases
+#   python manage.py migrate-localdb            (CSV files -> local store)
+#   python manage.py export-localdb             (local store -> CSV files)
+#   python manage.py compact-localdb            (fold the transaction log into the snapshot)
+#   python manage.py rebuild-rollups            (recompute the spending rollups from the transactions)
+#   python manage.py verify-rollups             (compare the spending rollups with the transactions)
+#   python manage.py import-transactions FILE   (bulk insert the transactions of a CSV file)
+#   python manage.py migrate-db                 (apply the pending schema migrations to the remote database)
+#   python manage.py migration-status           (list the schema migrations and whether they are applied)
+#
+# rebuild-rollups, verify-rollups and import-transactions run against the database of STORAGE_BACKEND
+# (the local store for local, the SQL database for sqlite and postgres); --local or --remote overrides it.
+
+def migrate_localdb(args):
+    local_store.migrate()
+    rows = rollups.rebuild_local_rollups()
+    print(f"Built {rows} spending rollups")
+
+def export_localdb(args):
+    local_store.export_all()
+
+def compact_localdb(args):
+    local_store.compact_all()
+
+# Whether a command runs against the SQL database: --remote / --local, else STORAGE_BACKEND
+def uses_remote(args):
+    return args.remote if args.remote is not None else uses_sql_database()
+
+def rebuild_rollups(args):
+    if uses_remote(args):
+        rows = rollups.rebuild_remote_rollups(global_engine)
+    else:
+        rows = rollups.rebuild_local_rollups()
+    print(f"Rebuilt {rows} spending rollups")
+
+def verify_rollups(args):
+    if uses_remote(args):
+        mismatches = rollups.verify_remote_rollups(global_engine)
+    else:
+        mismatches = rollups.verify_local_rollups()
+
+    if mismatches.empty:
+        print("Spending rollups match the transactions")
+    else:
+        print(f"{len(mismatches)} spending rollups do not match the transactions:")
+        print(mismatches.to_string(index=False))
+        raise SystemExit(1)
+
+def import_transactions(args):
+    if not args.file:
+        raise SystemExit("import-transactions needs a CSV file")
+
+    transactions_df = pd.read_csv(args.file, parse_dates=['date'])
+    if uses_remote(args):
+        transactionids = save_transactions_bulk(transactions_df)
+    else:
+        transactionids = append_local_transactions(transactions_df)
+    print(f"Imported {len(transactionids)} transactions")
+
+def migrate_db(args):
+    versions = migrations.run_migrations(global_engine)
+    if not versions:
+        print("The database schema is up to date")
+
+def migration_status(args):
+    for version, name, applied in migrations.migration_status(global_engine):
+        print(f"V{version:03d}__{name:<30} {'applied' if applied else 'pending'}")
+
+COMMANDS = {
+    'migrate-localdb': migrate_localdb,
+    'export-localdb': export_localdb,
+    'compact-localdb': compact_localdb,
+    'rebuild-rollups': rebuild_rollups,
+    'verify-rollups': verify_rollups,
+    'import-transactions': import_transactions,
+    'migrate-db': migrate_db,
+    'migration-status': migration_status
+}
+
+# ------------------------------------------------------------------------------
+
+# Commands run in an app context with the cache, so their writes invalidate the cached entries
+# of the running workers when the cache is shared (CACHE_BACKEND=filesystem or redis)
+def cache_app():
+    app = Flask(__name__)
+    cache.init_app(app)
+    return app
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Budgetr maintenance commands')
+    parser.add_argument('command', choices=list(COMMANDS))
+    parser.add_argument('file', nargs='?', help='CSV file for import-transactions')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--remote', dest='remote', action='store_true', default=None,
+                        help='run against the SQL database, whatever STORAGE_BACKEND is')
+    target.add_argument('--local', dest='remote', action='store_false',
+                        help='run against the local store, whatever STORAGE_BACKEND is')
+    args = parser.parse_args()
+
+    with cache_app().app_context():
+        COMMANDS[args.command](args)
@@ -0,0 +1,15 @@
+-- Spending per user, day and category, maintained incrementally on every transaction insert
+-- Fill it afterwards with: python manage.py rebuild-rollups --remote
+CREATE TABLE IF NOT EXISTS SpendingRollups
+(
+    UserID INT NOT NULL,
+    Year INT NOT NULL,
+    Month INT NOT NULL,
+    Day INT NOT NULL,
+    CategoryName VARCHAR(255) NOT NULL,
+    Total DECIMAL(12,2) NOT NULL DEFAULT 0,
+    Count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (UserID, Year, Month, Day, CategoryName),
+    FOREIGN KEY (UserID) REFERENCES Users (UserID),
+    FOREIGN KEY (CategoryName) REFERENCES Categories (Name)
+);
@@ -0,0 +1,4 @@
+-- One budget per user and month, and per user and category, required by the budget upserts (ON CONFLICT)
+-- The unique indexes also serve the budget lookups by (userid, budgetmonth) and (userid, categoryname)
+CREATE UNIQUE INDEX IF NOT EXISTS MonthlyBudgets_UserID_BudgetMonth_Key ON MonthlyBudgets (UserID, BudgetMonth);
+CREATE UNIQUE INDEX IF NOT EXISTS CategoricalBudgets_UserID_CategoryName_Key ON CategoricalBudgets (UserID, CategoryName);
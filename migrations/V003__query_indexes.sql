@@ -0,0 +1,5 @@
+-- The dashboard reads a user's transactions of one month
+CREATE INDEX IF NOT EXISTS Transactions_UserID_Date_Idx ON Transactions (UserID, Date);
+
+-- Login and sign-up look users up by email
+CREATE UNIQUE INDEX IF NOT EXISTS Users_Email_Key ON Users (Email);
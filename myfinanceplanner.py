@@ -1,10 +1,11 @@
 import os
 from dash import Dash, dcc, html
-from flask import Flask
+from flask import Flask, jsonify, session, abort
 from datetime import timedelta
 from dotenv import load_dotenv
-from utils.load_data import setup_logging, cache
+from utils.load_data import setup_logging, uses_sql_database, cache, cache_stats
 from utils.register_callbacks import register_callbacks
+from utils.db_pool import env_bool
 
 # Load environment variables from .env file
 load_dotenv()
@@ -18,6 +19,16 @@ server.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)  # Set session l
 # Initialize caching for the server
 cache.init_app(server)
 
+# Cache counters of the worker serving the request, per memoized function (no cached data)
+# Off unless CACHE_STATS_ENABLED is set, and only for logged-in sessions
+@server.route('/_cache-stats')
+def cache_stats_endpoint():
+    if not env_bool('CACHE_STATS_ENABLED', False):
+        abort(404)
+    if not session.get('logged_in'):
+        abort(403)
+    return jsonify(cache_stats())
+
 # Initialize Dash app
 app = Dash(__name__, server=server, suppress_callback_exceptions=True) # Suppress callback exceptions ensures callbacks not initially in the app layout are not raised as errors
 app.title = 'Budgetr.'
@@ -26,7 +37,7 @@ app.title = 'Budgetr.'
 application = app.server
 
 # Flags for testing
-USE_REMOTE_DB = False # Choose database type
+USE_REMOTE_DB = uses_sql_database() # Choose database type with STORAGE_BACKEND (local, sqlite or postgres)
 LOGGING = False # Logging for database records and user sessions
 
 setup_logging(server, LOGGING)
@@ -13,6 +13,14 @@ from CategoricalBudgets;
 select *
 from transactions;
 
+select *
+from SpendingRollups;
+
+select *
+from SchemaMigrations;
+
+DROP TABLE SchemaMigrations;
+DROP TABLE SpendingRollups;
 DROP TABLE Transactions;
 DROP TABLE MonthlyBudgets;
 DROP TABLE CategoricalBudgets;
@@ -38,7 +46,8 @@ CREATE TABLE MonthlyBudgets
     UserID INT NOT NULL,
     TotalBudget DECIMAL(10,2),
     BudgetMonth DATE,  -- Storing only the first day of the month to represent the whole month
-    FOREIGN KEY (UserID) REFERENCES Users (UserID)
+    FOREIGN KEY (UserID) REFERENCES Users (UserID),
+    CONSTRAINT MonthlyBudgets_UserID_BudgetMonth_Key UNIQUE (UserID, BudgetMonth) -- One budget per user and month, used by the budget upsert
 );
 
 CREATE TABLE CategoricalBudgets
@@ -48,7 +57,8 @@ CREATE TABLE CategoricalBudgets
     CategoryName VARCHAR(255) NOT NULL,
     CategoryBudget DECIMAL(10,2),
     FOREIGN KEY (UserID) REFERENCES Users (UserID),
-    FOREIGN KEY (CategoryName) REFERENCES Categories (Name)
+    FOREIGN KEY (CategoryName) REFERENCES Categories (Name),
+    CONSTRAINT CategoricalBudgets_UserID_CategoryName_Key UNIQUE (UserID, CategoryName) -- One budget per user and category, used by the budget upsert
 );
 
 CREATE TABLE Transactions
@@ -63,6 +73,21 @@ CREATE TABLE Transactions
     FOREIGN KEY (CategoryName) REFERENCES Categories (Name)
 );
 
+-- Spending per user, day and category, maintained incrementally on every transaction insert
+CREATE TABLE SpendingRollups
+(
+    UserID INT NOT NULL,
+    Year INT NOT NULL,
+    Month INT NOT NULL,
+    Day INT NOT NULL,
+    CategoryName VARCHAR(255) NOT NULL,
+    Total DECIMAL(12,2) NOT NULL DEFAULT 0,
+    Count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (UserID, Year, Month, Day, CategoryName),
+    FOREIGN KEY (UserID) REFERENCES Users (UserID),
+    FOREIGN KEY (CategoryName) REFERENCES Categories (Name)
+);
+
 ALTER TABLE Users
 ADD CONSTRAINT userid_unique UNIQUE (UserID);
 
@@ -75,6 +100,10 @@ ADD CONSTRAINT catbudgetid_unique UNIQUE (CatBudgetID);
 ALTER TABLE Transactions
 ADD CONSTRAINT transactionid_unique UNIQUE (transactionid);
 
+-- Indexes of the hot queries (also shipped as migrations/V003__query_indexes.sql for existing databases)
+CREATE INDEX Transactions_UserID_Date_Idx ON Transactions (UserID, Date);
+CREATE UNIQUE INDEX Users_Email_Key ON Users (Email);
+
 
 
 
@@ -328,4 +357,11 @@ INSERT INTO Transactions (UserID, Date, CategoryName, Amount, Description) VALUE
                                                                                (1, '2023-12-26', 'Education', 80.00, 'Online seminar'),
                                                                                (1, '2023-12-28', 'Miscellaneous', 25.00, 'Gift for friend'),
                                                                                (1, '2023-12-30', 'Food', 70.00, 'Grocery shopping'),
-                                                                               (1, '2023-12-31', 'Healthcare', 120.00, 'Doctor visit');
\ No newline at end of file
+                                                                               (1, '2023-12-31', 'Healthcare', 120.00, 'Doctor visit');
+
+-- Build the spending rollups from the inserted transactions
+INSERT INTO SpendingRollups (UserID, Year, Month, Day, CategoryName, Total, Count)
+SELECT UserID, EXTRACT(YEAR FROM Date), EXTRACT(MONTH FROM Date), EXTRACT(DAY FROM Date), CategoryName, SUM(Amount), COUNT(*)
+FROM Transactions
+WHERE Date IS NOT NULL
+GROUP BY UserID, EXTRACT(YEAR FROM Date), EXTRACT(MONTH FROM Date), EXTRACT(DAY FROM Date), CategoryName;
@@ -1,12 +1,15 @@
 from .load_data import (
-    cache, userid, database_url, local_users_url, global_engine,
-    load_database, load_remote_database, load_local_database, load_transactions,
+    cache, cache_stats, userid, acting_as, user_memoize, invalidate, invalidate_transactions, storage_backend, uses_sql_database, database_url, local_users_url, global_engine, database_pool_stats, get_table, refresh_tables,
+    load_database, load_concurrently, load_budgets, load_monthly_budget, load_remote_database, load_local_database, load_month_transactions,
+    load_month_transactions_page, load_month_rollups, load_latest_transaction_date, month_slice, load_transactions,
     load_monthly_budgets, load_categorical_budgets, load_categories, load_users,
     load_local_transactions, load_local_monthly_budgets, load_local_categorical_budgets,
-    load_local_categories, load_local_users, save_local_transactions, save_local_monthly_budgets,
-    save_local_categorical_budgets, save_local_categories, save_local_users, get_max_id,
-    convert_to_native_types, save_transactions, save_monthly_budgets, update_monthly_budget,
-    save_categorical_budgets, update_categorical_budget, print_dataframes, current_year,
+    load_local_categories, load_local_users, save_local_transactions, append_local_transaction, append_local_transactions,
+    save_local_monthly_budgets, upsert_local_monthly_budget, delete_local_monthly_budget, upsert_local_categorical_budget,
+    save_local_categorical_budgets, save_local_categories, save_local_users, next_local_id,
+    convert_to_native_types, save_transactions, save_transactions_bulk, save_monthly_budgets, update_monthly_budget,
+    save_categorical_budgets, update_categorical_budget,
+    upsert_monthly_budget, delete_monthly_budget, upsert_categorical_budget, print_dataframes, current_year,
     current_month, monthsToInt, IntToMonths, setup_logging
 )
 
@@ -0,0 +1,109 @@
+import io
+import os
+import pickle
+import pandas as pd
+import pyarrow as pa
+import plotly.graph_objects as go
+from plotly.basedatatypes import BaseFigure
+from cachelib.serializers import FileSystemSerializer, RedisSerializer
+from flask_caching.backends import FileSystemCache, RedisCache
+
+# ------------------------------------------------------------------------------
+# Cache backend of the Flask server
+#
+# CACHE_BACKEND selects where cached results and cache tags are kept:
+#   simple      in the memory of each process (default, only for a single worker)
+#   filesystem  files in CACHE_DIR, shared by the workers of a single node (default ./localdb/cache)
+#   redis       Redis server at CACHE_REDIS_URL, shared by every node (default redis://localhost:6379/0)
+# CACHE_TIMEOUT sets the default lifetime of an entry in seconds (default 300).
+#
+# The cache tags used for invalidation live in the same backend as the entries, so with the
+# filesystem or redis backend a write in one worker invalidates the entries of every worker.
+
+CACHE_BACKENDS = ['simple', 'filesystem', 'redis']
+
+def cache_backend():
+    backend = os.getenv('CACHE_BACKEND', 'simple').strip().lower()
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown CACHE_BACKEND '{backend}', expected one of {', '.join(CACHE_BACKENDS)}")
+    return backend
+
+def cache_config():
+    config = {'CACHE_DEFAULT_TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300))}
+
+    backend = cache_backend()
+    if backend == 'filesystem':
+        config['CACHE_TYPE'] = f'{__name__}.FrameFileSystemCache'
+        config['CACHE_DIR'] = os.getenv('CACHE_DIR', './localdb/cache')
+        config['CACHE_THRESHOLD'] = int(os.getenv('CACHE_THRESHOLD', 5000))
+    elif backend == 'redis':
+        config['CACHE_TYPE'] = f'{__name__}.FrameRedisCache'
+        config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+        config['CACHE_KEY_PREFIX'] = os.getenv('CACHE_KEY_PREFIX', 'budgetr:')
+    else:
+        config['CACHE_TYPE'] = 'SimpleCache'
+    return config
+
+# ------------------------------------------------------------------------------
+# Serialization
+#   Values are pickled, except for two types that pickle slowly:
+#     DataFrames      written as Arrow IPC streams (columnar, no per-value Python objects)
+#     Plotly figures  written as their plain dict and rebuilt without validation, since the
+#                     dict came from a figure that was already validated
+#   Frames that Arrow cannot represent (e.g. mixed-type columns) fall back to pickle.
+
+def frame_to_arrow(df):
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def frame_from_arrow(data):
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+def figure_from_dict(figure_dict):
+    return go.Figure(figure_dict, _validate=False)
+
+class FramePickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        if isinstance(obj, pd.DataFrame) and all(isinstance(column, str) for column in obj.columns):
+            try:
+                return frame_from_arrow, (frame_to_arrow(obj),)
+            except (pa.ArrowException, TypeError, ValueError):
+                return NotImplemented
+        if isinstance(obj, BaseFigure):
+            return figure_from_dict, (obj.to_plotly_json(),)
+        return NotImplemented
+
+def dump_value(value, file, protocol=pickle.HIGHEST_PROTOCOL):
+    FramePickler(file, protocol).dump(value)
+
+def dumps_value(value, protocol=pickle.HIGHEST_PROTOCOL):
+    buffer = io.BytesIO()
+    dump_value(value, buffer, protocol)
+    return buffer.getvalue()
+
+class FrameFileSystemSerializer(FileSystemSerializer):
+    def dump(self, value, f, protocol=pickle.HIGHEST_PROTOCOL):
+        try:
+            dump_value(value, f, protocol)
+        except (pickle.PickleError, pickle.PicklingError) as e:
+            self._warn(e)
+
+class FrameRedisSerializer(RedisSerializer):
+    def dumps(self, value, protocol=pickle.HIGHEST_PROTOCOL):
+        if type(value) is int:
+            return str(value).encode('ascii') # Kept as text for Redis INCR/DECR, as in RedisSerializer
+        return b'!' + dumps_value(value, protocol)
+
+# Reading needs nothing special: pickle.load calls frame_from_arrow and figure_from_dict
+
+# ------------------------------------------------------------------------------
+# Backends using the serializers above (CACHE_TYPE import paths of cache_config)
+
+class FrameFileSystemCache(FileSystemCache):
+    serializer = FrameFileSystemSerializer()
+
+class FrameRedisCache(RedisCache):
+    serializer = FrameRedisSerializer()
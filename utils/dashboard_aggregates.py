@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------------------------
+# Dashboard aggregates
+#
+# Everything the dashboard shows for a month, computed in one vectorized pass over the month's
+# spending rows (rollups or raw transactions: anything with a day, a category and an amount):
+#   category totals  pd.factorize codes the categories (hashing, not sorting), np.bincount sums the amounts per code
+#   daily series     np.bincount sums the amounts per day, np.cumsum accumulates them
+#   crossover        np.searchsorted finds the first day over budget in the running maximum of the
+#                    cumulative spending (sorted, unlike the cumulative spending with refunds)
+# The figure builders and the transactions table read the result instead of grouping the frames again.
+
+# Aggregates of a month's spending rows, as a dict of NumPy arrays:
+#   total_spent       sum of the amounts
+#   categories        category names, sorted
+#   category_totals   spending of each category
+#   days              days with spending, sorted
+#   cumulative        cumulative spending at the end of each of these days
+#   over_index        index in days of the first day over the monthly budget, None if never over
+#                     (or without a budget, see with_budget() to add it afterwards)
+def month_aggregates(days, categories, amounts, monthly_budget=None):
+    days = np.asarray(days, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+
+    category_codes, category_names = pd.factorize(np.asarray(categories, dtype=object), sort=True)
+    category_names = np.asarray(category_names, dtype=object)
+    category_totals = np.bincount(category_codes, weights=amounts, minlength=len(category_names))
+
+    day_counts = np.bincount(days, minlength=32)
+    day_totals = np.bincount(days, weights=amounts, minlength=32)
+    spending_days = np.flatnonzero(day_counts)
+    cumulative = np.cumsum(day_totals[spending_days])
+
+    return {
+        'total_spent': float(amounts.sum()),
+        'categories': category_names,
+        'category_totals': category_totals,
+        'days': spending_days,
+        'cumulative': cumulative,
+        'over_index': first_day_over(cumulative, monthly_budget)
+    }
+
+# Index of the first day the cumulative spending exceeds the budget, None if it never does (or without a budget)
+def first_day_over(cumulative, monthly_budget):
+    if monthly_budget is None or not len(cumulative):
+        return None
+
+    first_over = int(np.searchsorted(np.maximum.accumulate(cumulative), float(monthly_budget), side='right'))
+    return first_over if first_over < len(cumulative) else None
+
+# Aggregates computed without the budget, completed with the crossover of a monthly budget
+def with_budget(aggregates, monthly_budget):
+    return dict(aggregates, over_index=first_day_over(aggregates['cumulative'], monthly_budget))
+
+# Aggregates of the spending rollups of a month (one row per day and category)
+def rollup_aggregates(rollups_df, monthly_budget=None):
+    return month_aggregates(rollups_df['day'].to_numpy(), rollups_df['categoryname'].to_numpy(),
+                            rollups_df['total'].to_numpy(), monthly_budget)
+
+# Spending of the given categories, 0 for categories without spending
+def category_spending(aggregates, names):
+    positions = pd.Index(aggregates['categories']).get_indexer(names)
+    return np.where(positions >= 0, aggregates['category_totals'][positions], 0.0)
+
+# ------------------------------------------------------------------------------
+# Transactions table
+
+# Rows of the transactions table, in the order of the frame (a page sorted by the query, see transactions_table.py)
+def transaction_table_rows(transactions_df):
+    if transactions_df.empty:
+        return []
+
+    dates = transactions_df['date'].to_numpy(dtype='datetime64[D]')
+    return [
+        {'date_display': date_display, 'categoryname': categoryname, 'amount': amount, 'description': description}
+        for date_display, categoryname, amount, description in zip(
+            np.datetime_as_string(dates, unit='D').tolist(),
+            transactions_df['categoryname'].tolist(),
+            transactions_df['amount'].astype('float64').tolist(),
+            transactions_df['description'].tolist()
+        )
+    ]
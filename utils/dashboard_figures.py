@@ -0,0 +1,174 @@
+import json
+import numpy as np
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
+from .dashboard_aggregates import category_spending
+from .memory_cache import share_value
+
+# ------------------------------------------------------------------------------
+# Dashboard figures
+#
+# The three dashboard figures, built directly as plain dicts in their JSON wire form from the
+# month's aggregates (see dashboard_aggregates.py). plotly.express builds intermediate frames and
+# validates every property on each call; these builders emit the same figures (traces, hover
+# templates, colors and layout) without either, which benchmarks/dashboard_figures.py checks
+# against plotly.express. Everything that does not depend on the data is built once at import.
+
+TEXT_COLOR = '#eeeee4'
+TRANSPARENT = 'rgba(0,0,0,0)'
+
+CATEGORY_COLORS = {
+    "Housing": "#FF5733",           # Vibrant Red
+    "Investments": "#1F77B4",       # Bright Blue
+    "Debt Payments": "#2CA02C",     # Bold Green
+    "Healthcare": "#9467BD",        # Medium Purple
+    "Food": "#FF69B4",              # Hot Pink
+    "Entertainment & Leisure": "#17BECF",  # Vibrant Teal
+    "Education": "#7F7F7F",         # Neutral Gray
+    "Transportation": "#C0C0C0",    # Light Silver
+    "Personal Care": "#FFA500",     # Bright Orange
+    "Miscellaneous": "#FF4500"      # Orange Red
+}
+
+STATUS_COLORS = {'Under': 'green', 'Over': 'red', 'Spending': '#f19500'} # Spending: months without a budget
+BUDGET_LINE_COLOR = '#f8d44c'
+BUDGET_BAR_COLORS = {'Budget': '#92154f', 'Spent': '#f19500'}
+
+# Default Plotly template in its wire form, shared by every figure (and by their cache entries)
+TEMPLATE = share_value(json.loads(to_json_plotly(pio.templates[pio.templates.default])))
+COLORWAY = TEMPLATE['layout']['colorway']
+
+# ------------------------------------------------------------------------------
+# Shared layout
+
+MARGIN = {'b': 0, 'l': 0, 'r': 0, 't': 0}
+LEGEND_FONT = {'color': TEXT_COLOR, 'size': 10}
+HORIZONTAL_LEGEND = {'font': LEGEND_FONT, 'orientation': 'h', 'title': {'text': ''}, 'tracegroupgap': 0,
+                     'x': 0.5, 'xanchor': 'center', 'y': 1.02, 'yanchor': 'bottom'}
+AXIS_TITLE_FONT = {'color': TEXT_COLOR}
+
+def base_layout(**layout):
+    return {'template': TEMPLATE, 'margin': MARGIN, 'paper_bgcolor': TRANSPARENT, 'plot_bgcolor': TRANSPARENT, **layout}
+
+def axis(anchor, title, **properties):
+    return {'anchor': anchor, 'domain': [0.0, 1.0], 'title': {'font': AXIS_TITLE_FONT, 'text': title}, **properties}
+
+# Colors of the categories, categories without a color take the next template color (as in plotly.express)
+def category_colors(names):
+    colors = dict(CATEGORY_COLORS)
+    for name in names:
+        if name not in colors:
+            colors[name] = COLORWAY[len(colors) % len(COLORWAY)]
+    return [colors[name] for name in names]
+
+# ------------------------------------------------------------------------------
+# Figures
+
+# Share of the month's spending of each category
+def expense_categorization_figure(aggregates):
+    names = aggregates['categories'].tolist()
+    trace = {
+        'type': 'pie',
+        'labels': names,
+        'values': aggregates['category_totals'].tolist(),
+        'customdata': [[name] for name in names],
+        'domain': {'x': [0.0, 1.0], 'y': [0.0, 1.0]},
+        'hole': 0.3,
+        'hovertemplate': 'categoryname=%{customdata[0]}<br>amount=%{value}<extra></extra>',
+        'insidetextorientation': 'radial', # Better orientation for text inside
+        'legendgroup': '',
+        'marker': {'colors': category_colors(names)},
+        'name': '',
+        'showlegend': True,
+        'textfont': {'color': TEXT_COLOR, 'size': 10}
+    }
+    return {'data': [trace], 'layout': base_layout(legend={'font': LEGEND_FONT, 'tracegroupgap': 0})}
+
+# Cumulative spending per day, green while under the monthly budget and red from the day it is exceeded
+# (a single line without a budget line for months without a budget, monthly_budget None)
+def daily_spending_trend_figure(aggregates, monthly_budget):
+    days, cumulative, over_index = aggregates['days'], aggregates['cumulative'], aggregates['over_index']
+    if monthly_budget is None:
+        status = np.full(len(days), 'Spending')
+    else:
+        monthly_budget = float(monthly_budget)
+        status = np.where(cumulative <= monthly_budget, 'Under', 'Over')
+
+    # The crossover day ends the 'Under' line and starts the 'Over' one
+    if over_index is not None:
+        rows = np.r_[0:over_index + 1, over_index:len(days)]
+    else:
+        rows = np.arange(len(days))
+
+    data = []
+    for name in dict.fromkeys(status[rows]): # Statuses in order of appearance
+        status_rows = rows[status[rows] == name]
+        data.append({
+            'type': 'scatter',
+            'x': days[status_rows].tolist(),
+            'y': cumulative[status_rows].tolist(),
+            'hovertemplate': f'Status={name}<br>day=%{{x}}<br>cumulative spending ($)=%{{y}}<extra></extra>',
+            'legendgroup': name,
+            'line': {'color': STATUS_COLORS[name], 'dash': 'solid', 'width': 3},
+            'marker': {'symbol': 'circle'},
+            'mode': 'lines+markers',
+            'name': name,
+            'orientation': 'v',
+            'showlegend': True,
+            'xaxis': 'x',
+            'yaxis': 'y'
+        })
+
+    # The 'Over' segment starts at the last day under budget, so the two lines connect
+    if over_index is not None:
+        over_rows = np.arange(max(over_index - 1, 0), len(days))
+        data.append({'type': 'scatter', 'x': days[over_rows].tolist(), 'y': cumulative[over_rows].tolist(),
+                     'line': {'color': 'red', 'width': 3}, 'mode': 'lines+markers', 'name': 'Over', 'showlegend': False})
+
+    max_day = int(days.max())
+    if monthly_budget is not None:
+        data.append({'type': 'scatter', 'x': [1, max_day], 'y': [monthly_budget, monthly_budget],
+                     'line': {'color': BUDGET_LINE_COLOR, 'dash': 'dash', 'width': 3}, 'mode': 'lines', 'name': 'Monthly Budget'})
+
+    layout = base_layout(
+        legend=HORIZONTAL_LEGEND,
+        xaxis=axis('y', 'day', showgrid=False, tickangle=0, tickfont={'color': TEXT_COLOR, 'size': 7},
+                   tickmode='array', tickvals=list(range(1, max_day + 1))), # Tick every day
+        yaxis=axis('x', 'cumulative spending ($)', gridcolor='lightblue', showgrid=True, tickfont={'color': TEXT_COLOR})
+    )
+    return {'data': data, 'layout': layout}
+
+# Budget and spending of each category with a budget
+def budget_vs_actual_spending_figure(aggregates, categorical_budgets_df):
+    budget_data = categorical_budgets_df[['categoryname', 'categorybudget']].groupby('categoryname')['categorybudget'].sum()
+    names = budget_data.index.tolist()
+    amounts = {
+        'Budget': np.asarray(budget_data, dtype=np.float64).tolist(),
+        'Spent': category_spending(aggregates, names).tolist() # 0 for categories with no spending
+    }
+
+    data = [{
+        'type': 'bar',
+        'x': names,
+        'y': amounts[name],
+        'alignmentgroup': 'True',
+        'hovertemplate': f'={name}<br>category types=%{{x}}<br>amount ($)=%{{y}}<extra></extra>',
+        'legendgroup': name,
+        'marker': {'color': BUDGET_BAR_COLORS[name], 'pattern': {'shape': ''}},
+        'name': name,
+        'offsetgroup': name,
+        'orientation': 'v',
+        'showlegend': True,
+        'textposition': 'auto',
+        'xaxis': 'x',
+        'yaxis': 'y'
+    } for name in ['Budget', 'Spent']]
+
+    layout = base_layout(
+        barmode='group',
+        legend=HORIZONTAL_LEGEND,
+        xaxis=axis('y', 'category types', gridcolor=TRANSPARENT, showgrid=True, tickangle=45,
+                   tickfont={'color': TEXT_COLOR, 'size': 10}),
+        yaxis=axis('x', 'amount ($)', gridcolor='lightblue', showgrid=True, tickfont={'color': TEXT_COLOR})
+    )
+    return {'data': data, 'layout': layout}
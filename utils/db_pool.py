@@ -0,0 +1,128 @@
+import os
+import time
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, StaticPool
+
+# ------------------------------------------------------------------------------
+# Connection pool of the remote database
+#
+# The pool is configured through environment variables (or the .env file):
+#   DB_POOL_SIZE            connections kept open per process (default 5)
+#   DB_MAX_OVERFLOW         extra connections opened under load, closed when returned (default 10)
+#   DB_POOL_TIMEOUT         seconds to wait for a free connection before failing (default 30)
+#   DB_POOL_RECYCLE         seconds after which a connection is replaced, -1 to never recycle (default 1800)
+#   DB_POOL_PRE_PING        test connections before handing them out (default true)
+#   DB_STATEMENT_TIMEOUT_MS per-statement timeout on PostgreSQL, 0 for none (default 0)
+#
+# Each Gunicorn worker has its own pool, so the database sees up to
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+def env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def pool_settings():
+    return {
+        'pool_size': env_int('DB_POOL_SIZE', 5),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True)
+    }
+
+# ------------------------------------------------------------------------------
+# Queue pool that measures how long checkouts wait for a connection
+
+class ObservedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self.stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with self.stats_lock:
+                self.checkouts += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+
+    # Keep the counters when the engine replaces the pool (e.g. engine.dispose())
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkouts, pool.timeouts = self.checkouts, self.timeouts
+        pool.wait_total, pool.wait_max = self.wait_total, self.wait_max
+        return pool
+
+# ------------------------------------------------------------------------------
+# SQLite connections
+#   WAL mode lets readers run while a writer commits, and writers wait for each other
+#   (busy_timeout) instead of failing. Foreign keys are enforced as in PostgreSQL.
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+# ------------------------------------------------------------------------------
+
+def create_pooled_engine(url):
+    if url is None:
+        return create_engine(url) # Raises the usual error for a missing DATABASE_URL
+
+    parsed_url = make_url(url)
+    if parsed_url.get_backend_name() == 'sqlite':
+        if parsed_url.database in (None, '', ':memory:'):
+            # An in-memory database only exists in its connection, so every thread shares a single one
+            engine = create_engine(url, poolclass=StaticPool, connect_args={'check_same_thread': False})
+        else:
+            engine = create_engine(url, poolclass=ObservedQueuePool, **pool_settings())
+        event.listen(engine, 'connect', configure_sqlite_connection)
+        return engine
+
+    connect_args = {}
+    statement_timeout = env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+    if statement_timeout and parsed_url.get_backend_name() == 'postgresql':
+        connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+
+    return create_engine(url, poolclass=ObservedQueuePool, connect_args=connect_args, **pool_settings())
+
+# Current state of an engine's pool, used to size the pool against workers and threads
+def pool_stats(engine):
+    pool = engine.pool
+    if not isinstance(pool, ObservedQueuePool):
+        return {'pool': pool.status()}
+
+    with pool.stats_lock:
+        checkouts, timeouts = pool.checkouts, pool.timeouts
+        wait_total, wait_max = pool.wait_total, pool.wait_max
+
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0),
+        'max_overflow': pool._max_overflow,
+        'checkouts': checkouts,
+        'timeouts': timeouts,
+        'wait_mean_ms': round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+        'wait_max_ms': round(wait_max * 1000, 3)
+    }
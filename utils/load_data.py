@@ -1,29 +1,235 @@
 import os
+import threading
+import hashlib
+import time
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import logging
 import pandas as pd
-from sqlalchemy import MetaData, Table, create_engine, func, select, update
+from sqlalchemy import MetaData, Table, text, update
 from datetime import datetime
-from flask import session
+from flask import session, current_app, has_app_context
 import numpy as np
 from flask_caching import Cache
+from .local_store import read_table, write_table, allocate_id, upsert_row, delete_rows, read_month, month_bounds
+from .remote_queries import (user_transactions, user_monthly_budgets, user_categorical_budgets,
+                             month_transactions, month_transactions_page, latest_transaction_date)
+from .transactions_table import local_transactions_page
+from .db_pool import create_pooled_engine, pool_stats
+from .cache_backend import cache_config, cache_backend
+from .memory_cache import memory_cache, fresh_copy
+from .sqlite_db import sqlite_url, init_sqlite_database
+from .rollups import (append_transactions_and_rollups, read_local_month_rollups, rebuild_local_rollups,
+                      add_remote_rollups, read_remote_month_rollups)
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Set up caching for the Flask server
-cache = Cache(config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})
+# Set up caching for the Flask server (CACHE_BACKEND selects the backend, see cache_backend.py)
+cache = Cache(config=cache_config())
 
 # ------------------------------------------------------------------------------
 
+# User whose data is loaded in the current thread: set for loader workers and background tasks,
+# which run outside the request and cannot read the session
+acting_user_id = ContextVar('acting_user_id', default=None)
+
 def userid():
+    user_id = acting_user_id.get()
+    if user_id is not None:
+        return user_id
     return session.get('user_id')
 
+@contextmanager
+def acting_as(user_id):
+    token = acting_user_id.set(user_id)
+    try:
+        yield
+    finally:
+        acting_user_id.reset(token)
+
+# ------------------------------------------------------------------------------
+# User-scoped memoization
+#   cache.memoize() only keys on the arguments, but the loaders and callbacks read the user from the
+#   session. user_memoize() adds the user and the storage backend to the key, so a cached result is
+#   never served to another user. Pass per_user=False for data shared by all users.
+#   Results of None are not cached.
+#
+#   Entries are also keyed by the versions of the tables they read (see cache tags below), so a
+#   write only invalidates the entries of the user, table and month it changed:
+#     tables  the tables the function reads
+#     month   optional function of the call arguments returning the (year, month) that is read,
+#             in which case only writes to that month (or to the whole table) invalidate the entry
+#
+#   Results are looked up in the in-process LRU first, then in the cache backend (see memory_cache.py).
+#   Concurrent misses of the same entry in a worker are computed once: the first call computes it,
+#   the others wait for it and read its result (e.g. the dashboard callbacks of a month, which all
+#   start from the same aggregates).
+
+def memoize_key(func, args, kwargs, per_user=True, tags=()):
+    arguments = hashlib.sha256(repr((args, sorted(kwargs.items()))).encode()).hexdigest()[:16]
+    user = userid() if per_user else 'all'
+    key = f'memo:{func.__module__}.{func.__qualname__}:{user}:{storage_backend()}:{arguments}'
+
+    if tags:
+        versions = tag_versions(user, tags)
+        key += ':' + hashlib.sha256(repr(versions).encode()).hexdigest()[:12]
+    return key
+
+# Entries being computed in this worker, with the event set once they are
+computing = {}
+computing_lock = threading.Lock()
+
+# None if the caller now computes the entry, else the event of the call already computing it
+def claim_computation(key):
+    with computing_lock:
+        done = computing.get(key)
+        if done is None:
+            computing[key] = threading.Event()
+        return done
+
+def finish_computation(key):
+    with computing_lock:
+        computing.pop(key).set()
+
+def user_memoize(timeout=None, per_user=True, tables=(), month=None):
+    def decorator(func):
+        function = f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            selected_month = month(*args, **kwargs) if month else None
+            tags = read_tags(tables, selected_month)
+
+            key = memoize_key(func, args, kwargs, per_user, tags)
+            memory_timeout = cache.config['CACHE_DEFAULT_TIMEOUT'] if timeout is None else timeout
+            while True:
+                result = memory_cache.get(key)
+                if result is not None:
+                    return result
+
+                result = cache.get(key)
+                if result is not None:
+                    memory_cache.count(function, 'backend_hits')
+                    memory_cache.set(key, result, function, memory_timeout)
+                    return fresh_copy(result)
+
+                done = claim_computation(key)
+                if done is None:
+                    break
+                # Look the entry up again once computed (or compute it if that call failed)
+                memory_cache.count(function, 'coalesced')
+                done.wait()
+
+            try:
+                memory_cache.count(function, 'misses')
+                result = func(*args, **kwargs)
+                if result is not None:
+                    kept_in_memory = memory_cache.set(key, result, function, memory_timeout)
+                    # The per-process SimpleCache would only duplicate the in-process LRU
+                    if not kept_in_memory or cache_backend() != 'simple':
+                        cache.set(key, result, timeout=timeout)
+            finally:
+                finish_computation(key)
+            return fresh_copy(result)
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+# Hit, miss, eviction and size counters of this worker, per memoized function
+def cache_stats():
+    return {'backend': cache_backend()} | memory_cache.snapshot()
+
+# ------------------------------------------------------------------------------
+# Cache tags
+#   Every (user, table, scope) has a version in the cache, replaced by a new one on each write:
+#     'YYYY-MM'  bumped by writes to rows of that month
+#     'all'      bumped by writes that may touch every month (whole-table saves, tables without months)
+#     'any'      bumped by every write
+#   Whole-table readers depend on 'any', readers of a month on that month and 'all'.
+#   Versions are unique values rather than counters, so an evicted tag can never
+#   come back with the version of an older entry.
+
+# Tables shared by all users have a single set of tags
+SHARED_TABLES = ['categories']
+
+def tag_key(user_id, table, scope):
+    if table in SHARED_TABLES:
+        user_id = 'all'
+    return f'tag:{user_id}:{table}:{scope}'
+
+def month_scope(value):
+    timestamp = pd.Timestamp(value)
+    return f'{timestamp.year:04d}-{timestamp.month:02d}'
+
+def new_tag_version():
+    return f'{os.getpid()}-{time.time_ns()}'
+
+# (table, scope) pairs read by a function reading the given tables, for one month or all of them
+def read_tags(tables, selected_month=None):
+    if selected_month is None or None in selected_month:
+        return [(table, 'any') for table in tables]
+
+    scope = f'{int(selected_month[0]):04d}-{int(selected_month[1]):02d}'
+    return [(table, tag_scope) for table in tables for tag_scope in (scope, 'all')]
+
+def tag_versions(user_id, tags):
+    keys = [tag_key(user_id, table, scope) for table, scope in tags]
+    versions = list(cache.get_many(*keys))
+
+    missing = {key: new_tag_version() for key, version in zip(keys, versions) if version is None}
+    if missing:
+        cache.set_many(missing, timeout=0) # Tags never expire
+        versions = [version if version is not None else missing[key] for key, version in zip(keys, versions)]
+    return versions
+
+# Invalidate the cached entries that read a user's table, for the given months (dates
+# or timestamps in them), or for every month if none are given
+def invalidate(table, months=None, user_id=None):
+    if not has_app_context():
+        return # Outside the app (e.g. manage.py) there is no cache to invalidate
+
+    user_id = userid() if user_id is None else user_id
+    scopes = {month_scope(month) for month in months} if months is not None else {'all'}
+    scopes.add('any')
+    cache.set_many({tag_key(user_id, table, scope): new_tag_version() for scope in scopes}, timeout=0)
+
+# Invalidate the transactions of each user and month in a frame or list of transactions
+def invalidate_transactions(transactions):
+    df = pd.DataFrame(transactions)
+    for user_id, user_df in df.groupby('userid'):
+        invalidate('transactions', user_df['date'].dropna().tolist(), int(user_id))
+
+# ------------------------------------------------------------------------------
+# Storage backends
+#   STORAGE_BACKEND selects where the data lives:
+#     local     Parquet store in ./localdb (default)
+#     sqlite    embedded SQLite database, see sqlite_db.py
+#     postgres  PostgreSQL server at DATABASE_URL
+#   SQLite and PostgreSQL share the same SQL code path (use_remote_db=True).
+
+STORAGE_BACKENDS = ['local', 'sqlite', 'postgres']
+
+def storage_backend():
+    backend = os.getenv('STORAGE_BACKEND', 'local').strip().lower()
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected one of {', '.join(STORAGE_BACKENDS)}")
+    return backend
+
+def uses_sql_database():
+    return storage_backend() != 'local'
+
 # ------------------------------------------------------------------------------
 # Database URLs
 
-# Path to the remote database
+# Path to the remote database (the SQLite file when the SQLite backend is selected)
 def database_url():
+    if storage_backend() == 'sqlite':
+        return sqlite_url()
     return os.getenv('DATABASE_URL')
 
 # Path to the local database
@@ -31,21 +237,93 @@ def local_users_url():
     return './localdb/users.csv'
 
 # ------------------------------------------------------------------------------
-# Create a global engine instance
+# Create a global engine instance (pool settings are read from the environment, see db_pool.py)
+
+global_engine = create_pooled_engine(database_url())
+
+if storage_backend() == 'sqlite':
+    init_sqlite_database(global_engine)
+
+# Checked out connections, overflow and checkout wait times of the global engine's pool
+def database_pool_stats():
+    return pool_stats(global_engine)
+
+# ------------------------------------------------------------------------------
+# Registry of reflected tables
+#   Each table is reflected once, the first time it is written to, and reused by every writer.
+#   Call refresh_tables() after a schema migration to reflect the tables again.
+
+table_metadata = MetaData()
+table_registry_lock = threading.Lock()
+
+def get_table(table_name):
+    table = table_metadata.tables.get(table_name)
+    if table is not None:
+        return table
+
+    with table_registry_lock:
+        return Table(table_name, table_metadata, autoload_with=global_engine)
+
+def refresh_tables():
+    global table_metadata
+    with table_registry_lock:
+        table_metadata = MetaData()
+
+# ------------------------------------------------------------------------------
+# Concurrent loading
+#   Loads run in a bounded pool of worker threads shared by all requests (LOADER_THREADS, default 6).
+#   Workers cannot read the session, so they load as the user of the calling request and inside
+#   its app context (needed by the cache). Remote loads each check out a pooled connection, so keep
+#   LOADER_THREADS within the pool size (DB_POOL_SIZE + DB_MAX_OVERFLOW).
 
-global_engine = create_engine(database_url())
+loader_executor = ThreadPoolExecutor(max_workers=int(os.getenv('LOADER_THREADS', 6)), thread_name_prefix='loader')
+
+def run_as(user_id, app, loader):
+    with acting_as(user_id):
+        if app is None:
+            return loader()
+        with app.app_context():
+            return loader()
+
+# Run the loaders in parallel and return their results in the same order
+def load_concurrently(*loaders):
+    user_id = userid()
+    app = current_app._get_current_object() if has_app_context() else None
+
+    futures = [loader_executor.submit(run_as, user_id, app, loader) for loader in loaders]
+    return tuple(future.result() for future in futures)
 
 # ------------------------------------------------------------------------------
 # Load all the data from the databases
 
-def load_database(use_remote_db):
+# The three tables are loaded concurrently by default, pass concurrent=False to load them one after another
+def load_database(use_remote_db, concurrent=True):
     if use_remote_db:
+        if concurrent:
+            return load_concurrently(load_transactions, load_monthly_budgets, load_categorical_budgets)
         transactions_df, monthly_budgets_df, categorical_budgets_df = load_remote_database()
     else:
+        if concurrent:
+            return load_concurrently(load_local_transactions, load_local_monthly_budgets, load_local_categorical_budgets)
         transactions_df, monthly_budgets_df, categorical_budgets_df = load_local_database()
 
     return transactions_df, monthly_budgets_df, categorical_budgets_df
 
+# Load the monthly and categorical budgets of the logged-in user concurrently
+def load_budgets(use_remote_db):
+    if use_remote_db:
+        return load_concurrently(load_monthly_budgets, load_categorical_budgets)
+    return load_concurrently(load_local_monthly_budgets, load_local_categorical_budgets)
+
+# Total budget of a month for the logged-in user, None if no budget is set for that month
+def load_monthly_budget(use_remote_db, year, month):
+    monthly_budgets_df = load_monthly_budgets() if use_remote_db else load_local_monthly_budgets(['budgetmonth', 'totalbudget'])
+
+    # Monthly budgets are stored on the first day of their month
+    budget_month = pd.Timestamp(year=year, month=month, day=1)
+    budgets = monthly_budgets_df.loc[monthly_budgets_df['budgetmonth'] == budget_month, 'totalbudget']
+    return float(budgets.iloc[0]) if not budgets.empty else None
+
 def load_remote_database():
     transactions_df = load_transactions()
     monthly_budgets_df = load_monthly_budgets()
@@ -60,28 +338,58 @@ def load_local_database():
 
     return transactions_df, monthly_budgets_df, categorical_budgets_df
 
+# ------------------------------------------------------------------------------
+# Load a single month of the logged-in user's transactions
+
+def load_month_transactions(use_remote_db, year, month, columns=None):
+    if use_remote_db:
+        return month_transactions(global_engine, userid(), year, month, columns)
+    return read_month('transactions', userid(), year, month, columns)
+
+# Load one page of the transactions table for a month of the logged-in user, and the number of
+# matching transactions (conditions and sort as parsed in transactions_table.py)
+def load_month_transactions_page(use_remote_db, year, month, conditions, sort, offset, limit):
+    if use_remote_db:
+        return month_transactions_page(global_engine, userid(), year, month, conditions, sort, offset, limit)
+    month_df = read_month('transactions', userid(), year, month)
+    return local_transactions_page(month_df, conditions, sort, offset, limit)
+
+# Load the spending rollups (per day and category) of a month for the logged-in user
+def load_month_rollups(use_remote_db, year, month):
+    if use_remote_db:
+        return read_remote_month_rollups(global_engine, userid(), year, month)
+    return read_local_month_rollups(userid(), year, month)
+
+# Date of the logged-in user's most recent transaction, or None if there are none
+def load_latest_transaction_date(use_remote_db):
+    if use_remote_db:
+        return latest_transaction_date(global_engine, userid())
+
+    dates = load_local_transactions(['date'])['date']
+    return dates.max() if not dates.empty else None
+
+# Slice the rows of a month out of a frame sorted by date, without scanning the whole column
+def month_slice(df, year, month, column='date'):
+    start, end = month_bounds(year, month)
+    lo, hi = df[column].searchsorted([start, end])
+    return df.iloc[lo:hi]
+
 # ------------------------------------------------------------------------------
 # Load specific data from the remote database
 
-@cache.memoize()
+@user_memoize(tables=['transactions'])
 def load_transactions():
-    query = f"SELECT * FROM Transactions WHERE userid = {userid()};"
-    df = pd.read_sql(query, global_engine, parse_dates=['date'])
-    return df
+    return user_transactions(global_engine, userid())
 
-@cache.memoize()
+@user_memoize(tables=['monthlybudgets'])
 def load_monthly_budgets():
-    query = f"SELECT * FROM MonthlyBudgets WHERE userid = {userid()};"
-    df = pd.read_sql(query, global_engine, parse_dates=['budgetmonth'])
-    return df
+    return user_monthly_budgets(global_engine, userid())
 
-@cache.memoize()
+@user_memoize(tables=['categoricalbudgets'])
 def load_categorical_budgets():
-    query = f"SELECT * FROM CategoricalBudgets WHERE userid = {userid()};"
-    df = pd.read_sql(query, global_engine)
-    return df
+    return user_categorical_budgets(global_engine, userid())
 
-@cache.memoize()
+@user_memoize(per_user=False, tables=['categories'])
 def load_categories():
     df = pd.read_sql("SELECT * FROM Categories;", global_engine)
     return df
@@ -93,67 +401,97 @@ def load_users():
 # ------------------------------------------------------------------------------
 # Load specific data from the local database
 
-def load_local_transactions():
-    return pd.read_csv('./localdb/transactions.csv', parse_dates=['date'])
+# Transactions and budgets are partitioned by user, so only the logged-in user's rows are read
+def load_local_transactions(columns=None):
+    return read_table('transactions', columns, userid())
 
-def load_local_monthly_budgets():
-    return pd.read_csv('./localdb/monthlybudgets.csv', parse_dates=['budgetmonth'])
+def load_local_monthly_budgets(columns=None):
+    return read_table('monthlybudgets', columns, userid())
 
-def load_local_categorical_budgets():
-    return pd.read_csv('./localdb/categoricalbudgets.csv')
+def load_local_categorical_budgets(columns=None):
+    return read_table('categoricalbudgets', columns, userid())
 
-def load_local_categories():
-    return pd.read_csv('./localdb/categories.csv')
+def load_local_categories(columns=None):
+    return read_table('categories', columns)
 
-def load_local_users():
-    return pd.read_csv('./localdb/users.csv')
+def load_local_users(columns=None):
+    return read_table('users', columns)
 
 # ------------------------------------------------------------------------------
 # Save data to the local database
 
+# Transactions and budgets replace only the logged-in user's partition
 def save_local_transactions(transactions_df):
-    transactions_df.to_csv('./localdb/transactions.csv', index=False)
+    write_table('transactions', transactions_df, userid())
+    rebuild_local_rollups(userid()) # The whole partition changed, so recompute its rollups
+    invalidate('transactions')
 
 def save_local_monthly_budgets(monthly_budgets_df):
-    monthly_budgets_df.to_csv('./localdb/monthlybudgets.csv', index=False)
+    write_table('monthlybudgets', monthly_budgets_df, userid())
+    invalidate('monthlybudgets')
 
 def save_local_categorical_budgets(categorical_budgets_df):
-    categorical_budgets_df.to_csv('./localdb/categoricalbudgets.csv', index=False)
+    write_table('categoricalbudgets', categorical_budgets_df, userid())
+    invalidate('categoricalbudgets')
 
 def save_local_categories(categories_df):
-    categories_df.to_csv('./localdb/categories.csv', index=False)
+    write_table('categories', categories_df)
+    invalidate('categories')
 
 def save_local_users(users_df):
-    users_df.to_csv('./localdb/users.csv', index=False)
-
-# ------------------------------------------------------------------------------
-# Save and update data to the remote database
-
-def get_max_id(table_name, id_column):
-    metadata = MetaData()
-    metadata.reflect(bind=global_engine)
-    table = Table(table_name, metadata, autoload_with=global_engine)
+    write_table('users', users_df)
+
+# Sets the logged-in user's budget of a month in place, adding it if the month has none
+def upsert_local_monthly_budget(budgetmonth, totalbudget):
+    row = {'userid': userid(), 'budgetmonth': pd.Timestamp(budgetmonth), 'totalbudget': totalbudget}
+    budgetid = upsert_row('monthlybudgets', row, ['userid', 'budgetmonth'])
+    invalidate('monthlybudgets', [budgetmonth])
+    return budgetid
+
+def delete_local_monthly_budget(budgetmonth):
+    deleted = delete_rows('monthlybudgets', {'userid': userid(), 'budgetmonth': pd.Timestamp(budgetmonth)})
+    invalidate('monthlybudgets', [budgetmonth])
+    return deleted
+
+# Sets the logged-in user's budget of a category in place, adding it if the category has none
+def upsert_local_categorical_budget(categoryname, categorybudget):
+    row = {'userid': userid(), 'categoryname': categoryname, 'categorybudget': categorybudget}
+    catbudgetid = upsert_row('categoricalbudgets', row, ['userid', 'categoryname'])
+    invalidate('categoricalbudgets')
+    return catbudgetid
+
+# Appends a single transaction to the local transaction log and the rollups, and returns its new ID
+def append_local_transaction(new_transaction):
+    try:
+        return append_transactions_and_rollups([new_transaction])[0]
+    finally:
+        invalidate_transactions([new_transaction])
 
-    stmt = select(func.max(table.c[id_column]))
-    max_id = 0
+# Appends many transactions to the local transaction log in one write per user and returns their new IDs
+def append_local_transactions(transactions):
+    records = transaction_records(transactions)
+    if not records:
+        return []
 
     try:
-        with global_engine.connect() as conn:
-            result = conn.execute(stmt).scalar()
-            if result is not None:
-                max_id = result
-    except Exception as e:
-        print(f"Error fetching max {id_column}:", e)
+        return append_transactions_and_rollups(records)
+    finally:
+        invalidate_transactions(records)
 
-    return max_id
+# Returns the next free ID of a local table, from the process's reserved block of IDs
+def next_local_id(table):
+    return allocate_id(table)
+
+# ------------------------------------------------------------------------------
+# Save and update data to the remote database
 
 # Ensure all values are native Python types for insertion into the database
 def convert_to_native_types(data):
     for key, value in data.items():
         if key == 'date':
-            # Ensure date is in the correct format
-            if isinstance(value, pd.Timestamp) or isinstance(value, datetime):
-                data[key] = value.strftime('%Y-%m-%d')
+            # Ensure date is a date without time (accepted by both PostgreSQL and SQLite date columns)
+            if isinstance(value, (pd.Timestamp, datetime, str)):
+                data[key] = pd.Timestamp(value).date()
         elif key == 'amount':
             # Ensure amount is a float with two decimal places
             if isinstance(value, (float, np.float64, int, np.int64)):
@@ -164,47 +502,92 @@ def convert_to_native_types(data):
             data[key] = float(value)
     return data
 
+# New rows get their IDs from the SERIAL sequences, returned by the insert itself
 def save_transactions(new_transaction):
-    metadata = MetaData()
-    metadata.reflect(bind=global_engine)
-    transactions_table = Table('transactions', metadata, autoload_with=global_engine) # Load the table schema from the database
+    transactions_table = get_table('transactions') # Load the cached table schema
     
     new_transaction = convert_to_native_types(new_transaction) # Ensure all values are native Python types
-    stmt = transactions_table.insert().values(new_transaction) # Create an insert statement
+    new_transaction.pop('transactionid', None)
+    stmt = transactions_table.insert().values(new_transaction).returning(transactions_table.c.transactionid) # Create an insert statement
     
     try:
         with global_engine.connect() as conn:
             conn.begin()
-            conn.execute(stmt)
+            transactionid = conn.execute(stmt).scalar()
+            add_remote_rollups(conn, pd.DataFrame([new_transaction])) # Update the spending rollups in the same transaction
             conn.commit()
+
+            invalidate_transactions([new_transaction])
             print("Transaction inserted successfully.")
+            return transactionid
     except Exception as e:
         print("Error inserting transaction:", e)
 
+# ------------------------------------------------------------------------------
+# Bulk inserts, used by seeding, imports and recurring entries
+
+BULK_BATCH_SIZE = 1000
+
+# Native-typed transaction records from a DataFrame or an iterable of dicts, without their IDs
+def transaction_records(transactions):
+    if isinstance(transactions, pd.DataFrame):
+        # Empty cells (NaN, NaT) are inserted as NULL, not as NaN floats in text columns
+        transactions = transactions.astype(object).where(transactions.notna(), None).to_dict('records')
+
+    records = [convert_to_native_types(dict(transaction)) for transaction in transactions]
+    for record in records:
+        record.pop('transactionid', None) # IDs are generated by the database or the local store
+    return records
+
+# Inserts many transactions in one database transaction, batched into executemany statements,
+# and returns the generated transaction IDs in the same order (an empty list on error)
+def save_transactions_bulk(transactions, batch_size=BULK_BATCH_SIZE):
+    records = transaction_records(transactions)
+    if not records:
+        return []
+
+    transactions_table = get_table('transactions')
+    stmt = transactions_table.insert().returning(transactions_table.c.transactionid, sort_by_parameter_order=True)
+
+    transactionids = []
+    try:
+        with global_engine.begin() as conn:
+            for start in range(0, len(records), batch_size):
+                result = conn.execute(stmt, records[start:start + batch_size])
+                transactionids.extend(result.scalars().all())
+
+            add_remote_rollups(conn, pd.DataFrame(records)) # Update the spending rollups in the same transaction
+
+        invalidate_transactions(records)
+        print(f"{len(records)} transactions inserted successfully.")
+    except Exception as e:
+        print("Error inserting transactions:", e)
+        return []
+
+    return transactionids
+
 def save_monthly_budgets(new_monthly_budget):
-    metadata = MetaData()
-    metadata.reflect(bind=global_engine)
-    monthly_budgets_table = Table('monthlybudgets', metadata, autoload_with=global_engine) # Load the table schema from the database
+    monthly_budgets_table = get_table('monthlybudgets') # Load the cached table schema
 
     # Create an insert statement
     new_monthly_budget = convert_to_native_types(new_monthly_budget)
-    stmt = monthly_budgets_table.insert().values(new_monthly_budget)
+    new_monthly_budget.pop('budgetid', None)
+    stmt = monthly_budgets_table.insert().values(new_monthly_budget).returning(monthly_budgets_table.c.budgetid)
 
     try:
         with global_engine.connect() as conn:
             conn.begin()
-            conn.execute(stmt)
+            budgetid = conn.execute(stmt).scalar()
             conn.commit()
 
-            cache.clear()
+            invalidate('monthlybudgets', [new_monthly_budget['budgetmonth']], new_monthly_budget['userid'])
             print("Monthly budget inserted successfully.")
+            return budgetid
     except Exception as e:
         print("Error inserting monthly budget:", e)
 
 def update_monthly_budget(userid, budgetmonth, totalbudget):
-    metadata = MetaData()
-    metadata.reflect(bind=global_engine)
-    monthly_budgets_table = Table('monthlybudgets', metadata, autoload_with=global_engine)
+    monthly_budgets_table = get_table('monthlybudgets')
     
     # Create an update statement
     stmt = (
@@ -222,35 +605,33 @@ def update_monthly_budget(userid, budgetmonth, totalbudget):
             conn.execute(stmt)
             conn.commit()
 
-            cache.clear()
+            invalidate('monthlybudgets', [budgetmonth], userid)
             print("Total budget updated successfully!")
     except Exception as e:
         print("Error updating total budget:", e)
 
 def save_categorical_budgets(new_category_budget_row):
-    metadata = MetaData()
-    metadata.reflect(bind=global_engine)
-    categorical_budgets_table = Table('categoricalbudgets', metadata, autoload_with=global_engine) # Load the table schema from the database
+    categorical_budgets_table = get_table('categoricalbudgets') # Load the cached table schema
 
     # Create an insert statement
     new_category_budget_row = convert_to_native_types(new_category_budget_row)
-    stmt = categorical_budgets_table.insert().values(new_category_budget_row)
+    new_category_budget_row.pop('catbudgetid', None)
+    stmt = categorical_budgets_table.insert().values(new_category_budget_row).returning(categorical_budgets_table.c.catbudgetid)
 
     try:
         with global_engine.connect() as conn:
             conn.begin()
-            conn.execute(stmt)
+            catbudgetid = conn.execute(stmt).scalar()
             conn.commit()
 
-            cache.clear()
+            invalidate('categoricalbudgets', user_id=new_category_budget_row['userid'])
             print("Categorical budgets inserted successfully.")
+            return catbudgetid
     except Exception as e:
         print("Error inserting categorical budgets:", e)
 
 def update_categorical_budget(userid, categoryname, new_category_budget):
-    metadata = MetaData()
-    metadata.reflect(bind=global_engine)
-    categorical_budgets_table = Table('categoricalbudgets', metadata, autoload_with=global_engine)
+    categorical_budgets_table = get_table('categoricalbudgets')
     
     # Create an update statement using SQLAlchemy's expression language
     stmt = (
@@ -268,11 +649,71 @@ def update_categorical_budget(userid, categoryname, new_category_budget):
             conn.execute(stmt)
             conn.commit()
 
-            cache.clear()
+            invalidate('categoricalbudgets', user_id=userid)
             print("Category budget updated successfully!")
     except Exception as e:
         print("Error updating category budget:", e)
 
+# ------------------------------------------------------------------------------
+# Budget upserts, a single statement that inserts the budget or updates the existing one
+# (relies on the unique constraints on (userid, budgetmonth) and (userid, categoryname), see setup.sql)
+
+UPSERT_MONTHLY_BUDGET_SQL = text("""
+    INSERT INTO MonthlyBudgets (userid, budgetmonth, totalbudget)
+    VALUES (:userid, :budgetmonth, :totalbudget)
+    ON CONFLICT (userid, budgetmonth) DO UPDATE SET totalbudget = EXCLUDED.totalbudget
+    RETURNING budgetid
+""")
+
+DELETE_MONTHLY_BUDGET_SQL = text("DELETE FROM MonthlyBudgets WHERE userid = :userid AND budgetmonth = :budgetmonth")
+
+UPSERT_CATEGORICAL_BUDGET_SQL = text("""
+    INSERT INTO CategoricalBudgets (userid, categoryname, categorybudget)
+    VALUES (:userid, :categoryname, :categorybudget)
+    ON CONFLICT (userid, categoryname) DO UPDATE SET categorybudget = EXCLUDED.categorybudget
+    RETURNING catbudgetid
+""")
+
+# Inserts or updates a monthly budget and returns its ID (None on error)
+def upsert_monthly_budget(userid, budgetmonth, totalbudget):
+    params = {'userid': int(userid), 'budgetmonth': pd.Timestamp(budgetmonth).date(), 'totalbudget': float(totalbudget)}
+
+    try:
+        with global_engine.begin() as conn:
+            budgetid = conn.execute(UPSERT_MONTHLY_BUDGET_SQL, params).scalar()
+
+        invalidate('monthlybudgets', [budgetmonth], userid)
+        print("Total budget saved successfully!")
+        return budgetid
+    except Exception as e:
+        print("Error saving total budget:", e)
+
+def delete_monthly_budget(userid, budgetmonth):
+    params = {'userid': int(userid), 'budgetmonth': pd.Timestamp(budgetmonth).date()}
+
+    try:
+        with global_engine.begin() as conn:
+            conn.execute(DELETE_MONTHLY_BUDGET_SQL, params)
+
+        invalidate('monthlybudgets', [budgetmonth], userid)
+        print("Total budget removed successfully!")
+    except Exception as e:
+        print("Error removing total budget:", e)
+
+# Inserts or updates a category budget and returns its ID (None on error)
+def upsert_categorical_budget(userid, categoryname, categorybudget):
+    params = {'userid': int(userid), 'categoryname': categoryname, 'categorybudget': float(categorybudget)}
+
+    try:
+        with global_engine.begin() as conn:
+            catbudgetid = conn.execute(UPSERT_CATEGORICAL_BUDGET_SQL, params).scalar()
+
+        invalidate('categoricalbudgets', user_id=userid)
+        print("Category budget saved successfully!")
+        return catbudgetid
+    except Exception as e:
+        print("Error saving category budget:", e)
+
 # ------------------------------------------------------------------------------
 # Print the dataframes
 
@@ -327,6 +768,7 @@ def setup_logging(server, enable_logging):
         @server.after_request
         def after_request(response):
             logging.debug(f"Session data after request: {dict(session)}")
+            logging.debug(f"Database pool after request: {database_pool_stats()}")
             return response
     
     else:
@@ -0,0 +1,720 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl, file locking is skipped there
+    fcntl = None
+
+# ------------------------------------------------------------------------------
+# Local columnar store
+#
+# The local database is kept as Parquet files under ./localdb/store.
+# Columns are typed (dates are stored as timestamps), so reads skip the text parsing
+# of the CSV files and can project only the columns they need. The CSV files in
+# ./localdb remain the import/export format for the store.
+#
+# Tables in LOGGED_TABLES also have an append-only log next to their snapshot. Inserts
+# append one JSON line to the log instead of rewriting the snapshot, readers merge the
+# snapshot with the log, and compaction folds the log back into the snapshot. The log rows
+# of SUMMED_TABLES are deltas, added to the row with the same key when merged.
+#
+# Tables in MONTH_INDEXED_TABLES keep their snapshots sorted by month with one Parquet row
+# group per month. A month index from "YYYY-MM" to the row group and its row range is
+# stored in the snapshot's own metadata, so reading a month only decodes that month.
+
+LOCAL_DB_DIR = './localdb'
+STORE_DIR = os.path.join(LOCAL_DB_DIR, 'store')
+
+# Column types for every local table, in the same order as the CSV headers
+TABLE_SCHEMAS = {
+    'transactions': {
+        'transactionid': 'int64',
+        'userid': 'int64',
+        'date': 'datetime64[ns]',
+        'categoryname': 'object',
+        'amount': 'float64',
+        'description': 'object'
+    },
+    'monthlybudgets': {
+        'budgetid': 'int64',
+        'userid': 'int64',
+        'totalbudget': 'float64',
+        'budgetmonth': 'datetime64[ns]'
+    },
+    'categoricalbudgets': {
+        'catbudgetid': 'int64',
+        'userid': 'int64',
+        'categoryname': 'object',
+        'categorybudget': 'float64'
+    },
+    'categories': {
+        'name': 'object'
+    },
+    'users': {
+        'userid': 'int64',
+        'name': 'object',
+        'email': 'object',
+        'password': 'object'
+    },
+    'spendingrollups': {
+        'userid': 'int64',
+        'year': 'int64',
+        'month': 'int64',
+        'day': 'int64',
+        'categoryname': 'object',
+        'total': 'float64',
+        'count': 'int64'
+    }
+}
+
+# Tables stored as one partition per user, so a request only reads and writes the rows of
+# its own user. The manifest lists the partitions of each table and the last ID handed out.
+PARTITIONED_TABLES = ['transactions', 'monthlybudgets', 'categoricalbudgets', 'spendingrollups']
+
+# Tables computed from other tables, which are not imported from or exported to CSV
+DERIVED_TABLES = ['spendingrollups']
+
+# ID column of every table with generated IDs
+ID_COLUMNS = {
+    'transactions': 'transactionid',
+    'monthlybudgets': 'budgetid',
+    'categoricalbudgets': 'catbudgetid',
+    'users': 'userid'
+}
+
+# Tables whose inserts go through the append-only log
+LOGGED_TABLES = ['transactions', 'spendingrollups']
+
+# Logged tables whose rows are summed by key: their key columns (the other columns are summed)
+SUMMED_TABLES = {'spendingrollups': ['userid', 'year', 'month', 'day', 'categoryname']}
+
+# Tables with a month index, and the date column the index is built on (or its year and month columns)
+MONTH_INDEXED_TABLES = {'transactions': 'date', 'spendingrollups': ('year', 'month')}
+MONTH_INDEX_KEY = b'budgetr.month_index'
+
+# Size of a log (in bytes) after which an insert schedules a background compaction
+LOG_COMPACTION_BYTES = 256 * 1024
+
+# Smaller for the rollups: their log is read with every month of the dashboard, and their
+# compaction only rewrites the rollups
+TABLE_LOG_COMPACTION_BYTES = {'spendingrollups': 16 * 1024}
+
+# ------------------------------------------------------------------------------
+# File paths
+#   Unpartitioned tables: store/<table>.parquet
+#   Partitioned tables:   store/<table>/user_<userid>.parquet (+ .log and .lock)
+
+def csv_path(table):
+    return os.path.join(LOCAL_DB_DIR, f'{table}.csv')
+
+def partition_name(table, user_id=None):
+    if user_id is None:
+        return os.path.join(STORE_DIR, table)
+    return os.path.join(STORE_DIR, table, f'user_{int(user_id)}')
+
+def store_path(table, user_id=None):
+    return partition_name(table, user_id) + '.parquet'
+
+def log_path(table, user_id=None):
+    return partition_name(table, user_id) + '.log'
+
+def lock_path(table, user_id=None):
+    return partition_name(table, user_id) + '.lock'
+
+def manifest_path():
+    return os.path.join(STORE_DIR, 'manifest.json')
+
+# ------------------------------------------------------------------------------
+# Cross-process locking
+#   Writers take the exclusive lock, readers take the shared lock
+
+@contextmanager
+def file_lock(path, shared=False):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def partition_lock(table, user_id=None, shared=False):
+    return file_lock(lock_path(table, user_id), shared)
+
+# ------------------------------------------------------------------------------
+# Manifest
+#   {"transactions": {"last_id": 213, "partitions": {"1": {"rows": 120}, ...}}, ...}
+#   The row counts and last IDs are those of the snapshots, rows in the logs are counted on compaction
+
+def read_manifest():
+    if not os.path.exists(manifest_path()):
+        return {}
+    with open(manifest_path()) as manifest_file:
+        return json.load(manifest_file)
+
+# Apply a change to the manifest under its lock and return whatever the change returns
+def update_manifest(change):
+    with file_lock(os.path.join(STORE_DIR, 'manifest.lock')):
+        manifest = read_manifest()
+        result = change(manifest)
+
+        tmp_path = manifest_path() + '.tmp'
+        with open(tmp_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(tmp_path, manifest_path())
+
+    return result
+
+def is_partitioned(table):
+    return table in read_manifest()
+
+def table_partitions(table):
+    return [int(user_id) for user_id in read_manifest().get(table, {}).get('partitions', {})]
+
+# Record the row count of a partition and raise the last ID of the table if needed
+def record_partition(table, user_id, rows, max_id=0):
+    def change(manifest):
+        entry = manifest.setdefault(table, {'last_id': 0, 'partitions': {}})
+        entry['partitions'][str(int(user_id))] = {'rows': int(rows)}
+        entry['last_id'] = max(entry['last_id'], int(max_id))
+    update_manifest(change)
+
+# Add an empty partition for a user the first time rows are appended for them
+def register_partition(table, user_id):
+    if int(user_id) in table_partitions(table):
+        return
+
+    def change(manifest):
+        entry = manifest.setdefault(table, {'last_id': 0, 'partitions': {}})
+        entry['partitions'].setdefault(str(int(user_id)), {'rows': 0})
+    update_manifest(change)
+
+# ------------------------------------------------------------------------------
+# ID allocation
+#   The next free ID of each table is kept in a counter file (store/ids.json). A process reserves
+#   ID_BLOCK_SIZE IDs at a time under the counter file's lock and hands them out from memory, so
+#   workers never give out the same ID and most inserts touch no file at all.
+#   IDs left in a block when a process exits are never used.
+
+ID_BLOCK_SIZE = 100
+
+id_blocks = {} # table -> (next ID, end of the block, process that reserved it)
+id_blocks_lock = threading.Lock()
+
+def counters_path():
+    return os.path.join(STORE_DIR, 'ids.json')
+
+def read_counters():
+    if not os.path.exists(counters_path()):
+        return {}
+    with open(counters_path()) as counters_file:
+        return json.load(counters_file)
+
+# Highest ID already stored in a table, so that reserved blocks always start above it
+def stored_max_id(table):
+    entry = read_manifest().get(table)
+    if entry is not None:
+        return entry['last_id']
+
+    id_column = ID_COLUMNS[table]
+    ids = read_table(table, [id_column])[id_column]
+    return int(ids.max()) if not ids.empty else 0
+
+# Reserve the next block of at least `count` IDs in the counter file and return its bounds
+def reserve_id_block(table, count):
+    size = max(count, ID_BLOCK_SIZE)
+    os.makedirs(STORE_DIR, exist_ok=True)
+
+    with file_lock(os.path.join(STORE_DIR, 'ids.lock')):
+        counters = read_counters()
+        first_id = max(counters.get(table, 1), stored_max_id(table) + 1)
+        counters[table] = first_id + size
+
+        tmp_path = counters_path() + '.tmp'
+        with open(tmp_path, 'w') as counters_file:
+            json.dump(counters, counters_file, indent=2)
+        os.replace(tmp_path, counters_path())
+
+    return first_id, first_id + size
+
+# Hand out the next ID of a table
+def allocate_id(table):
+    return allocate_ids(table, 1)[0]
+
+# Hand out `count` consecutive IDs of a table
+def allocate_ids(table, count):
+    with id_blocks_lock:
+        next_id, end_id, pid = id_blocks.get(table, (0, 0, None))
+
+        # Blocks are not shared with forked workers, which reserve their own
+        if pid != os.getpid() or end_id - next_id < count:
+            next_id, end_id = reserve_id_block(table, count)
+
+        id_blocks[table] = (next_id + count, end_id, os.getpid())
+
+    return list(range(next_id, next_id + count))
+
+# Partition a table on first write if it is still only available as a CSV file
+def ensure_partitioned(table):
+    if table not in PARTITIONED_TABLES or is_partitioned(table):
+        return
+
+    with file_lock(os.path.join(STORE_DIR, 'migrate.lock')):
+        if not is_partitioned(table):
+            if os.path.exists(csv_path(table)):
+                import_csv(table)
+            else:
+                write_table(table, empty_table(table))
+
+# ------------------------------------------------------------------------------
+# Typing helpers
+
+def date_columns(table):
+    return [column for column, dtype in TABLE_SCHEMAS[table].items() if dtype.startswith('datetime')]
+
+# Cast a DataFrame to the column types of the table schema
+def apply_schema(table, df):
+    schema = TABLE_SCHEMAS[table]
+    df = df[[column for column in schema if column in df.columns]].copy()
+
+    for column in df.columns:
+        dtype = schema[column]
+        if dtype.startswith('datetime'):
+            df[column] = pd.to_datetime(df[column], format='mixed')
+        elif dtype != 'object':
+            df[column] = df[column].astype(dtype)
+
+    return df
+
+def empty_table(table, columns=None):
+    df = apply_schema(table, pd.DataFrame(columns=list(TABLE_SCHEMAS[table])))
+    return df[columns] if columns is not None else df
+
+# Sum the rows of a summed table that have the same key (snapshot rows and logged deltas)
+#   Snapshot rows have distinct keys, so there is nothing to sum without log rows
+def fold_rows(table, df, log_df):
+    keys = SUMMED_TABLES.get(table)
+    if keys is None or log_df.empty or not set(keys) <= set(df.columns):
+        return df
+
+    values = [column for column in df.columns if column not in keys]
+    return df.groupby(keys, as_index=False, sort=False)[values].sum()
+
+def concat_frames(table, frames, columns=None):
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return empty_table(table, columns)
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+# ------------------------------------------------------------------------------
+# Read and write tables
+
+# Read a table from the store, only loading the requested columns
+# For partitioned tables, passing a user ID reads that user's partition only
+# Falls back to the CSV file if the table has not been migrated yet
+def read_table(table, columns=None, user_id=None):
+    if table not in PARTITIONED_TABLES:
+        return read_snapshot(table, columns=columns)
+
+    if not is_partitioned(table):
+        df = apply_schema(table, pd.read_csv(csv_path(table)))
+        if user_id is not None:
+            df = df[df['userid'] == user_id].reset_index(drop=True)
+        return df[columns] if columns is not None else df
+
+    user_ids = [user_id] if user_id is not None else table_partitions(table)
+    return concat_frames(table, [read_partition(table, uid, columns) for uid in user_ids], columns)
+
+# Read one user's partition, merging its snapshot with its log
+def read_partition(table, user_id, columns=None):
+    if user_id not in table_partitions(table):
+        return empty_table(table, columns)
+
+    with partition_lock(table, user_id, shared=True):
+        df = read_snapshot(table, user_id, columns)
+        if table not in LOGGED_TABLES or not os.path.exists(log_path(table, user_id)):
+            return df
+        log_df = read_log(table, user_id, columns)
+
+    return fold_rows(table, concat_frames(table, [df, log_df], columns), log_df)
+
+def read_snapshot(table, user_id=None, columns=None):
+    if os.path.exists(store_path(table, user_id)):
+        return pd.read_parquet(store_path(table, user_id), columns=columns)
+
+    if user_id is not None:
+        return empty_table(table, columns)
+
+    df = pd.read_csv(csv_path(table), usecols=columns)
+    return apply_schema(table, df)
+
+snapshot_row_counts = {} # path -> ((mtime, size), rows)
+
+# Number of rows of a snapshot from its footer, kept until the snapshot is replaced
+def snapshot_row_count(path):
+    if not os.path.exists(path):
+        return 0
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = snapshot_row_counts.get(path)
+    if cached is None or cached[0] != version:
+        cached = snapshot_row_counts[path] = (version, pq.ParquetFile(path).metadata.num_rows)
+    return cached[1]
+
+# Number of rows of a user's partition, from its snapshot's footer and its log, without loading them
+def partition_row_count(table, user_id):
+    if user_id not in table_partitions(table):
+        return 0
+
+    with partition_lock(table, user_id, shared=True):
+        rows = snapshot_row_count(store_path(table, user_id))
+        if table in LOGGED_TABLES and os.path.exists(log_path(table, user_id)):
+            with open(log_path(table, user_id)) as log_file:
+                rows += sum(1 for line in log_file if line.strip())
+    return rows
+
+# Read the rows appended since the last compaction
+def read_log(table, user_id=None, columns=None):
+    rows = []
+    if os.path.exists(log_path(table, user_id)):
+        with open(log_path(table, user_id)) as log_file:
+            rows = [json.loads(line) for line in log_file if line.strip()]
+
+    df = apply_schema(table, pd.DataFrame(rows, columns=list(TABLE_SCHEMAS[table])))
+    return df[columns] if columns is not None else df
+
+# Write a table to the store
+# For partitioned tables, passing a user ID replaces only that user's partition,
+# otherwise the rows are split by user and every partition is replaced
+def write_table(table, df, user_id=None):
+    if table not in PARTITIONED_TABLES:
+        write_snapshot(table, df)
+        return
+
+    if user_id is not None:
+        ensure_partitioned(table)
+        write_partition(table, user_id, df)
+        return
+
+    # Drop the partitions of users that no longer have any rows
+    for uid in set(table_partitions(table)) - set(df['userid'].unique()):
+        write_partition(table, uid, empty_table(table))
+
+    for uid, user_df in df.groupby('userid'):
+        write_partition(table, uid, user_df)
+
+    # Tables without any rows are still marked as migrated
+    if df.empty:
+        update_manifest(lambda manifest: manifest.setdefault(table, {'last_id': 0, 'partitions': {}}))
+
+def write_partition(table, user_id, df):
+    id_column = ID_COLUMNS.get(table)
+    max_id = df[id_column].max() if id_column and not df.empty else 0
+
+    with partition_lock(table, user_id):
+        write_snapshot(table, df, user_id)
+        clear_log(table, user_id)
+    record_partition(table, user_id, len(df), max_id)
+
+# Read-modify-write a user's partition under its lock, so concurrent updates are not lost
+def modify_partition(table, user_id, change):
+    ensure_partitioned(table)
+
+    with partition_lock(table, user_id):
+        df = read_snapshot(table, user_id)
+        if table in LOGGED_TABLES:
+            log_df = read_log(table, user_id)
+            df = fold_rows(table, concat_frames(table, [df, log_df]), log_df)
+
+        df = change(df)
+        write_snapshot(table, df, user_id)
+        clear_log(table, user_id)
+
+    id_column = ID_COLUMNS.get(table)
+    record_partition(table, user_id, len(df), df[id_column].max() if id_column and not df.empty else 0)
+    return df
+
+# Replace the snapshot file atomically so readers never see a partial write
+def write_snapshot(table, df, user_id=None):
+    os.makedirs(os.path.dirname(store_path(table, user_id)), exist_ok=True)
+    df = apply_schema(table, df)
+
+    tmp_path = store_path(table, user_id) + '.tmp'
+    if table in MONTH_INDEXED_TABLES:
+        write_month_indexed(table, df, tmp_path)
+    else:
+        df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, store_path(table, user_id))
+
+def clear_log(table, user_id=None):
+    if os.path.exists(log_path(table, user_id)):
+        os.remove(log_path(table, user_id))
+
+# ------------------------------------------------------------------------------
+# Keyed updates, the local equivalent of INSERT ... ON CONFLICT DO UPDATE
+
+# Rows of a frame whose key columns equal the given values
+def key_mask(df, key):
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in key.items():
+        mask &= (df[column] == value).to_numpy()
+    return mask
+
+# Update the row of the user's partition that has the same key columns in place,
+# or append it with a new ID if there is none, and return the row's ID
+def upsert_row(table, row, key_columns):
+    row = dict(row)
+    user_id = int(row['userid'])
+    id_column = ID_COLUMNS[table]
+    key = {column: row[column] for column in key_columns}
+
+    def change(df):
+        mask = key_mask(df, key)
+        if mask.any():
+            for column, value in row.items():
+                if column != id_column:
+                    df.loc[mask, column] = value
+            return df
+
+        row[id_column] = allocate_id(table)
+        return concat_frames(table, [df, apply_schema(table, pd.DataFrame([row]))])
+
+    df = modify_partition(table, user_id, change)
+    return int(df.loc[key_mask(df, key), id_column].iloc[0])
+
+# Delete the rows of the user's partition that have the given key columns, and return how many were deleted
+def delete_rows(table, key):
+    deleted = []
+
+    def change(df):
+        mask = key_mask(df, key)
+        deleted.append(int(mask.sum()))
+        return df[~mask]
+
+    modify_partition(table, int(key['userid']), change)
+    return deleted[0]
+
+# ------------------------------------------------------------------------------
+# Month index
+
+def month_key(year, month):
+    return f'{int(year):04d}-{int(month):02d}'
+
+# First day of the month and first day of the following month
+def month_bounds(year, month):
+    start = pd.Timestamp(year=int(year), month=int(month), day=1)
+    return start, start + pd.offsets.MonthBegin(1)
+
+# Month number (year * 12 + month - 1) of each row of a month indexed table
+def month_numbers(table, df):
+    column = MONTH_INDEXED_TABLES[table]
+    if isinstance(column, tuple):
+        year, month = column
+        return df[year].to_numpy() * 12 + df[month].to_numpy() - 1
+    return df[column].dt.year.to_numpy() * 12 + df[column].dt.month.to_numpy() - 1
+
+# Map each month of month-sorted rows (their month numbers) to the [start, stop) range of its rows
+def build_month_index(months):
+    values, starts = np.unique(months, return_index=True)
+    stops = np.append(starts[1:], len(months))
+
+    return {
+        month_key(value // 12, value % 12 + 1): [row_group, int(start), int(stop)]
+        for row_group, (value, start, stop) in enumerate(zip(values, starts, stops))
+    }
+
+# Write the rows sorted by month, one row group per month, with the month index in the file metadata
+def write_month_indexed(table, df, path):
+    column = MONTH_INDEXED_TABLES[table]
+    df = df.sort_values(list(column) if isinstance(column, tuple) else column, kind='stable').reset_index(drop=True)
+    month_index = build_month_index(month_numbers(table, df))
+
+    arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(arrow_table.schema.metadata or {})
+    metadata[MONTH_INDEX_KEY] = json.dumps(month_index).encode()
+    arrow_table = arrow_table.replace_schema_metadata(metadata)
+
+    with pq.ParquetWriter(path, arrow_table.schema) as writer:
+        for _, start, stop in month_index.values():
+            writer.write_table(arrow_table.slice(start, stop - start), row_group_size=stop - start)
+
+def read_month_index(parquet_file):
+    metadata = parquet_file.schema_arrow.metadata or {}
+    if MONTH_INDEX_KEY not in metadata:
+        return None
+    return json.loads(metadata[MONTH_INDEX_KEY])
+
+# Read one month of a user's partition: the month's row group from the snapshot plus
+# the matching rows of the log
+def read_month(table, user_id, year, month, columns=None):
+    month_number = int(year) * 12 + int(month) - 1
+
+    if not is_partitioned(table):
+        df = read_table(table, user_id=user_id)
+        df = df[month_numbers(table, df) == month_number].reset_index(drop=True)
+        return df[columns] if columns is not None else df
+
+    if user_id not in table_partitions(table):
+        return empty_table(table, columns)
+
+    with partition_lock(table, user_id, shared=True):
+        df = read_snapshot_month(table, user_id, year, month, columns)
+        if table not in LOGGED_TABLES or not os.path.exists(log_path(table, user_id)):
+            return df
+        log_df = read_log(table, user_id)
+
+    log_df = log_df[month_numbers(table, log_df) == month_number]
+    log_df = log_df[columns] if columns is not None else log_df
+    return fold_rows(table, concat_frames(table, [df, log_df], columns), log_df)
+
+def read_snapshot_month(table, user_id, year, month, columns=None):
+    if not os.path.exists(store_path(table, user_id)):
+        return empty_table(table, columns)
+
+    parquet_file = pq.ParquetFile(store_path(table, user_id))
+    month_index = read_month_index(parquet_file)
+
+    # Snapshots written before the month index existed are filtered in full
+    if month_index is None:
+        df = parquet_file.read().to_pandas()
+        df = df[month_numbers(table, df) == int(year) * 12 + int(month) - 1].reset_index(drop=True)
+        return df[columns] if columns is not None else df
+
+    entry = month_index.get(month_key(year, month))
+    if entry is None:
+        return empty_table(table, columns)
+
+    return parquet_file.read_row_group(entry[0], columns=columns).to_pandas()
+
+# ------------------------------------------------------------------------------
+# Append-only log
+
+# Append a row to the log of its user's partition and return the ID assigned to it
+def append_row(table, row):
+    return append_rows(table, [row])[0]
+
+# Append rows to the logs of their users' partitions with one write per partition,
+# and return the IDs assigned to them in the same order (none for tables without IDs)
+# IDs come from the block allocator, so concurrent workers never hand out the same ID
+def append_rows(table, rows):
+    ensure_partitioned(table)
+
+    rows = [dict(row) for row in rows]
+    id_column = ID_COLUMNS.get(table)
+
+    rows_by_user = {}
+    for row in rows:
+        rows_by_user.setdefault(int(row['userid']), []).append(row)
+
+    for user_id, user_rows in rows_by_user.items():
+        register_partition(table, user_id)
+        if id_column:
+            for row, new_id in zip(user_rows, allocate_ids(table, len(user_rows))):
+                row[id_column] = new_id
+
+        lines = ''.join(json.dumps(row, default=str) + '\n' for row in user_rows)
+        with partition_lock(table, user_id):
+            with open(log_path(table, user_id), 'a') as log_file:
+                log_file.write(lines)
+                log_file.flush()
+                os.fsync(log_file.fileno())
+
+            log_size = os.path.getsize(log_path(table, user_id))
+
+        if log_size >= TABLE_LOG_COMPACTION_BYTES.get(table, LOG_COMPACTION_BYTES):
+            schedule_compaction(table, user_id)
+
+    return [row[id_column] for row in rows] if id_column else []
+
+# ------------------------------------------------------------------------------
+# Compaction
+
+# Fold the log of a partition back into its snapshot
+def compact_partition(table, user_id):
+    with partition_lock(table, user_id):
+        if not os.path.exists(log_path(table, user_id)):
+            return 0
+
+        log_df = read_log(table, user_id)
+        df = fold_rows(table, concat_frames(table, [read_snapshot(table, user_id), log_df]), log_df)
+        write_snapshot(table, df, user_id)
+        clear_log(table, user_id)
+
+    id_column = ID_COLUMNS.get(table)
+    record_partition(table, user_id, len(df), df[id_column].max() if id_column and not df.empty else 0)
+    return len(log_df)
+
+# A single background worker per process, so compactions never run in parallel
+compaction_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='localdb-compaction')
+pending_compactions = set()
+pending_compactions_lock = threading.Lock()
+
+def schedule_compaction(table, user_id):
+    with pending_compactions_lock:
+        if (table, user_id) in pending_compactions:
+            return
+        pending_compactions.add((table, user_id))
+
+    def run():
+        try:
+            rows = compact_partition(table, user_id)
+            print(f"Compacted {table} for user {user_id}: {rows} logged rows folded into the snapshot")
+        except Exception as e:
+            print(f"Error compacting {table} for user {user_id}:", e)
+        finally:
+            with pending_compactions_lock:
+                pending_compactions.discard((table, user_id))
+
+    compaction_executor.submit(run)
+
+def compact_all():
+    for table in LOGGED_TABLES:
+        rows = sum(compact_partition(table, user_id) for user_id in table_partitions(table))
+        print(f"Compacted {table}: {rows} logged rows folded into the snapshots")
+
+# ------------------------------------------------------------------------------
+# CSV import/export
+
+def import_csv(table, path=None):
+    df = pd.read_csv(path or csv_path(table))
+    write_table(table, df)
+    return len(df)
+
+def export_csv(table, path=None):
+    df = read_table(table)
+    if table in PARTITIONED_TABLES:
+        df = df.sort_values(ID_COLUMNS[table])
+
+    # Write dates back in the same format as the original CSV files
+    for column in date_columns(table):
+        df[column] = df[column].dt.strftime('%Y-%m-%d')
+
+    df.to_csv(path or csv_path(table), index=False)
+    return len(df)
+
+# One-shot migration of every CSV file in ./localdb into the store
+def migrate():
+    for table in TABLE_SCHEMAS:
+        if table not in DERIVED_TABLES and os.path.exists(csv_path(table)):
+            rows = import_csv(table)
+            print(f"Migrated {table}: {rows} rows -> {partition_name(table)}")
+
+def export_all():
+    for table in TABLE_SCHEMAS:
+        if table in DERIVED_TABLES:
+            continue
+        if os.path.exists(store_path(table)) or is_partitioned(table):
+            rows = export_csv(table)
+            print(f"Exported {table}: {rows} rows -> {csv_path(table)}")
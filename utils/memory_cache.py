@@ -0,0 +1,166 @@
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+# ------------------------------------------------------------------------------
+# In-process LRU tier of the cache
+#
+# Memoized results are kept in an LRU bounded by their estimated size in bytes, in front of the
+# configured cache backend (see cache_backend.py). A hit in memory skips the backend and the
+# deserialization of the value; a miss falls through to the backend, and a value found there is
+# promoted to memory. Invalidation is unaffected: entry keys contain the versions of their cache
+# tags, which are always read from the backend, so an invalidated entry is simply never looked
+# up again and ages out of the LRU.
+#
+#   CACHE_MEMORY_BYTES  size of the in-process LRU in bytes, 0 to disable it (default 64 MiB)
+#
+# Each worker has its own LRU and its own counters.
+
+def memory_cache_bytes():
+    return int(os.getenv('CACHE_MEMORY_BYTES', 64 * 1024 * 1024))
+
+# ------------------------------------------------------------------------------
+# Size estimates
+#   Frames and arrays report their buffers, figures and Dash components are measured through their
+#   plain dicts, containers are summed. Shared objects are counted once per value.
+#
+#   Module constants that cached values reference (e.g. the template of the dashboard figures) are
+#   in memory anyway: registered with share_value(), they are neither counted nor walked.
+
+shared_values = {}
+
+def share_value(value):
+    shared_values[id(value)] = value # Keeps the value, and so its id, alive
+    return value
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+def estimate_size(value, seen=None):
+    # Scalars first: the leaves of figures and table rows, too small to be worth deduplicating
+    if type(value) in SCALAR_TYPES:
+        return sys.getsizeof(value)
+
+    seen = set() if seen is None else seen
+    if id(value) in seen or id(value) in shared_values:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, BaseFigure):
+        return estimate_size(value.to_plotly_json(), seen)
+    if hasattr(value, 'to_plotly_json'): # Dash components
+        return estimate_size(value.to_plotly_json(), seen)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item, seen) for item in value)
+    return sys.getsizeof(value)
+
+# Frames are copied on every hit, as callers modify the frames they load
+def fresh_copy(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(fresh_copy(item) for item in value)
+    if isinstance(value, list):
+        return [fresh_copy(item) for item in value]
+    return value
+
+# ------------------------------------------------------------------------------
+# Statistics per memoized function
+
+STAT_COUNTERS = ['memory_hits', 'backend_hits', 'misses', 'coalesced', 'evictions', 'oversized']
+
+class MemoryLRU:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (value, size, expires_at, function)
+        self.total_bytes = 0
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def function_stats(self, function):
+        if function not in self.stats:
+            self.stats[function] = dict.fromkeys(STAT_COUNTERS, 0) | {'entries': 0, 'bytes': 0}
+        return self.stats[function]
+
+    def count(self, function, counter):
+        with self.lock:
+            self.function_stats(function)[counter] += 1
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at, function = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self.remove(key)
+                return None
+
+            self.entries.move_to_end(key)
+            self.function_stats(function)['memory_hits'] += 1
+        return fresh_copy(value)
+
+    def set(self, key, value, function, timeout=None):
+        if not self.max_bytes:
+            return False
+
+        size = estimate_size(value)
+        expires_at = time.monotonic() + timeout if timeout else None
+
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            if size > self.max_bytes:
+                self.function_stats(function)['oversized'] += 1 # Too large to keep in memory
+                return False
+
+            self.entries[key] = (value, size, expires_at, function)
+            self.total_bytes += size
+            stats = self.function_stats(function)
+            stats['entries'] += 1
+            stats['bytes'] += size
+
+            while self.total_bytes > self.max_bytes:
+                oldest_key, (_, _, _, oldest_function) = next(iter(self.entries.items()))
+                self.remove(oldest_key)
+                self.function_stats(oldest_function)['evictions'] += 1
+        return True
+
+    # Called with the lock held
+    def remove(self, key):
+        value, size, expires_at, function = self.entries.pop(key)
+        self.total_bytes -= size
+        stats = self.function_stats(function)
+        stats['entries'] -= 1
+        stats['bytes'] -= size
+
+    def snapshot(self):
+        with self.lock:
+            functions = {function: dict(stats) for function, stats in self.stats.items()}
+            total_bytes, entries = self.total_bytes, len(self.entries)
+
+        for stats in functions.values():
+            lookups = stats['memory_hits'] + stats['backend_hits'] + stats['misses']
+            stats['hit_ratio'] = round((stats['memory_hits'] + stats['backend_hits']) / lookups, 3) if lookups else 0.0
+
+        return {
+            'pid': os.getpid(),
+            'max_bytes': self.max_bytes,
+            'bytes': total_bytes,
+            'entries': entries,
+            'functions': functions
+        }
+
+memory_cache = MemoryLRU(memory_cache_bytes())
@@ -0,0 +1,85 @@
+import os
+import re
+import hashlib
+from sqlalchemy import text
+
+# ------------------------------------------------------------------------------
+# Schema migrations of the remote database
+#
+# Migrations are the SQL files in ./migrations named V<version>__<name>.sql, applied in version
+# order and recorded in the SchemaMigrations table with a checksum. Every statement is written to
+# be repeatable (IF NOT EXISTS), so a migration can be re-run safely on a database that already has
+# its changes, e.g. one created from setup.sql.
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^V(\d+)__(\w+)\.sql$')
+
+CREATE_MIGRATIONS_TABLE_SQL = text("""
+    CREATE TABLE IF NOT EXISTS SchemaMigrations
+    (
+        Version INT PRIMARY KEY,
+        Name VARCHAR(255) NOT NULL,
+        Checksum VARCHAR(64) NOT NULL,
+        AppliedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+""")
+
+# (version, name, path) of every migration file, in version order
+def migration_files():
+    migrations = []
+    for file_name in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, file_name)))
+    return sorted(migrations)
+
+def read_migration(path):
+    with open(path) as migration_file:
+        return migration_file.read()
+
+def checksum(sql):
+    return hashlib.sha256(sql.encode()).hexdigest()
+
+# Split a migration into its statements, dropping comment-only chunks
+def migration_statements(sql):
+    statements = []
+    for chunk in sql.split(';'):
+        lines = [line for line in chunk.splitlines() if line.strip() and not line.strip().startswith('--')]
+        if lines:
+            statements.append('\n'.join(lines))
+    return statements
+
+# Version -> checksum of the migrations already applied
+def applied_migrations(engine):
+    with engine.begin() as conn:
+        conn.execute(CREATE_MIGRATIONS_TABLE_SQL)
+        rows = conn.execute(text("SELECT version, checksum FROM SchemaMigrations")).all()
+    return {version: checksum for version, checksum in rows}
+
+# Apply the pending migrations, each in its own transaction, and return the versions applied
+def run_migrations(engine):
+    applied = applied_migrations(engine)
+    versions = []
+
+    for version, name, path in migration_files():
+        sql = read_migration(path)
+        if version in applied:
+            if applied[version] != checksum(sql):
+                print(f"Warning: migration V{version:03d}__{name} changed after it was applied")
+            continue
+
+        with engine.begin() as conn:
+            for statement in migration_statements(sql):
+                conn.exec_driver_sql(statement)
+            conn.execute(text("INSERT INTO SchemaMigrations (version, name, checksum) VALUES (:version, :name, :checksum)"),
+                         {'version': version, 'name': name, 'checksum': checksum(sql)})
+
+        print(f"Applied migration V{version:03d}__{name}")
+        versions.append(version)
+
+    return versions
+
+# (version, name, applied) of every migration file
+def migration_status(engine):
+    applied = applied_migrations(engine)
+    return [(version, name, version in applied) for version, name, path in migration_files()]
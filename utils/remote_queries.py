@@ -0,0 +1,122 @@
+import pandas as pd
+from sqlalchemy import text
+from .local_store import month_bounds
+from .transactions_table import TEXT_COLUMNS
+
+# ------------------------------------------------------------------------------
+# Remote query layer
+#
+# Parameterized queries against the remote database. Every transaction query is bounded by
+# user and date range, so only the rows that are actually displayed are sent to the app.
+
+TRANSACTION_COLUMNS = ['transactionid', 'userid', 'date', 'categoryname', 'amount', 'description']
+
+def user_transactions(engine, user_id):
+    query = text("SELECT * FROM Transactions WHERE userid = :userid ORDER BY date")
+    return pd.read_sql(query, engine, params={'userid': user_id}, parse_dates=['date'])
+
+def user_monthly_budgets(engine, user_id):
+    query = text("SELECT * FROM MonthlyBudgets WHERE userid = :userid")
+    return pd.read_sql(query, engine, params={'userid': user_id}, parse_dates=['budgetmonth'])
+
+def user_categorical_budgets(engine, user_id):
+    query = text("SELECT * FROM CategoricalBudgets WHERE userid = :userid")
+    return pd.read_sql(query, engine, params={'userid': user_id})
+
+# ------------------------------------------------------------------------------
+# Month-bounded queries
+
+def month_params(user_id, year, month):
+    start, end = month_bounds(year, month)
+    return {'userid': user_id, 'start': start.date(), 'end': end.date()}
+
+# The transactions of one month, sorted by date
+def month_transactions(engine, user_id, year, month, columns=None):
+    columns = [column for column in (columns or TRANSACTION_COLUMNS) if column in TRANSACTION_COLUMNS]
+    query = text(f"""
+        SELECT {', '.join(columns)} FROM Transactions
+        WHERE userid = :userid AND date >= :start AND date < :end
+        ORDER BY date
+    """)
+    parse_dates = ['date'] if 'date' in columns else None
+    return pd.read_sql(query, engine, params=month_params(user_id, year, month), parse_dates=parse_dates)
+
+# Total spent per user, day and category across all transactions, used to verify the rollups
+def daily_category_totals(engine):
+    query = text("""
+        SELECT userid, date, categoryname, SUM(amount) AS amount, COUNT(*) AS count FROM Transactions
+        WHERE date IS NOT NULL
+        GROUP BY userid, date, categoryname
+    """)
+    return pd.read_sql(query, engine, parse_dates=['date'])
+
+# Date of the user's most recent transaction, or None if there are none
+def latest_transaction_date(engine, user_id):
+    query = text("SELECT MAX(date) FROM Transactions WHERE userid = :userid")
+    with engine.connect() as conn:
+        latest = conn.execute(query, {'userid': user_id}).scalar()
+    return pd.Timestamp(latest) if latest is not None else None
+
+# ------------------------------------------------------------------------------
+# Transactions table pages (see transactions_table.py)
+#   The month bounds keep the query on the (userid, date) index; the conditions and the sort
+#   columns come from a fixed set of columns, their values are bound parameters.
+
+SQL_OPERATORS = {'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>='}
+
+# Text of a column, lowered for case insensitive conditions
+def column_text(column, case_sensitive=True):
+    expression = f"CAST({column} AS TEXT)" if column in ('date', 'amount') else column
+    return expression if case_sensitive else f"LOWER({expression})"
+
+# Extra WHERE clauses and their parameters of the table filter conditions
+def filter_clauses(engine, conditions):
+    # Case sensitive substring search (LIKE is not case sensitive on SQLite)
+    position = 'instr({column}, {value})' if engine.dialect.name == 'sqlite' else 'strpos({column}, {value})'
+
+    clauses, params = [], {}
+    for i, (column, operator, value, case_sensitive) in enumerate(conditions):
+        if operator == 'nil' or (operator == 'blank' and column not in TEXT_COLUMNS):
+            clauses.append(f"{column} IS NULL")
+            continue
+        if operator == 'blank':
+            clauses.append(f"({column} IS NULL OR {column} = '')")
+            continue
+
+        name = f'filter{i}'
+        if column == 'date' and not isinstance(value, str):
+            value = value.date()
+
+        if operator == 'contains':
+            clauses.append(position.format(column=column_text(column, case_sensitive), value=':' + name) + ' > 0')
+        elif operator == 'datestartswith':
+            clauses.append(f"{column_text(column)} LIKE :{name}")
+            value = value.replace('%', '').replace('_', '') + '%'
+        elif isinstance(value, str) and not case_sensitive:
+            clauses.append(f"{column_text(column, False)} {SQL_OPERATORS[operator]} :{name}")
+        else:
+            clauses.append(f"{column} {SQL_OPERATORS[operator]} :{name}")
+
+        params[name] = value.lower() if isinstance(value, str) and not case_sensitive else value
+    return clauses, params
+
+# One page of a month's transactions (filtered, sorted with NULLs last, then the most recent first) and the number of matching rows
+def month_transactions_page(engine, user_id, year, month, conditions, sort, offset, limit):
+    clauses, params = filter_clauses(engine, conditions)
+    where = ' AND '.join(['userid = :userid', 'date >= :start', 'date < :end'] + clauses)
+    order = ', '.join([f"{column} {'ASC' if ascending else 'DESC'} NULLS LAST" for column, ascending in sort] +
+                      ['date DESC', 'transactionid DESC'])
+    params |= month_params(user_id, year, month)
+
+    page_query = text(f"""
+        SELECT date, categoryname, amount, description FROM Transactions
+        WHERE {where}
+        ORDER BY {order}
+        LIMIT :limit OFFSET :offset
+    """)
+    count_query = text(f"SELECT COUNT(*) FROM Transactions WHERE {where}")
+
+    with engine.connect() as conn:
+        total = conn.execute(count_query, params).scalar()
+        page_df = pd.read_sql(page_query, conn, params=params | {'limit': limit, 'offset': offset}, parse_dates=['date'])
+    return page_df, total
@@ -0,0 +1,219 @@
+import os
+import pandas as pd
+from sqlalchemy import text
+from . import local_store
+from .remote_queries import daily_category_totals
+
+# ------------------------------------------------------------------------------
+# Monthly spending rollups
+#
+# Spending is pre-aggregated per (userid, year, month, day, categoryname) with the sum and
+# count of the matching transactions. The dashboard reads category totals, the daily series
+# and the month total from the rollups instead of aggregating raw transactions on every render.
+# Locally the rollups are a partitioned table in the store, remotely the SpendingRollups table.
+
+ROLLUP_TABLE = 'spendingrollups'
+ROLLUP_KEYS = local_store.SUMMED_TABLES[ROLLUP_TABLE]
+
+# Aggregate transactions into rollup rows
+def rollup_rows(transactions_df):
+    if transactions_df.empty:
+        return local_store.empty_table(ROLLUP_TABLE)
+
+    dates = pd.to_datetime(transactions_df['date'])
+    df = pd.DataFrame({
+        'userid': transactions_df['userid'].astype('int64'),
+        'year': dates.dt.year,
+        'month': dates.dt.month,
+        'day': dates.dt.day,
+        'categoryname': transactions_df['categoryname'],
+        'amount': transactions_df['amount'].astype('float64')
+    })
+
+    rollups = df.groupby(ROLLUP_KEYS, as_index=False).agg(total=('amount', 'sum'), count=('amount', 'size'))
+    return local_store.apply_schema(ROLLUP_TABLE, rollups)
+
+# ------------------------------------------------------------------------------
+# Local rollups
+#   The rollups are a logged table of the store, summed by key (local_store.SUMMED_TABLES): an
+#   append adds the new transactions' rollup rows to the user's rollup log as deltas, which reads
+#   and compaction add to the snapshot. Snapshots are month indexed on (year, month), so the
+#   dashboard decodes only the selected month.
+#
+#   An append writes the transaction log and then the rollups, two files. The manifest records how
+#   many transactions each user's rollups cover ({"spendingrollups": {"transactions": {"1": 120}}}),
+#   and a read that counts a different number of transactions (an append that failed or crashed
+#   between the two writes) rebuilds the user's rollups. Appends hold the user's update lock, so an
+#   append in progress is not taken for one that failed.
+
+# Build the local rollups from the transactions the first time they are needed
+def ensure_local_rollups():
+    if local_store.is_partitioned(ROLLUP_TABLE):
+        return
+
+    with local_store.file_lock(os.path.join(local_store.STORE_DIR, 'migrate.lock')):
+        if not local_store.is_partitioned(ROLLUP_TABLE):
+            rebuild_local_rollups()
+
+def update_lock(user_id):
+    return local_store.file_lock(local_store.partition_name(ROLLUP_TABLE, user_id) + '.update.lock')
+
+def covered_transactions(user_id):
+    return local_store.read_manifest().get(ROLLUP_TABLE, {}).get('transactions', {}).get(str(int(user_id)))
+
+# Set the number of transactions covered by the rollups of each user ({user_id: count}), or add to it
+def record_covered_transactions(counts, added=False):
+    def change(manifest):
+        covered = manifest[ROLLUP_TABLE].setdefault('transactions', {})
+        for user_id, count in counts.items():
+            key = str(int(user_id))
+            covered[key] = covered.get(key, 0) + count if added else count
+    local_store.update_manifest(change)
+
+# Rollup rows of transaction records, summed in Python: appends carry a few records, for which
+# building and grouping frames (rollup_rows) costs more than the rest of the append
+def record_rollups(records):
+    totals = {}
+    for record in records:
+        if record.get('date') is None or pd.isna(record['date']):
+            continue
+
+        date = pd.Timestamp(record['date'])
+        key = (int(record['userid']), date.year, date.month, date.day, record['categoryname'])
+        amount = record.get('amount')
+        total, count = totals.get(key, (0.0, 0))
+        totals[key] = (total + (0.0 if amount is None or pd.isna(amount) else float(amount)), count + 1)
+
+    return [dict(zip(ROLLUP_KEYS, key), total=total, count=count) for key, (total, count) in totals.items()]
+
+# Incrementally add new transaction records to the local rollups of their users, as deltas in their rollup logs
+def add_local_rollups(records):
+    local_store.append_rows(ROLLUP_TABLE, record_rollups(records))
+
+# Append transactions to the logs and rollups of their users, and return their new IDs in the same order
+def append_transactions_and_rollups(records):
+    ensure_local_rollups() # Build the rollups from the existing transactions before the first increment
+
+    positions_by_user = {}
+    for position, record in enumerate(records):
+        positions_by_user.setdefault(int(record['userid']), []).append(position)
+
+    transactionids = [None] * len(records)
+    for user_id, positions in positions_by_user.items():
+        user_records = [records[position] for position in positions]
+        with update_lock(user_id):
+            user_ids = local_store.append_rows('transactions', user_records)
+            add_local_rollups(user_records)
+            record_covered_transactions({user_id: len(user_records)}, added=True)
+
+        for position, transactionid in zip(positions, user_ids):
+            transactionids[position] = transactionid
+    return transactionids
+
+# Rebuild the user's rollups if they do not cover the same number of transactions as the user's partition
+def check_local_rollups(user_id):
+    if not local_store.is_partitioned('transactions'):
+        return
+    if covered_transactions(user_id) == local_store.partition_row_count('transactions', user_id):
+        return
+
+    with update_lock(user_id):
+        if covered_transactions(user_id) != local_store.partition_row_count('transactions', user_id):
+            rows = rebuild_local_rollups(user_id)
+            print(f"Rebuilt {rows} spending rollups of user {user_id}, they did not cover all of their transactions")
+
+def read_local_month_rollups(user_id, year, month):
+    ensure_local_rollups()
+    check_local_rollups(user_id)
+    return local_store.read_month(ROLLUP_TABLE, user_id, year, month).reset_index(drop=True)
+
+# Recompute the local rollups from the transactions, for every user or a single one
+def rebuild_local_rollups(user_id=None):
+    transactions_df = local_store.read_table('transactions', user_id=user_id)
+    rollups = rollup_rows(transactions_df)
+    local_store.write_table(ROLLUP_TABLE, rollups, user_id)
+
+    counts = transactions_df.groupby('userid').size()
+    user_ids = [user_id] if user_id is not None else set(local_store.table_partitions('transactions')) | set(counts.index)
+    record_covered_transactions({uid: int(counts.get(uid, 0)) for uid in user_ids})
+    return len(rollups)
+
+def verify_local_rollups():
+    ensure_local_rollups()
+    expected = rollup_rows(local_store.read_table('transactions'))
+    return compare_rollups(expected, local_store.read_table(ROLLUP_TABLE))
+
+# ------------------------------------------------------------------------------
+# Remote rollups (SpendingRollups table, see setup.sql)
+
+UPSERT_ROLLUP_SQL = text("""
+    INSERT INTO SpendingRollups (userid, year, month, day, categoryname, total, count)
+    VALUES (:userid, :year, :month, :day, :categoryname, :total, :count)
+    ON CONFLICT (userid, year, month, day, categoryname)
+    DO UPDATE SET total = SpendingRollups.total + EXCLUDED.total,
+                  count = SpendingRollups.count + EXCLUDED.count
+""")
+
+REBUILD_ROLLUPS_SQL = text("""
+    INSERT INTO SpendingRollups (userid, year, month, day, categoryname, total, count)
+    SELECT userid, EXTRACT(YEAR FROM date), EXTRACT(MONTH FROM date), EXTRACT(DAY FROM date),
+           categoryname, SUM(amount), COUNT(*)
+    FROM Transactions
+    WHERE date IS NOT NULL
+    GROUP BY userid, EXTRACT(YEAR FROM date), EXTRACT(MONTH FROM date), EXTRACT(DAY FROM date), categoryname
+""")
+
+# SQLite has no EXTRACT, dates are ISO strings there
+REBUILD_ROLLUPS_SQLITE_SQL = text("""
+    INSERT INTO SpendingRollups (userid, year, month, day, categoryname, total, count)
+    SELECT userid, CAST(strftime('%Y', date) AS INTEGER), CAST(strftime('%m', date) AS INTEGER),
+           CAST(strftime('%d', date) AS INTEGER), categoryname, SUM(amount), COUNT(*)
+    FROM Transactions
+    WHERE date IS NOT NULL
+    GROUP BY userid, strftime('%Y', date), strftime('%m', date), strftime('%d', date), categoryname
+""")
+
+# Incrementally add new transactions to the remote rollups, inside the caller's transaction
+def add_remote_rollups(conn, transactions_df):
+    rollups = rollup_rows(transactions_df)
+    if not rollups.empty:
+        conn.execute(UPSERT_ROLLUP_SQL, rollups.astype(object).to_dict('records'))
+
+def read_remote_month_rollups(engine, user_id, year, month):
+    query = text("SELECT * FROM SpendingRollups WHERE userid = :userid AND year = :year AND month = :month")
+    df = pd.read_sql(query, engine, params={'userid': user_id, 'year': year, 'month': month})
+    return local_store.apply_schema(ROLLUP_TABLE, df)
+
+def rebuild_remote_rollups(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM SpendingRollups"))
+        conn.execute(REBUILD_ROLLUPS_SQLITE_SQL if engine.dialect.name == 'sqlite' else REBUILD_ROLLUPS_SQL)
+        return conn.execute(text("SELECT COUNT(*) FROM SpendingRollups")).scalar()
+
+# Compare the rollups with totals grouped by the database, without pulling the transactions
+def verify_remote_rollups(engine):
+    totals_df = daily_category_totals(engine)
+    expected = local_store.apply_schema(ROLLUP_TABLE, pd.DataFrame({
+        'userid': totals_df['userid'],
+        'year': totals_df['date'].dt.year,
+        'month': totals_df['date'].dt.month,
+        'day': totals_df['date'].dt.day,
+        'categoryname': totals_df['categoryname'],
+        'total': totals_df['amount'],
+        'count': totals_df['count']
+    }))
+
+    rollups_df = pd.read_sql(text("SELECT * FROM SpendingRollups"), engine)
+    return compare_rollups(expected, local_store.apply_schema(ROLLUP_TABLE, rollups_df))
+
+# ------------------------------------------------------------------------------
+# Verification
+
+# Return the rollup keys whose stored total or count differ from the expected ones
+def compare_rollups(expected_df, stored_df):
+    merged = pd.merge(expected_df, stored_df, on=ROLLUP_KEYS, how='outer', suffixes=('_expected', '_stored'))
+    merged = merged.fillna({'total_expected': 0, 'total_stored': 0, 'count_expected': 0, 'count_stored': 0})
+
+    mismatched = ((merged['total_expected'] - merged['total_stored']).abs() > 0.005) | \
+                 (merged['count_expected'] != merged['count_stored'])
+    return merged[mismatched].reset_index(drop=True)
@@ -0,0 +1,111 @@
+import os
+from sqlalchemy import (MetaData, Table, Column, Integer, String, Text, Date, Numeric, ForeignKey, Index,
+                        PrimaryKeyConstraint, inspect)
+from . import local_store
+from .migrations import run_migrations
+from .rollups import rebuild_remote_rollups
+
+# ------------------------------------------------------------------------------
+# Embedded SQLite database (STORAGE_BACKEND=sqlite)
+#
+# Runs through the same SQL code path as PostgreSQL, with the tables and indexes of setup.sql
+# declared below. Connections use WAL mode (see db_pool.py), so several Gunicorn workers can
+# read while one of them writes. SQLITE_PATH selects the database file, ':memory:' keeps it in memory.
+
+def sqlite_path():
+    return os.getenv('SQLITE_PATH', './localdb/budgetr.db')
+
+def sqlite_url():
+    return f'sqlite:///{sqlite_path()}'
+
+# ------------------------------------------------------------------------------
+# Schema, mirroring setup.sql and the migrations (same index names, so the migrations skip them)
+
+schema = MetaData()
+
+Table('users', schema,
+      Column('userid', Integer, primary_key=True),
+      Column('name', String(255)),
+      Column('email', String(255)),
+      Column('password', String(255)),
+      Index('Users_Email_Key', 'email', unique=True))
+
+Table('categories', schema,
+      Column('name', String(255), primary_key=True))
+
+Table('monthlybudgets', schema,
+      Column('budgetid', Integer, primary_key=True),
+      Column('userid', Integer, ForeignKey('users.userid'), nullable=False),
+      Column('totalbudget', Numeric(10, 2)),
+      Column('budgetmonth', Date), # Storing only the first day of the month to represent the whole month
+      Index('MonthlyBudgets_UserID_BudgetMonth_Key', 'userid', 'budgetmonth', unique=True))
+
+Table('categoricalbudgets', schema,
+      Column('catbudgetid', Integer, primary_key=True),
+      Column('userid', Integer, ForeignKey('users.userid'), nullable=False),
+      Column('categoryname', String(255), ForeignKey('categories.name'), nullable=False),
+      Column('categorybudget', Numeric(10, 2)),
+      Index('CategoricalBudgets_UserID_CategoryName_Key', 'userid', 'categoryname', unique=True))
+
+Table('transactions', schema,
+      Column('transactionid', Integer, primary_key=True),
+      Column('userid', Integer, ForeignKey('users.userid'), nullable=False),
+      Column('date', Date),
+      Column('categoryname', String(255), ForeignKey('categories.name'), nullable=False),
+      Column('amount', Numeric(10, 2)),
+      Column('description', Text),
+      Index('Transactions_UserID_Date_Idx', 'userid', 'date'))
+
+Table('spendingrollups', schema,
+      Column('userid', Integer, ForeignKey('users.userid'), nullable=False),
+      Column('year', Integer, nullable=False),
+      Column('month', Integer, nullable=False),
+      Column('day', Integer, nullable=False),
+      Column('categoryname', String(255), ForeignKey('categories.name'), nullable=False),
+      Column('total', Numeric(12, 2), nullable=False, server_default='0'),
+      Column('count', Integer, nullable=False, server_default='0'),
+      PrimaryKeyConstraint('userid', 'year', 'month', 'day', 'categoryname'))
+
+# Tables in foreign key order, for the initial import
+SEED_TABLES = ['users', 'categories', 'monthlybudgets', 'categoricalbudgets', 'transactions']
+
+# ------------------------------------------------------------------------------
+
+# Lock held while a worker creates and fills the database, next to the database file
+def init_lock_path():
+    path = sqlite_path()
+    return os.path.abspath(path if path != ':memory:' else os.path.join(local_store.STORE_DIR, 'sqlite')) + '.init.lock'
+
+# Create the schema if needed, and fill a new database with the data of the local database
+#   Every Gunicorn worker runs this on startup; the first one to take the lock creates the
+#   database, the others wait for it and then find the tables in place.
+def init_sqlite_database(engine):
+    with local_store.file_lock(init_lock_path()):
+        new_database = not inspect(engine).has_table('users')
+
+        schema.create_all(engine)
+        run_migrations(engine) # Records the migrations as applied, their indexes already exist
+
+        if new_database:
+            rows = import_local_database(engine)
+            print(f"Created the SQLite database with {rows} rows from the local database")
+
+# Copy every table of the local database (the store, or the CSV files if not migrated) into SQLite
+def import_local_database(engine):
+    rows = 0
+    with engine.begin() as conn:
+        for table_name in SEED_TABLES:
+            if not os.path.exists(local_store.csv_path(table_name)) and not local_store.is_partitioned(table_name):
+                continue
+
+            df = local_store.read_table(table_name)
+            for column in local_store.date_columns(table_name):
+                df[column] = df[column].dt.date
+
+            records = df.astype(object).where(df.notna(), None).to_dict('records')
+            if records:
+                conn.execute(schema.tables[table_name].insert(), records)
+            rows += len(records)
+
+    rebuild_remote_rollups(engine)
+    return rows
@@ -0,0 +1,142 @@
+import re
+import math
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------------------------
+# Transactions table pages
+#
+# The dashboard's transactions table is paged, sorted and filtered on the server (DataTable
+# page_action, sort_action and filter_action 'custom'): the table sends its page, sort_by and
+# filter_query, and only the rows of the visible page are read and sent to the browser.
+#   filter_query  parsed here into (column, operator, value, case_sensitive) conditions, which
+#                 remote_queries.py turns into SQL and filter_transactions() applies to a local month
+#   sort_by       checked against the table columns, then the most recent transactions first
+#
+# Both follow SQL on missing values (a NULL description or amount): only 'is blank' and 'is nil'
+# match them, and they sort after every other value in both directions.
+# Unsupported filters raise a ValueError, rather than showing rows the filter does not match.
+
+# Table columns and the transaction column behind each
+TABLE_COLUMNS = {'date_display': 'date', 'categoryname': 'categoryname', 'amount': 'amount', 'description': 'description'}
+TEXT_COLUMNS = ['categoryname', 'description']
+
+PAGE_SIZE = 15
+
+# DataTable filter operators, by name and symbol
+FILTER_OPERATORS = {
+    '=': 'eq', 'eq': 'eq',
+    '!=': 'ne', 'ne': 'ne',
+    '<': 'lt', 'lt': 'lt',
+    '<=': 'le', 'le': 'le',
+    '>': 'gt', 'gt': 'gt',
+    '>=': 'ge', 'ge': 'ge',
+    'contains': 'contains',
+    'datestartswith': 'datestartswith'
+}
+
+# Operators without a value: 'is nil' matches missing values, 'is blank' also empty text
+UNARY_OPERATORS = {'is blank': 'blank', 'is nil': 'nil'}
+
+FILTER_CONDITION = re.compile(r'^\{(?P<column>[^}]+)\}\s+(?P<operator>\S+)\s+(?P<value>.+)$')
+UNARY_CONDITION = re.compile(r'^\{(?P<column>[^}]+)\}\s+(?P<operator>is\s+(?:blank|nil))$')
+
+def filter_value(column, operator, value):
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in '"\'`': # Quoted value
+        value = value[1:-1].replace('\\' + value[0], value[0])
+
+    if operator == 'datestartswith':
+        if column != 'date':
+            raise ValueError(f"datestartswith only applies to dates, not {column}")
+        return value
+    if column == 'amount':
+        if operator == 'contains':
+            raise ValueError("contains only applies to text")
+        return float(value)
+    if column == 'date' and operator != 'contains':
+        return pd.Timestamp(value)
+    return value
+
+# Conditions of a DataTable filter query, e.g. '{amount} > 20 && {categoryname} icontains food'
+def parse_filter_query(filter_query):
+    conditions = []
+    for part in (filter_query or '').split(' && '):
+        if not part.strip():
+            continue
+
+        match = UNARY_CONDITION.match(part.strip())
+        if match is not None and match['column'] in TABLE_COLUMNS:
+            operator = UNARY_OPERATORS[' '.join(match['operator'].split())]
+            conditions.append((TABLE_COLUMNS[match['column']], operator, None, True))
+            continue
+
+        match = FILTER_CONDITION.match(part.strip())
+        if match is None or match['column'] not in TABLE_COLUMNS:
+            raise ValueError(f"Unsupported filter '{part.strip()}'")
+
+        # Operators may be prefixed with s (case sensitive, the default) or i (case insensitive)
+        operator = match['operator']
+        case_sensitive = not operator.startswith('i')
+        if operator[0] in 'si' and operator[1:] in FILTER_OPERATORS:
+            operator = operator[1:]
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unsupported filter '{part.strip()}'")
+
+        column = TABLE_COLUMNS[match['column']]
+        operator = FILTER_OPERATORS[operator]
+        conditions.append((column, operator, filter_value(column, operator, match['value']), case_sensitive))
+    return conditions
+
+# (column, ascending) pairs of a DataTable sort_by
+def sort_columns(sort_by):
+    sort = []
+    for entry in sort_by or []:
+        if entry.get('column_id') not in TABLE_COLUMNS:
+            raise ValueError(f"Unsupported sort column '{entry.get('column_id')}'")
+        sort.append((TABLE_COLUMNS[entry['column_id']], entry.get('direction') == 'asc'))
+    return sort
+
+def page_count(total, page_size):
+    return max(math.ceil(total / page_size), 1)
+
+# ------------------------------------------------------------------------------
+# Local pages
+#   A month of the local store is a single row group (see local_store.read_month), small enough
+#   to filter and sort in memory before slicing out the page.
+
+def filter_transactions(transactions_df, conditions):
+    mask = np.ones(len(transactions_df), dtype=bool)
+    for column, operator, value, case_sensitive in conditions:
+        values = transactions_df[column]
+        missing = values.isna().to_numpy()
+        if operator in UNARY_OPERATORS.values():
+            if operator == 'blank' and column in TEXT_COLUMNS:
+                missing |= (values == '').to_numpy()
+            mask &= missing
+            continue
+
+        mask &= ~missing # Missing values match no comparison, as NULL in SQL
+        if operator in ('contains', 'datestartswith') or (column in TEXT_COLUMNS and not case_sensitive):
+            values = values.dt.strftime('%Y-%m-%d') if column == 'date' else values.fillna('')
+            if not case_sensitive:
+                values, value = values.str.lower(), value.lower()
+
+        if operator == 'contains':
+            mask &= values.str.contains(value, regex=False).to_numpy(dtype=bool)
+        elif operator == 'datestartswith':
+            mask &= values.str.startswith(value).to_numpy(dtype=bool)
+        else:
+            mask &= getattr(values, operator)(value).to_numpy(dtype=bool)
+    return transactions_df[mask]
+
+# Sorted by the given columns (missing values last), then the most recent first (the last added first within a day)
+def order_transactions(transactions_df, sort=()):
+    by = [column for column, _ in sort] + ['date', 'transactionid']
+    ascending = [ascending for _, ascending in sort] + [False, False]
+    return transactions_df.sort_values(by, ascending=ascending, kind='stable', na_position='last')
+
+# Rows of one page of a month and the number of matching rows
+def local_transactions_page(transactions_df, conditions, sort, offset, limit):
+    transactions_df = filter_transactions(transactions_df, conditions)
+    return order_transactions(transactions_df, sort).iloc[offset:offset + limit], len(transactions_df)
@@ -1,7 +1,6 @@
 import hashlib
-import pandas as pd
 from sqlalchemy import text
-from .load_data import local_users_url, load_local_users, global_engine
+from .load_data import load_local_users, save_local_users, next_local_id, global_engine
 
 # Encrypts the password using SHA256
 def hash_password(password):
@@ -13,9 +12,8 @@ def hash_password(password):
 # Creates a new user in the remote PostgreSQL database
 def create_remote_user(name, email, password):
     with global_engine.begin() as conn:
-        conn.execute(text('INSERT INTO users (name, email, password) VALUES (:name, :email, :password)'), {'name': name, 'email': email, 'password': hash_password(password)})
-        result = conn.execute(text('SELECT userid FROM users WHERE email=:email'), {'email': email}).fetchone()
-        return result[0] if result else None # Return the user ID if the user was created successfully
+        result = conn.execute(text('INSERT INTO users (name, email, password) VALUES (:name, :email, :password) RETURNING userid'), {'name': name, 'email': email, 'password': hash_password(password)}).fetchone()
+        return result[0] if result else None # Return the user ID generated by the SERIAL sequence
 
 # Validates the user credentials in the remote PostgreSQL database
 def validate_remote_user(email, password):
@@ -41,9 +39,9 @@ def delete_remote_user(userid):
 
 # Creates a new user in the local DB
 def create_local_user(name, email, password):
-    users_df = pd.read_csv(local_users_url())
+    users_df = load_local_users()
 
-    userid = users_df['userid'].max() + 1
+    userid = next_local_id('users') # Reserved from the ID allocator, so concurrent sign-ups never share an ID
     new_user = {
         'userid': userid, 
         'name': name, 
@@ -52,13 +50,13 @@ def create_local_user(name, email, password):
         }
     
     users_df.loc[len(users_df)] = new_user # Append the new user to the end of the DataFrame
-    users_df.to_csv(local_users_url(), index=False)
+    save_local_users(users_df)
 
     return int(userid) # Ensures this is not a numpy.int64
 
 # Validates the user credentials in the local DB
 def validate_local_user(email, password):
-    users_df = pd.read_csv(local_users_url())
+    users_df = load_local_users(['userid', 'email', 'password'])
     user = users_df[(users_df['email'] == email) & (users_df['password'] == hash_password(password))]
     if not user.empty:
         return int(user.iloc[0]['userid'])  # Ensure this is a standard Python integer
@@ -66,11 +64,11 @@ def validate_local_user(email, password):
 
 # Checks if an email exists in the local DB during user registration
 def email_exists_local(email):
-    users_df = load_local_users()
+    users_df = load_local_users(['email'])
     return not users_df[users_df['email'] == email].empty
 
 # Deletes a user from the local DB
 def delete_local_user(userid):
-    users_df = pd.read_csv(load_local_users())
+    users_df = load_local_users()
     users_df = users_df[users_df['userid'] != userid]
-    users_df.to_csv(load_local_users(), index=False)
+    save_local_users(users_df)
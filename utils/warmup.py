@@ -0,0 +1,52 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from .load_data import run_as
+
+# ------------------------------------------------------------------------------
+# Background cache warm-up after login
+#
+# Callbacks register warm-up tasks, functions that call their memoized results for the pages a
+# user sees first (e.g. the dashboard's default month). On login, schedule_warmup() runs every
+# task as that user in a background pool, so the first render after the redirect is a cache hit.
+#
+#   WARMUP_THREADS        users warmed up at the same time (default 2), each running its tasks in turn
+#   WARMUP_MAX_PENDING    users waiting for a warm-up before new ones are skipped (default 50)
+#
+# Warm-up is best effort: during a login storm at most WARMUP_THREADS warm-ups hit the database at
+# once, and users beyond WARMUP_MAX_PENDING simply load their pages on the first render.
+
+warmup_tasks = []
+
+warmup_executor = ThreadPoolExecutor(max_workers=int(os.getenv('WARMUP_THREADS', 2)), thread_name_prefix='warmup')
+pending_users = set()
+pending_lock = threading.Lock()
+
+def register_warmup(task):
+    warmup_tasks.append(task)
+    return task
+
+def run_warmup(user_id, app):
+    try:
+        for task in warmup_tasks:
+            try:
+                run_as(user_id, app, task)
+            except Exception as e:
+                print(f"Warm-up of {task.__qualname__} failed for user {user_id}: {e}")
+    finally:
+        with pending_lock:
+            pending_users.discard(user_id)
+
+# Warm the cache of a user in the background, unless a warm-up of theirs is already pending
+def schedule_warmup(user_id):
+    if not warmup_tasks:
+        return False
+
+    with pending_lock:
+        if user_id in pending_users or len(pending_users) >= int(os.getenv('WARMUP_MAX_PENDING', 50)):
+            return False
+        pending_users.add(user_id)
+
+    warmup_executor.submit(run_warmup, user_id, current_app._get_current_object())
+    return True